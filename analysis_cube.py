@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Precomputed listener cube over the merged matchdays.
+
+Every past match lands in one cell of
+  season × competition × home_away × tv_category × weekday × kickoff_block
+and each cell keeps additive accumulators (count, sum, sum of squares, min,
+max and the number of matches without listener data). Any slice or
+grouping is answered by rolling cells up, so the dashboard can filter by
+season or competition client-side from one file instead of a rerun per
+slice. Medians are not additive and stay in the per-analysis outputs.
+
+Output (dashboard/public/output/analysis_cube.json, compact JSON):
+  dimensions  dimension names, in cell coordinate order
+  measures    accumulator names, in cell order
+  values      dimension -> sorted distinct values (null = unknown)
+  cells       [value index per dimension..., measures...]
+  rollups     'season', 'competition', 'season|competition', ... ->
+              same row layout for that grouping (precomputed marginals)
+
+Usage: python3 analysis_cube.py [merged_matchdays.json] [output.json]
+"""
+import math
+import os
+import sys
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import analyze_matchdays
+from pipeline_state import write_json_atomic
+from seasons import season_for_date
+
+DIMENSIONS = ('season', 'competition', 'home_away', 'tv_category', 'weekday', 'kickoff_block')
+MEASURES = ('count', 'sum', 'sumsq', 'min', 'max', 'missing')
+
+# Groupings written as precomputed rollups: every single dimension and season × each other one
+ROLLUPS = [(dimension,) for dimension in DIMENSIONS] + [
+    ('season', dimension) for dimension in DIMENSIONS if dimension != 'season'
+]
+
+
+def _home_away(record: Dict[str, Any]) -> Optional[str]:
+    value = (record.get('home_away') or '').lower()
+    if value in ('thuis', 'home'):
+        return 'Thuis'
+    if value in ('uit', 'away'):
+        return 'Uit'
+    return None
+
+
+def _kickoff_block(record: Dict[str, Any]) -> Optional[str]:
+    return analyze_matchdays.get_kickoff_block(analyze_matchdays.parse_kickoff(record.get('kickoff')))
+
+
+# Dimension -> value extractor, using the same categorisation as the per-analysis outputs
+DIMENSION_VALUES: Dict[str, Callable[[Dict[str, Any]], Optional[str]]] = {
+    'season': lambda record: season_for_date(record.get('date')),
+    'competition': lambda record: record.get('competition') or None,
+    'home_away': _home_away,
+    'tv_category': lambda record: analyze_matchdays.categorize_tv_channel(record.get('tv_channel')),
+    'weekday': lambda record: analyze_matchdays.get_weekday(record.get('date')),
+    'kickoff_block': _kickoff_block,
+}
+
+
+@dataclass(slots=True)
+class CubeCell:
+    """Additive listener accumulators for one cell (or a rollup of cells)"""
+    count: int = 0
+    sum: int = 0
+    sumsq: int = 0
+    min: Optional[int] = None
+    max: Optional[int] = None
+    missing: int = 0
+
+    def add(self, listeners: Optional[int]):
+        if listeners is None:
+            self.missing += 1
+            return
+        self.count += 1
+        self.sum += listeners
+        self.sumsq += listeners * listeners
+        self.min = listeners if self.min is None else min(self.min, listeners)
+        self.max = listeners if self.max is None else max(self.max, listeners)
+
+    def merge(self, other: 'CubeCell'):
+        self.count += other.count
+        self.sum += other.sum
+        self.sumsq += other.sumsq
+        self.missing += other.missing
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+        if other.max is not None:
+            self.max = other.max if self.max is None else max(self.max, other.max)
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.sum / self.count if self.count else None
+
+    @property
+    def stddev(self) -> Optional[float]:
+        """Population standard deviation"""
+        if not self.count:
+            return None
+        mean = self.sum / self.count
+        return math.sqrt(max(self.sumsq / self.count - mean * mean, 0.0))
+
+    def row(self) -> List[Any]:
+        return [self.count, self.sum, self.sumsq, self.min, self.max, self.missing]
+
+    @classmethod
+    def from_row(cls, row: Sequence[Any]) -> 'CubeCell':
+        return cls(*row)
+
+
+def _matches(value: Any, wanted: Any) -> bool:
+    if isinstance(wanted, (list, tuple, set, frozenset)):
+        return value in wanted
+    return value == wanted
+
+
+class AnalysisCube:
+    """Cells keyed by a tuple of dimension values"""
+
+    def __init__(self, dimensions: Sequence[str] = DIMENSIONS):
+        unknown = [d for d in dimensions if d not in DIMENSION_VALUES]
+        if unknown:
+            raise ValueError(f"Unknown cube dimensions: {', '.join(unknown)}")
+        self.dimensions = tuple(dimensions)
+        self._extractors = [DIMENSION_VALUES[d] for d in self.dimensions]
+        self.cells: Dict[Tuple[Optional[str], ...], CubeCell] = {}
+
+    def add(self, record: Dict[str, Any]):
+        key = tuple(extract(record) for extract in self._extractors)
+        cell = self.cells.get(key)
+        if cell is None:
+            cell = self.cells[key] = CubeCell()
+        cell.add(record.get('listeners'))
+
+    def add_records(self, records: Iterable[Dict[str, Any]]) -> 'AnalysisCube':
+        for record in records:
+            self.add(record)
+        return self
+
+    def merge(self, other: 'AnalysisCube'):
+        """Fold another cube with the same dimensions into this one"""
+        if other.dimensions != self.dimensions:
+            raise ValueError("Cannot merge cubes with different dimensions")
+        for key, cell in other.cells.items():
+            target = self.cells.get(key)
+            if target is None:
+                target = self.cells[key] = CubeCell()
+            target.merge(cell)
+
+    def rollup(self, by: Sequence[str] = (), **filters) -> Dict[Tuple[Optional[str], ...], CubeCell]:
+        """
+        Group cells by the `by` dimensions, keeping only cells that match
+        filters (dimension=value or dimension=[values]).
+        """
+        positions = [self.dimensions.index(d) for d in by]
+        checks = [(self.dimensions.index(d), wanted) for d, wanted in filters.items()]
+        grouped: Dict[Tuple[Optional[str], ...], CubeCell] = {}
+        for key, cell in self.cells.items():
+            if any(not _matches(key[position], wanted) for position, wanted in checks):
+                continue
+            group = tuple(key[position] for position in positions)
+            target = grouped.get(group)
+            if target is None:
+                target = grouped[group] = CubeCell()
+            target.merge(cell)
+        return grouped
+
+    def total(self, **filters) -> CubeCell:
+        return self.rollup((), **filters).get((), CubeCell())
+
+    def values(self, dimension: str) -> List[Optional[str]]:
+        position = self.dimensions.index(dimension)
+        return sorted({key[position] for key in self.cells}, key=lambda v: (v is not None, v or ''))
+
+    def to_json(self, rollups: Iterable[Tuple[str, ...]] = ROLLUPS) -> Dict[str, Any]:
+        """Compact, index-encoded representation for the dashboard"""
+        values = {d: self.values(d) for d in self.dimensions}
+        index = {d: {v: i for i, v in enumerate(vs)} for d, vs in values.items()}
+
+        def encode(by: Sequence[str], cells: Dict[Tuple[Optional[str], ...], CubeCell]) -> List[List[Any]]:
+            rows = [[index[d][v] for d, v in zip(by, key)] + cell.row() for key, cell in cells.items()]
+            rows.sort()
+            return rows
+
+        payload = {
+            'dimensions': list(self.dimensions),
+            'measures': list(MEASURES),
+            'values': values,
+            'cells': encode(self.dimensions, self.cells),
+            'rollups': {},
+        }
+        for by in rollups:
+            if all(d in self.dimensions for d in by):
+                payload['rollups']['|'.join(by)] = encode(by, self.rollup(by))
+        return payload
+
+    @classmethod
+    def from_json(cls, payload: Dict[str, Any]) -> 'AnalysisCube':
+        cube = cls(payload['dimensions'])
+        width = len(cube.dimensions)
+        values = payload['values']
+        for row in payload['cells']:
+            key = tuple(values[d][i] for d, i in zip(cube.dimensions, row[:width]))
+            cube.cells[key] = CubeCell.from_row(row[width:])
+        return cube
+
+
+def build_cube(records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Cube JSON payload over the given (past) records"""
+    return AnalysisCube().add_records(records).to_json()
+
+
+def save_cube(payload: Dict[str, Any], filepath: str):
+    """Write without indentation; the cell rows would otherwise take a line per number"""
+    directory = os.path.dirname(filepath)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    write_json_atomic(filepath, payload, separators=(',', ':'), ensure_ascii=False)
+
+
+def main():
+    input_file = sys.argv[1] if len(sys.argv) > 1 else 'merged_matchdays.json'
+    output_file = sys.argv[2] if len(sys.argv) > 2 else 'dashboard/public/output/analysis_cube.json'
+    today = datetime.utcnow().date()
+    records = [
+        r for r in analyze_matchdays.load_merged_data(input_file)
+        if not analyze_matchdays.is_future_date(r.get('date', ''), today)
+    ]
+    cube = AnalysisCube().add_records(records)
+    save_cube(cube.to_json(), output_file)
+    print(f"✓ {len(cube.cells)} cells from {len(records)} past records saved to {output_file}")
+    for (season,), cell in sorted(cube.rollup(('season',)).items(), key=lambda item: item[0][0] or ''):
+        mean = f"{cell.mean:.0f}" if cell.mean is not None else "n/a"
+        print(f"  {season or 'Unknown':10s} matches: {cell.count:4d}  avg listeners: {mean}")
+
+
+if __name__ == '__main__':
+    main()
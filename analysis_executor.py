@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Process-pool execution of the independent analysis steps.
+
+Every analysis in analyze_matchdays.py reads the same record list and nothing
+else, so the records are encoded once as a matchday snapshot (see
+matchday_snapshot.py) and handed to each worker by the pool initializer.
+The snapshot has columns for everything run_analysis stamps on the records
+(opponent and opponent position included); only records with a field it
+cannot hold are handed over pickled, and payload_kind says which was used.
+Tasks then only carry a function reference, its keyword arguments and an
+optional date range, instead of pickling the whole record list per task.
+
+Serial mode (workers=0, the default) runs the same tasks in-process on the
+original records and produces identical results.
+
+Environment variables:
+  ANALYSIS_WORKERS=<n>|auto   worker processes (default 0 = serial)
+"""
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from matchday_snapshot import decode_snapshot, encode_snapshot
+from seasons import season_bounds
+
+
+class AnalysisTask(NamedTuple):
+    """One analysis over the shared records: func(records, **kwargs)"""
+    name: str
+    func: Callable[..., Any]
+    kwargs: Dict[str, Any] = {}
+    date_from: Optional[str] = None
+    date_to: Optional[str] = None
+
+
+def default_workers() -> int:
+    value = os.environ.get('ANALYSIS_WORKERS', '0').strip().lower()
+    if value == 'auto':
+        return os.cpu_count() or 1
+    try:
+        return max(0, int(value))
+    except ValueError:
+        return 0
+
+
+def season_variants(tasks: Iterable[AnalysisTask], seasons: Sequence[str]) -> List[AnalysisTask]:
+    """Copies of tasks restricted to seasons like '2024/2025' (1 July to 30 June)"""
+    tasks = list(tasks)
+    variants = []
+    for season in seasons:
+        date_from, date_to = season_bounds(season)
+        for task in tasks:
+            variants.append(task._replace(name=f"{task.name}[{season}]", date_from=date_from, date_to=date_to))
+    return variants
+
+
+def _select(records: List[Dict[str, Any]], date_from: Optional[str], date_to: Optional[str]) -> List[Dict[str, Any]]:
+    if date_from is None and date_to is None:
+        return records
+    return [
+        r for r in records
+        if (date_from is None or r.get('date', '') >= date_from)
+        and (date_to is None or r.get('date', '') <= date_to)
+    ]
+
+
+# Worker-process state, filled once by _init_worker
+_worker_records: List[Dict[str, Any]] = []
+_worker_slices: Dict[Tuple[Optional[str], Optional[str]], List[Dict[str, Any]]] = {}
+
+
+def _worker_payload(records: List[Dict[str, Any]]) -> Union[bytes, List[Dict[str, Any]]]:
+    try:
+        return encode_snapshot(records)
+    except ValueError as exc:
+        print(f"⚠ Handing the records to the workers pickled: {exc}")
+        return records
+
+
+def _init_worker(payload: Union[bytes, List[Dict[str, Any]]]):
+    global _worker_records
+    _worker_records = decode_snapshot(payload) if isinstance(payload, bytes) else payload
+    _worker_slices.clear()
+
+
+def _run_in_worker(task: AnalysisTask) -> Any:
+    key = (task.date_from, task.date_to)
+    records = _worker_slices.get(key)
+    if records is None:
+        records = _worker_slices[key] = _select(_worker_records, *key)
+    return task.func(records, **task.kwargs)
+
+
+class AnalysisExecutor:
+    """
+    Runs AnalysisTasks over one record set, serially or on a process pool.
+    Use as a context manager so the pool is shut down afterwards.
+    """
+
+    def __init__(self, records: List[Dict[str, Any]], workers: Optional[int] = None):
+        self.records = records
+        self.workers = default_workers() if workers is None else workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.payload_kind: Optional[str] = None  # 'snapshot' or 'pickle' once the pool is started
+
+    @property
+    def parallel(self) -> bool:
+        return self.workers > 0
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            payload = _worker_payload(self.records)
+            self.payload_kind = 'snapshot' if isinstance(payload, bytes) else 'pickle'
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(payload,),
+            )
+        return self._pool
+
+    def submit(self, func: Callable[..., Any], *args, **kwargs) -> Future:
+        """Schedule any other picklable job (model fit, aggregation); runs inline when serial"""
+        if self.parallel:
+            return self._get_pool().submit(func, *args, **kwargs)
+        future: Future = Future()
+        try:
+            future.set_result(func(*args, **kwargs))
+        except Exception as exc:
+            future.set_exception(exc)
+        return future
+
+    def run(self, tasks: Iterable[AnalysisTask]) -> Dict[str, Any]:
+        """Run tasks and return name -> result, in task order"""
+        tasks = list(tasks)
+        if not self.parallel:
+            slices: Dict[Tuple[Optional[str], Optional[str]], List[Dict[str, Any]]] = {}
+            results = {}
+            for task in tasks:
+                key = (task.date_from, task.date_to)
+                if key not in slices:
+                    slices[key] = _select(self.records, *key)
+                results[task.name] = task.func(slices[key], **task.kwargs)
+            return results
+
+        pool = self._get_pool()
+        futures = [(task.name, pool.submit(_run_in_worker, task)) for task in tasks]
+        return {name: future.result() for name, future in futures}
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
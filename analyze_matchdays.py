@@ -3,56 +3,48 @@
 Analysis script for merged matchdays data
 Analyzes commentators, kickoff times, and weekday performance
 """
-import json
 import csv
 import os
 import re
 from datetime import datetime, date
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Iterator, Optional, Sequence, Tuple
 from collections import defaultdict
 from statistics import median, mean
 
-import requests
 
+from analysis_executor import AnalysisExecutor, AnalysisTask
+from categorical import CategoricalColumns, DerivedColumn, columns_for, group_by_code
+import json_stream
+from instrumentation import instrument, run_main, stage
+from kickoff_buckets import kickoff_table, parse_kickoff, parse_kickoffs
+from matchday_snapshot import load_merged_records
+from model_registry import LISTENER_MODEL, LinearModel, ModelRegistry, fit_model, invert_matrix, matmul, transpose
+from output_deltas import FeedRecorder
+from output_manifest import publish_outputs
+from seasons import season_bounds, season_for_date, seasons_for_dates
+from standings_history import StandingsHistory
+from top_k import SlicedTopK, TopK
+from tv_channels import TvChannelClassifier
 
+
+@instrument()
 def load_merged_data(filepath: str) -> List[Dict[str, Any]]:
-    """Load merged matchdays JSON data"""
-    with open(filepath, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    """Load merged matchdays data (binary snapshot if up to date, else JSON)"""
+    return load_merged_records(filepath)
 
 
-def parse_kickoff(kickoff: str) -> Optional[int]:
-    """Parse kickoff time 'HH:MM' to minutes since midnight"""
-    if not kickoff or not isinstance(kickoff, str):
-        return None
-    try:
-        parts = kickoff.split(':')
-        if len(parts) != 2:
-            return None
-        hours = int(parts[0])
-        minutes = int(parts[1])
-        return hours * 60 + minutes
-    except (ValueError, AttributeError):
-        return None
+# Kickoff bucket table for every kickoff_block (the hour blocks unless KICKOFF_BUCKETS says otherwise)
+KICKOFF_TABLE = kickoff_table()
 
 
 def get_kickoff_block(kickoff_minutes: Optional[int]) -> Optional[str]:
     """Categorize kickoff time into blocks"""
-    if kickoff_minutes is None:
-        return None
-    
-    if 12 * 60 <= kickoff_minutes < 15 * 60:  # 12:00-14:59
-        return "12:00-14:59"
-    elif 15 * 60 <= kickoff_minutes < 18 * 60:  # 15:00-17:59
-        return "15:00-17:59"
-    elif 18 * 60 <= kickoff_minutes < 20 * 60:  # 18:00-19:59
-        return "18:00-19:59"
-    elif 20 * 60 <= kickoff_minutes < 21 * 60:  # 20:00-20:59
-        return "20:00-20:59"
-    elif kickoff_minutes >= 21 * 60:  # 21:00+
-        return "21:00+"
-    else:
-        return "Other"
+    return KICKOFF_TABLE.label(kickoff_minutes)
+
+
+def get_kickoff_blocks(records: List[Dict[str, Any]]) -> List[Optional[str]]:
+    """Kickoff block per record, parsing and bucketing the whole column at once"""
+    return KICKOFF_TABLE.labels_for(parse_kickoffs(record.get('kickoff') for record in records))
 
 
 def get_weekday(date_str: str) -> Optional[str]:
@@ -205,159 +197,110 @@ def extract_opponent(match_name: Optional[str]) -> Optional[str]:
     return None
 
 
-def fetch_eredivisie_standings() -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
-    token = os.environ.get("FOOTBALL_DATA_TOKEN")
-    if not token:
-        print("Warning: FOOTBALL_DATA_TOKEN not set. Skipping standings fetch.")
-        return [], {}
-
-    url = "https://api.football-data.org/v4/competitions/DED/standings"
-    headers = {"X-Auth-Token": token}
-
-    try:
-        response = requests.get(url, headers=headers, timeout=20)
-        response.raise_for_status()
-        payload = response.json()
-    except (requests.RequestException, ValueError) as exc:
-        print(f"Warning: failed to fetch Eredivisie standings ({exc})")
-        return [], {}
-
-    standings = payload.get("standings", [])
-    total = next((s for s in standings if s.get("type") == "TOTAL"), None)
-    table = (total or {}).get("table", [])
-    entries = []
-    mapping = {}
-    for row in table:
-        position = row.get("position")
-        team = row.get("team", {}) or {}
-        name = team.get("shortName") or team.get("name") or team.get("tla")
-        if not isinstance(position, int) or not name:
-            continue
-        entries.append({"position": position, "team": name})
-        normalized = normalize_team_name(name)
-        if normalized:
-            mapping[normalized] = position
-    return entries, mapping
-
-
 def add_opponent_positions(records: List[Dict[str, Any]],
-                           standings_map: Dict[str, int]) -> None:
-    for record in records:
-        opponent = extract_opponent(record.get("match_name"))
+                           history: StandingsHistory) -> None:
+    """Stamp each record with the opponent's league position going into the match"""
+    # Opponent per distinct match name
+    opponent_codes, opponents = columns_for(records).derive("opponent", "match_name", extract_opponent)
+    for record, code in zip(records, opponent_codes):
+        opponent = opponents.decode(code)
         if not opponent:
             record["opponent"] = None
             record["opponent_position"] = None
             continue
-        normalized = normalize_team_name(opponent)
         record["opponent"] = opponent
-        record["opponent_position"] = standings_map.get(normalized)
+        record["opponent_position"] = history.position(opponent, record.get("date"))
 
 
-def build_feature_schema(records: List[Dict[str, Any]]) -> Dict[str, List[str]]:
-    """Build categorical feature schema from training records."""
-    schema = {
-        'kickoff_block': set(),
-        'weekday': set(),
-        'home_away': set(),
-        'tv_category': set(),
-        'commentator_duo': set()
+def feature_codes(columns: CategoricalColumns) -> Dict[str, DerivedColumn]:
+    """Categorical feature group -> (label code per record, label table), labels defaulting to "Unknown" """
+    return {
+        'kickoff_block': columns.derive(
+            'feature:kickoff_block', 'kickoff', lambda kickoff: get_kickoff_block(parse_kickoff(kickoff)) or "Unknown"),
+        'weekday': columns.derive('feature:weekday', 'date', lambda date: get_weekday(date or '') or "Unknown"),
+        'home_away': columns.derive('feature:home_away', 'home_away', lambda value: value or "Unknown"),
+        'tv_category': columns.derive(
+            'feature:tv_category', 'tv_channel', lambda channel: categorize_tv_channel(channel) or "Unknown"),
+        'commentator_duo': columns.derive_lists(
+            'feature:commentator_duo', 'commentators', lambda names: get_commentator_duo(list(names))),
     }
 
-    for record in records:
-        kickoff_minutes = parse_kickoff(record.get('kickoff'))
-        kickoff_block = get_kickoff_block(kickoff_minutes) or "Unknown"
-        weekday = get_weekday(record.get('date', '')) or "Unknown"
-        home_away = record.get('home_away') or "Unknown"
-        tv_category = categorize_tv_channel(record.get('tv_channel')) or "Unknown"
-        duo = get_commentator_duo(record.get('commentators', []))
-
-        schema['kickoff_block'].add(kickoff_block)
-        schema['weekday'].add(weekday)
-        schema['home_away'].add(home_away)
-        schema['tv_category'].add(tv_category)
-        schema['commentator_duo'].add(duo)
-
-    # Ensure unknown bucket exists
-    for key in schema:
-        schema[key].add("Unknown")
-
-    return {key: sorted(values) for key, values in schema.items()}
 
+@instrument()
+def build_feature_schema(records: List[Dict[str, Any]]) -> Dict[str, List[str]]:
+    """Build categorical feature schema from training records."""
+    return feature_schema(columns_for(records))
 
-def encode_record(record: Dict[str, Any], schema: Dict[str, List[str]]) -> List[float]:
-    """Encode record into feature vector with one-hot categories."""
-    kickoff_minutes = parse_kickoff(record.get('kickoff'))
-    kickoff_block = get_kickoff_block(kickoff_minutes) or "Unknown"
-    weekday = get_weekday(record.get('date', '')) or "Unknown"
-    home_away = record.get('home_away') or "Unknown"
-    tv_category = categorize_tv_channel(record.get('tv_channel')) or "Unknown"
-    duo = get_commentator_duo(record.get('commentators', []))
-    opponent_position = record.get('opponent_position')
-    opponent_position_value = float(opponent_position) if isinstance(opponent_position, int) else 0.0
-
-    features = [1.0]  # intercept
-    features.append(opponent_position_value)
-
-    for key, value in [
-        ('kickoff_block', kickoff_block),
-        ('weekday', weekday),
-        ('home_away', home_away),
-        ('tv_category', tv_category),
-        ('commentator_duo', duo)
-    ]:
-        categories = schema.get(key, ["Unknown"])
-        if value not in categories:
-            value = "Unknown"
-        features.extend([1.0 if value == category else 0.0 for category in categories])
 
-    return features
+def feature_schema(columns: CategoricalColumns) -> Dict[str, List[str]]:
+    """build_feature_schema over already encoded records"""
+    schema = {}
+    for key, (codes, labels) in feature_codes(columns).items():
+        values = {labels.decode(code) for code in set(codes)}
+        # Ensure unknown bucket exists
+        values.add("Unknown")
+        schema[key] = sorted(values)
+    return schema
 
 
-def transpose(matrix: List[List[float]]) -> List[List[float]]:
-    return [list(row) for row in zip(*matrix)]
+# Column groups of the encode_record vector, in order, after the intercept
+FEATURE_GROUPS = ['opponent_position', 'kickoff_block', 'weekday', 'home_away', 'tv_category', 'commentator_duo']
 
 
-def matmul(a: List[List[float]], b: List[List[float]]) -> List[List[float]]:
-    result = [[0.0 for _ in range(len(b[0]))] for _ in range(len(a))]
-    for i in range(len(a)):
-        for k in range(len(b)):
-            for j in range(len(b[0])):
-                result[i][j] += a[i][k] * b[k][j]
-    return result
+def feature_columns(schema: Dict[str, List[str]], groups: List[str]) -> List[int]:
+    """encode_record vector indices of the intercept and the given feature groups"""
+    columns = [0]
+    position = 1
+    for group in FEATURE_GROUPS:
+        width = 1 if group == 'opponent_position' else len(schema.get(group, ["Unknown"]))
+        if group in groups:
+            columns.extend(range(position, position + width))
+        position += width
+    return columns
 
 
-def invert_matrix(matrix: List[List[float]]) -> Optional[List[List[float]]]:
-    size = len(matrix)
-    augmented = [row[:] + [1.0 if i == j else 0.0 for j in range(size)] for i, row in enumerate(matrix)]
+def encode_record(record: Dict[str, Any], schema: Dict[str, List[str]]) -> List[float]:
+    """Encode record into feature vector with one-hot categories."""
+    return encode_columns(CategoricalColumns([record]), schema)[0]
 
-    for i in range(size):
-        pivot = augmented[i][i]
-        if abs(pivot) < 1e-9:
-            swap_row = None
-            for j in range(i + 1, size):
-                if abs(augmented[j][i]) > 1e-9:
-                    swap_row = j
-                    break
-            if swap_row is None:
-                return None
-            augmented[i], augmented[swap_row] = augmented[swap_row], augmented[i]
-            pivot = augmented[i][i]
 
-        pivot_inv = 1.0 / pivot
-        augmented[i] = [value * pivot_inv for value in augmented[i]]
+def encode_records(records: List[Dict[str, Any]], schema: Dict[str, List[str]]) -> List[List[float]]:
+    """encode_record for many records"""
+    return encode_columns(columns_for(records), schema)
 
-        for j in range(size):
-            if j == i:
-                continue
-            factor = augmented[j][i]
-            augmented[j] = [
-                augmented[j][k] - factor * augmented[i][k]
-                for k in range(2 * size)
-            ]
 
-    return [row[size:] for row in augmented]
+def encode_columns(columns: CategoricalColumns, schema: Dict[str, List[str]]) -> List[List[float]]:
+    """
+    encode_record for every encoded record: each label code is mapped to its
+    one-hot column once, so a row is a few integer lookups
+    """
+    groups = feature_codes(columns)
+    one_hot = []
+    width = 2  # intercept, opponent position
+    for key in FEATURE_GROUPS[1:]:
+        categories = schema.get(key, ["Unknown"])
+        index = {category: width + i for i, category in enumerate(categories)}
+        codes, labels = groups[key]
+        # Labels outside the schema fall back to "Unknown" (no column at all if that is missing too)
+        positions = [index.get(labels.decode(code), index.get("Unknown")) for code in range(len(labels))]
+        one_hot.append((codes, positions))
+        width += len(categories)
+
+    features = []
+    for row, record in enumerate(columns.records):
+        opponent_position = record.get('opponent_position')
+        vector = [0.0] * width
+        vector[0] = 1.0  # intercept
+        vector[1] = float(opponent_position) if isinstance(opponent_position, int) else 0.0
+        for codes, positions in one_hot:
+            position = positions[codes[row]]
+            if position is not None:
+                vector[position] = 1.0
+        features.append(vector)
+    return features
 
 
+@instrument()
 def fit_linear_regression(features: List[List[float]], targets: List[float]) -> Optional[List[float]]:
     if not features or len(features) != len(targets):
         return None
@@ -382,69 +325,114 @@ def fit_linear_regression(features: List[List[float]], targets: List[float]) ->
 
 def predict_listeners(record: Dict[str, Any],
                       schema: Dict[str, List[str]],
-                      coefficients: Optional[List[float]],
+                      model: Optional[LinearModel],
                       fallback_average: float,
                       kickoff_averages: Dict[str, float]) -> int:
-    if coefficients is None:
-        kickoff_minutes = parse_kickoff(record.get('kickoff'))
-        kickoff_block = get_kickoff_block(kickoff_minutes) or "Unknown"
-        baseline = kickoff_averages.get(kickoff_block, fallback_average)
-        return max(0, int(round(baseline)))
+    return predict_listeners_batch([record], schema, model, fallback_average, kickoff_averages)[0]
+
+
+def predict_listeners_batch(records: List[Dict[str, Any]],
+                            schema: Dict[str, List[str]],
+                            model: Optional[LinearModel],
+                            fallback_average: float,
+                            kickoff_averages: Dict[str, float]) -> List[int]:
+    """predict_listeners per record, encoding them in one batch"""
+    if model is None or model.coefficients is None:
+        blocks = get_kickoff_blocks(records)
+        return [max(0, int(round(kickoff_averages.get(block or "Unknown", fallback_average)))) for block in blocks]
+
+    predictions = []
+    for features in encode_records(records, schema):
+        prediction = model.predict(features)
+        if prediction < 0:
+            prediction = 0
+        predictions.append(int(round(prediction)))
+    return predictions
+
+
+def build_predictions(future_records: List[Dict[str, Any]],
+                      training_records: List[Dict[str, Any]],
+                      schema: Dict[str, List[str]],
+                      model: Optional[LinearModel],
+                      overall_average: float,
+                      kickoff_averages: Dict[str, float]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Predicted listeners for future matches, and in-sample predictions for the last 10 training matches"""
+    future_matches = []
+    future_predictions = predict_listeners_batch(future_records, schema, model, overall_average, kickoff_averages)
+    tv_categories = TV_CHANNELS.classify_all(record.get('tv_channel') for record in future_records)
+    for record, predicted, tv_category in zip(future_records, future_predictions, tv_categories):
+        future_matches.append({
+            'date': record.get('date', ''),
+            'weekday': get_weekday(record.get('date', '')),
+            'time': record.get('kickoff'),
+            'match_name': record.get('match_name', ''),
+            'commentators': " & ".join(record.get('commentators', [])) if record.get('commentators') else "N/A",
+            'competition': record.get('competition', ''),
+            'tv_channel': record.get('tv_channel'),
+            'tv_category': tv_category or "Unknown",
+            'home_away': record.get('home_away', ''),
+            'opponent': record.get('opponent'),
+            'opponent_position': record.get('opponent_position'),
+            'predicted_listeners': predicted
+        })
+
+    recent_predictions = []
+    training_predictions = predict_listeners_batch(training_records, schema, model, overall_average, kickoff_averages)
+    for record, predicted in zip(training_records, training_predictions):
+        recent_predictions.append({
+            'date': record.get('date', ''),
+            'match_name': record.get('match_name', ''),
+            'listeners': record.get('listeners'),
+            'predicted_listeners': predicted
+        })
+    recent_predictions.sort(key=lambda x: x.get('date', ''), reverse=True)
+    recent_predictions = list(reversed(recent_predictions[:10]))
 
-    features = encode_record(record, schema)
-    prediction = sum(weight * value for weight, value in zip(coefficients, features))
-    if prediction < 0:
-        prediction = 0
-    return int(round(prediction))
+    return future_matches, recent_predictions
 
 
+@instrument()
 def analyze_commentators(data: List[Dict[str, Any]], split_credit: bool = False) -> Dict[str, Any]:
     """Analyze commentator performance"""
-    # Collect listener counts per commentator
+    # Collect listener counts per commentator code
+    columns = columns_for(data)
+    names = columns.vocab['commentators']
+    # Filter out None/empty commentators (decided once per distinct name)
+    valid = [bool(name) and isinstance(name, str) for name in names.labels]
     commentator_stats = defaultdict(list)
-    commentator_matches = defaultdict(int)
     
     excluded_count = 0
     
-    for record in data:
+    for row, record in enumerate(data):
         listeners = record.get('listeners')
-        commentators = record.get('commentators', [])
         
         # Skip if no listeners data
         if listeners is None:
             excluded_count += 1
             continue
         
-        # Skip if no commentators
-        if not commentators or not isinstance(commentators, list):
-            continue
-        
-        # Filter out None/empty commentators
-        valid_commentators = [c for c in commentators if c and isinstance(c, str)]
+        valid_commentators = [code for code in columns.list_codes('commentators', row) if valid[code]]
         if not valid_commentators:
             continue
         
         if split_credit:
             # Divide listeners equally among commentators
-            credit_per_commentator = listeners / len(valid_commentators)
-            for commentator in valid_commentators:
-                commentator_stats[commentator].append(credit_per_commentator)
-                commentator_matches[commentator] += 1
+            credit = listeners / len(valid_commentators)
         else:
             # Full credit to each commentator
-            for commentator in valid_commentators:
-                commentator_stats[commentator].append(listeners)
-                commentator_matches[commentator] += 1
+            credit = listeners
+        for code in valid_commentators:
+            commentator_stats[code].append(credit)
     
     # Compute statistics
     results = []
-    for commentator, listener_counts in commentator_stats.items():
+    for code, listener_counts in commentator_stats.items():
         if not listener_counts:
             continue
         
         results.append({
-            'commentator': commentator,
-            'matches_count': commentator_matches[commentator],
+            'commentator': names.decode(code),
+            'matches_count': len(listener_counts),
             'min': int(min(listener_counts)),
             'avg': round(mean(listener_counts), 2),
             'median': int(median(listener_counts)),
@@ -460,46 +448,33 @@ def analyze_commentators(data: List[Dict[str, Any]], split_credit: bool = False)
     }
 
 
+def duo_label(commentators: Sequence[Optional[str]]) -> Optional[str]:
+    """'A & B' for exactly two valid commentators (sorted), else None"""
+    valid_commentators = [c for c in commentators if c and isinstance(c, str)]
+    if len(valid_commentators) != 2:
+        return None
+    duo_key = sorted(valid_commentators)
+    return f"{duo_key[0]} & {duo_key[1]}"
+
+
+@instrument()
 def analyze_commentator_duos(data: List[Dict[str, Any]]) -> Dict[str, Any]:
     """Analyze commentator duos (pairs)"""
-    duo_stats = defaultdict(list)
-    duo_matches = defaultdict(int)
-    
-    excluded_count = 0
-    
-    for record in data:
-        listeners = record.get('listeners')
-        commentators = record.get('commentators', [])
-        
-        # Skip if no listeners data
-        if listeners is None:
-            excluded_count += 1
-            continue
-        
-        # Skip if not exactly 2 commentators
-        if not commentators or not isinstance(commentators, list):
-            continue
-        
-        valid_commentators = [c for c in commentators if c and isinstance(c, str)]
-        if len(valid_commentators) != 2:
-            continue
-        
-        # Create sorted pair key
-        duo_key = tuple(sorted(valid_commentators))
-        duo_str = f"{duo_key[0]} & {duo_key[1]}"
-        
-        duo_stats[duo_str].append(listeners)
-        duo_matches[duo_str] += 1
+    # Duo label per distinct commentator list; None unless exactly 2 valid commentators
+    duo_codes, duo_labels = columns_for(data).derive_lists('duo', 'commentators', duo_label)
+    listeners = [record.get('listeners') for record in data]
+    excluded_count = sum(1 for value in listeners if value is None)
+    duo_stats = group_by_code(duo_codes, listeners)
     
     # Compute statistics
     results = []
-    for duo, listener_counts in duo_stats.items():
+    for code, listener_counts in duo_stats.items():
         if not listener_counts:
             continue
         
         results.append({
-            'duo': duo,
-            'matches_count': duo_matches[duo],
+            'duo': duo_labels.decode(code),
+            'matches_count': len(listener_counts),
             'avg': round(mean(listener_counts), 2),
             'median': int(median(listener_counts)),
             'max': int(max(listener_counts))
@@ -514,6 +489,7 @@ def analyze_commentator_duos(data: List[Dict[str, Any]]) -> Dict[str, Any]:
     }
 
 
+@instrument()
 def analyze_kickoff_exact(data: List[Dict[str, Any]]) -> Dict[str, Any]:
     """Analyze performance by exact kickoff time"""
     kickoff_stats = defaultdict(list)
@@ -560,6 +536,7 @@ def analyze_kickoff_exact(data: List[Dict[str, Any]]) -> Dict[str, Any]:
     }
 
 
+@instrument()
 def analyze_kickoff_blocks(data: List[Dict[str, Any]]) -> Dict[str, Any]:
     """Analyze performance by kickoff time blocks"""
     block_stats = defaultdict(list)
@@ -567,18 +544,14 @@ def analyze_kickoff_blocks(data: List[Dict[str, Any]]) -> Dict[str, Any]:
     
     excluded_count = 0
     
-    for record in data:
+    for record, block in zip(data, get_kickoff_blocks(data)):
         listeners = record.get('listeners')
-        kickoff = record.get('kickoff')
         
         # Skip if no listeners data
         if listeners is None:
             excluded_count += 1
             continue
         
-        kickoff_minutes = parse_kickoff(kickoff)
-        block = get_kickoff_block(kickoff_minutes)
-        
         if not block:
             continue
         
@@ -609,6 +582,7 @@ def analyze_kickoff_blocks(data: List[Dict[str, Any]]) -> Dict[str, Any]:
     }
 
 
+@instrument()
 def analyze_weekday(data: List[Dict[str, Any]]) -> Dict[str, Any]:
     """Analyze performance by weekday"""
     weekday_stats = defaultdict(list)
@@ -659,13 +633,13 @@ def analyze_weekday(data: List[Dict[str, Any]]) -> Dict[str, Any]:
     }
 
 
+@instrument()
 def save_json(data: Dict[str, Any], filepath: str):
-    """Save data as JSON"""
-    os.makedirs(os.path.dirname(filepath), exist_ok=True)
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    """Save data as JSON (iterators in data are streamed as arrays, see json_stream.py)"""
+    json_stream.write_json(filepath, data)
 
 
+@instrument()
 def save_csv(data: Dict[str, Any], filepath: str, list_key: str):
     """Save data as CSV"""
     os.makedirs(os.path.dirname(filepath), exist_ok=True)
@@ -724,102 +698,103 @@ def print_console_report(data: List[Dict[str, Any]], analyses: Dict[str, Dict[st
     print("\n" + "="*70)
 
 
+@instrument()
+def format_match_row(record: Dict[str, Any]) -> Dict[str, Any]:
+    """One all_matches row"""
+    date = record.get('date', '')
+    commentators = record.get('commentators', [])
+    commentator_str = " & ".join(commentators) if commentators else "N/A"
+
+    return {
+        'date': date,
+        'weekday': get_weekday(date),
+        'time': record.get('kickoff', ''),
+        'match_name': record.get('match_name', ''),
+        'commentators': commentator_str,
+        'listeners': record.get('listeners'),
+        'competition': record.get('competition', ''),
+        'tv_channel': record.get('tv_channel'),
+        'score': record.get('score'),
+        'result': record.get('result'),  # W, D, or L
+        'home_away': record.get('home_away', '')
+    }
+
+
+def iter_all_matches(data: List[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """All matches rows, date descending (reverse chronological), built one at a time"""
+    # Sorting the records (not the rows) keeps only references in memory; the
+    # sort is stable, so equal dates keep their input order as before
+    for record in sorted(data, key=lambda r: r.get('date', ''), reverse=True):
+        yield format_match_row(record)
+
+
 def prepare_all_matches(data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """Prepare all matches data for dashboard overview"""
-    matches = []
-    
-    for record in data:
-        date = record.get('date', '')
-        kickoff = record.get('kickoff', '')
-        weekday = get_weekday(date)
-        
-        commentators = record.get('commentators', [])
-        commentator_str = " & ".join(commentators) if commentators else "N/A"
-        
-        match_data = {
-            'date': date,
-            'weekday': weekday,
-            'time': kickoff,
-            'match_name': record.get('match_name', ''),
-            'commentators': commentator_str,
-            'listeners': record.get('listeners'),
-            'competition': record.get('competition', ''),
-            'tv_channel': record.get('tv_channel'),
-            'score': record.get('score'),
-            'result': record.get('result'),  # W, D, or L
-            'home_away': record.get('home_away', '')
-        }
-        matches.append(match_data)
-    
-    # Sort by date descending (reverse chronological)
-    matches.sort(key=lambda x: x['date'], reverse=True)
-    
-    return matches
+    return list(iter_all_matches(data))
+
 
+def format_top_match(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Dashboard row for a top-games list"""
+    date = record.get('date', '')
+    kickoff = record.get('kickoff', '')
+    weekday = get_weekday(date)
 
+    commentators = record.get('commentators', [])
+    commentator_str = " & ".join(commentators) if commentators else "N/A"
+
+    return {
+        'date': date,
+        'weekday': weekday,
+        'time': kickoff,
+        'match_name': record.get('match_name', ''),
+        'commentators': commentator_str,
+        'listeners': record.get('listeners'),
+        'competition': record.get('competition', ''),
+        'tv_channel': record.get('tv_channel'),
+        'score': record.get('score'),
+        'result': record.get('result'),
+        'home_away': record.get('home_away', '')
+    }
+
+
+@instrument()
 def get_top5_games(data: List[Dict[str, Any]], season: Optional[str] = None) -> List[Dict[str, Any]]:
     """Get top 5 games by listeners for a season"""
     # Filter by season if provided
-    filtered_data = data
-    if season:
-        # Determine date range based on season
-        # 2024/2025: dates from 2024-07-01 to 2025-06-30
-        # 2025/2026: dates from 2025-07-01 to 2026-06-30
-        if season == "2024/2025":
-            start_date = "2024-07-01"
-            end_date = "2025-06-30"
-        elif season == "2025/2026":
-            start_date = "2025-07-01"
-            end_date = "2026-06-30"
-        else:
-            start_date = None
-            end_date = None
-        
-        if start_date and end_date:
-            filtered_data = [
-                r for r in data
-                if r.get('date', '') >= start_date and r.get('date', '') <= end_date
-            ]
-    
-    # Filter to only matches with listeners
-    matches_with_listeners = [
-        r for r in filtered_data
-        if r.get('listeners') is not None
-    ]
-    
-    # Sort by listeners descending
-    matches_with_listeners.sort(key=lambda x: x.get('listeners', 0), reverse=True)
-    
-    # Get top 5 and format
-    top5 = []
-    for record in matches_with_listeners[:5]:
-        date = record.get('date', '')
-        kickoff = record.get('kickoff', '')
-        kickoff_minutes = parse_kickoff(kickoff)
-        kickoff_block = get_kickoff_block(kickoff_minutes)
-        weekday = get_weekday(date)
-        
-        commentators = record.get('commentators', [])
-        commentator_str = " & ".join(commentators) if commentators else "N/A"
-        
-        match_data = {
-            'date': date,
-            'weekday': weekday,
-            'time': kickoff,
-            'match_name': record.get('match_name', ''),
-            'commentators': commentator_str,
-            'listeners': record.get('listeners'),
-            'competition': record.get('competition', ''),
-            'tv_channel': record.get('tv_channel'),
-            'score': record.get('score'),
-            'result': record.get('result'),
-            'home_away': record.get('home_away', '')
-        }
-        top5.append(match_data)
-    
-    return top5
+    bounds = season_bounds(season) if season else None
+    start_date, end_date = bounds or ('', '\uffff')
+
+    top5 = TopK(5)
+    for record in data:
+        listeners = record.get('listeners')
+        if listeners is not None and start_date <= record.get('date', '') <= end_date:
+            top5.push(listeners, record)
 
+    return [format_top_match(record) for record in top5.items()]
 
+
+# Leaderboard slices: record -> the slice values it counts for
+LEADERBOARD_SLICES = {
+    'season': lambda record: [season_for_date(record.get('date'))],
+    'competition': lambda record: [record.get('competition') or None],
+    'commentator': lambda record: [c for c in record.get('commentators') or [] if c and isinstance(c, str)],
+    'opponent': lambda record: [extract_opponent(record.get('match_name'))],
+    'weekday': lambda record: [get_weekday(record.get('date'))],
+}
+
+
+@instrument()
+def build_leaderboards(data: List[Dict[str, Any]], k: int = 5) -> Dict[str, Dict[str, List[Dict[str, Any]]]]:
+    """Top k games by listeners per season, competition, commentator, opponent and weekday, in one pass"""
+    board = SlicedTopK(k, LEADERBOARD_SLICES, score=lambda record: record.get('listeners'))
+    board.add_all(data)
+    return {
+        name: {value: [format_top_match(record) for record in records] for value, records in values.items()}
+        for name, values in board.leaderboards().items()
+    }
+
+
+@instrument()
 def analyze_by_result(data: List[Dict[str, Any]]) -> Dict[str, Any]:
     """Analyze average listeners by match result (W/D/L)"""
     result_stats = defaultdict(list)
@@ -868,6 +843,7 @@ def analyze_by_result(data: List[Dict[str, Any]]) -> Dict[str, Any]:
     }
 
 
+@instrument()
 def analyze_by_home_away(data: List[Dict[str, Any]]) -> Dict[str, Any]:
     """Analyze average listeners by home/away"""
     home_away_stats = defaultdict(list)
@@ -920,71 +896,41 @@ def analyze_by_home_away(data: List[Dict[str, Any]]) -> Dict[str, Any]:
     }
 
 
+# Half-open / Open / Paid rules, compiled once from tv_channel_rules.json
+TV_CHANNELS = TvChannelClassifier.load()
+
+
 def categorize_tv_channel(tv_channel: Optional[str]) -> Optional[str]:
     """Categorize TV channel into Half-open, Open, or Paid"""
-    if not tv_channel:
-        return None
-    
-    tv_lower = tv_channel.strip().upper()
-    
-    # Half-open: ZIGGO
-    if 'ZIGGO' in tv_lower:
-        return 'Half-open'
-    
-    # Open: ESPN or ESPN1 (including "ESPN 1" with space)
-    # Check for ESPN1 or "ESPN 1" (with or without space)
-    if tv_lower.startswith('ESPN'):
-        # Remove spaces for comparison
-        tv_no_space = tv_lower.replace(' ', '')
-        if tv_no_space == 'ESPN' or tv_no_space == 'ESPN1':
-            return 'Open'
-    
-    # Paid: all other channels
-    return 'Paid'
+    return TV_CHANNELS.classify(tv_channel)
 
 
+@instrument()
 def analyze_by_tv_category(data: List[Dict[str, Any]]) -> Dict[str, Any]:
     """Analyze average listeners by TV channel category"""
-    category_stats = defaultdict(list)
-    category_matches = defaultdict(int)
-    
-    excluded_count = 0
-    
-    for record in data:
-        listeners = record.get('listeners')
-        tv_channel = record.get('tv_channel', '')
-        
-        # Skip if no listeners data
-        if listeners is None:
-            excluded_count += 1
-            continue
-        
-        # Categorize TV channel
-        category = categorize_tv_channel(tv_channel)
-        if not category:
-            continue
-        
-        category_stats[category].append(listeners)
-        category_matches[category] += 1
+    # Categorize each distinct TV channel once
+    category_codes, categories = columns_for(data).derive('tv_category', 'tv_channel', categorize_tv_channel)
+    listeners = [record.get('listeners') for record in data]
+    excluded_count = sum(1 for value in listeners if value is None)
+    category_stats = group_by_code(category_codes, listeners)
     
     # Compute statistics
     results = []
-    for category, listener_counts in category_stats.items():
+    for code, listener_counts in category_stats.items():
         if not listener_counts:
             continue
         
         results.append({
-            'category': category,
-            'matches_count': category_matches[category],
+            'category': categories.decode(code),
+            'matches_count': len(listener_counts),
             'avg': round(mean(listener_counts), 2),
             'median': int(median(listener_counts)),
             'min': int(min(listener_counts)),
             'max': int(max(listener_counts))
         })
     
-    # Sort by category: Half-open, Open, Paid
-    category_order = {'Half-open': 0, 'Open': 1, 'Paid': 2}
-    results.sort(key=lambda x: category_order.get(x['category'], 99))
+    # Sort by category in the rules file order: Half-open, Open, Paid
+    results.sort(key=lambda x: TV_CHANNELS.order(x['category']))
     
     return {
         'excluded_null_listeners': excluded_count,
@@ -992,6 +938,20 @@ def analyze_by_tv_category(data: List[Dict[str, Any]]) -> Dict[str, Any]:
     }
 
 
+# Independent analyses over the past records, keyed by result name (see analysis_executor.py)
+ANALYSIS_TASKS = [
+    AnalysisTask('commentators_full', analyze_commentators, {'split_credit': False}),
+    AnalysisTask('commentators_split', analyze_commentators, {'split_credit': True}),
+    AnalysisTask('commentator_duos', analyze_commentator_duos),
+    AnalysisTask('kickoff_exact', analyze_kickoff_exact),
+    AnalysisTask('kickoff_blocks', analyze_kickoff_blocks),
+    AnalysisTask('weekday', analyze_weekday),
+    AnalysisTask('by_result', analyze_by_result),
+    AnalysisTask('by_home_away', analyze_by_home_away),
+    AnalysisTask('by_tv_category', analyze_by_tv_category),
+]
+
+
 def main():
     input_file = 'merged_matchdays.json'
     output_dir = 'dashboard/public/output'
@@ -1010,68 +970,35 @@ def main():
     data = load_merged_data(input_file)
     print(f"Loaded {len(data)} records")
 
+    run_analysis(data, output_dir)
+
+
+def run_analysis(data: List[Dict[str, Any]],
+                 output_dir: str = 'dashboard/public/output',
+                 standings: Optional[StandingsHistory] = None,
+                 registry: Optional[ModelRegistry] = None,
+                 workers: Optional[int] = None) -> None:
+    """
+    Run every analysis over loaded merged records and write the dashboard outputs.
+    Opponent positions come from the local standings history (no network);
+    the regression comes from the model registry (model_registry.json), which
+    is reused as is when the training rows are unchanged and updated
+    incrementally when only new matches were added. workers > 0
+    runs the analyses and the fit on a process pool (default: ANALYSIS_WORKERS).
+    """
     today = datetime.utcnow().date()
     past_records = [r for r in data if not is_future_date(r.get('date', ''), today)]
     future_records = [r for r in data if is_future_date(r.get('date', ''), today)]
     print(f"Past records: {len(past_records)}")
     print(f"Future records: {len(future_records)}")
     
-    print("\nFetching latest Eredivisie standings...")
-    standings, standings_map = fetch_eredivisie_standings()
-    print(f"Standings entries: {len(standings)}")
-    add_opponent_positions(past_records, standings_map)
-    add_opponent_positions(future_records, standings_map)
+    if standings is None:
+        standings = StandingsHistory.load()
+    print(f"Standings history: {len(standings)} matchday snapshots")
+    add_opponent_positions(past_records, standings)
+    add_opponent_positions(future_records, standings)
 
-    print("\nRunning analyses...")
-    
-    # A) Commentators analysis
-    print("  - Analyzing commentators (full credit)...")
-    commentators_full = analyze_commentators(past_records, split_credit=False)
-    
-    print("  - Analyzing commentators (split credit)...")
-    commentators_split = analyze_commentators(past_records, split_credit=True)
-    
-    print("  - Analyzing commentator duos...")
-    commentator_duos = analyze_commentator_duos(past_records)
-    
-    # B) Kickoff analysis
-    print("  - Analyzing exact kickoff times...")
-    kickoff_exact = analyze_kickoff_exact(past_records)
-    
-    print("  - Analyzing kickoff blocks...")
-    kickoff_blocks = analyze_kickoff_blocks(past_records)
-    
-    # C) Weekday analysis
-    print("  - Analyzing weekdays...")
-    weekday = analyze_weekday(past_records)
-    
-    # D) All matches overview
-    print("  - Preparing all matches overview...")
-    all_matches = prepare_all_matches(past_records)
-    
-    # E) Top 5 games by season
-    print("  - Preparing top 5 games...")
-    top5_2024_2025 = get_top5_games(past_records, "2024/2025")
-    top5_2025_2026 = get_top5_games(past_records, "2025/2026")
-    top5_games = {
-        '2024/2025': top5_2024_2025,
-        '2025/2026': top5_2025_2026
-    }
-    
-    # F) Analyze by result (W/D/L)
-    print("  - Analyzing by result (W/D/L)...")
-    by_result = analyze_by_result(past_records)
-    
-    # G) Analyze by home/away
-    print("  - Analyzing by home/away...")
-    by_home_away = analyze_by_home_away(past_records)
-    
-    # H) Analyze by TV channel category
-    print("  - Analyzing by TV channel category...")
-    by_tv_category = analyze_by_tv_category(past_records)
-
-    # Predictions for future matches
-    print("  - Predicting listeners for future matches...")
+    # Model inputs are prepared here; the fit itself runs alongside the analyses
     training_records = [r for r in past_records if r.get('listeners') is not None]
     schema = build_feature_schema(training_records) if training_records else {
         'kickoff_block': ["Unknown"],
@@ -1081,52 +1008,71 @@ def main():
         'commentator_duo': ["Unknown"]
     }
 
-    training_features = [encode_record(r, schema) for r in training_records]
+    with stage('encode_record') as s:
+        training_features = encode_records(training_records, schema)
+        s.add_records(len(training_features))
     training_targets = [r.get('listeners', 0) for r in training_records]
-    coefficients = fit_linear_regression(training_features, training_targets)
+    if registry is None:
+        registry = ModelRegistry.load()
+    # Feature groups and ridge penalty picked by model_selection.py, if it has run
+    selected = registry.selection(LISTENER_MODEL)
+    columns = feature_columns(schema, selected['features']) if selected else None
+    ridge = selected['ridge'] if selected else 0.0
+    model = registry.warm_start(LISTENER_MODEL, schema, training_features, training_targets, columns, ridge)
+
+    # Leaderboards per slice (top 5 per season among them) and the season × competition × ... cube
+    from analysis_cube import build_cube, save_cube
+    seasons = seasons_for_dates(r.get('date') for r in data)
+    slice_tasks = [AnalysisTask('leaderboards', build_leaderboards), AnalysisTask('cube', build_cube)]
+
+    with AnalysisExecutor(past_records, workers) as executor:
+        mode = f"on {executor.workers} worker processes" if executor.parallel else "serially"
+        print(f"\nRunning {len(ANALYSIS_TASKS) + len(slice_tasks)} analyses {mode}...")
+        fit_future = None
+        if model is None:
+            fit_future = executor.submit(fit_model, schema, training_features, training_targets, columns, ridge)
+        with stage('analysis tasks') as s:
+            results = executor.run(ANALYSIS_TASKS + slice_tasks)
+            s.add_records(len(ANALYSIS_TASKS) + len(slice_tasks))
+        if fit_future is not None:
+            model = fit_future.result()
+            registry.register(LISTENER_MODEL, model)
+    if registry.dirty:
+        print(f"  - Listener model: {model.fit_mode} fit on {model.rows} matches")
+        registry.save()
+    else:
+        print(f"  - Listener model: reused (training set unchanged, {model.rows} matches)")
+
+    commentators_full = results['commentators_full']
+    commentators_split = results['commentators_split']
+    commentator_duos = results['commentator_duos']
+    kickoff_exact = results['kickoff_exact']
+    kickoff_blocks = results['kickoff_blocks']
+    weekday = results['weekday']
+    leaderboards = results['leaderboards']
+    top5_games = {season: leaderboards['season'].get(season, []) for season in seasons}
+    by_result = results['by_result']
+    by_home_away = results['by_home_away']
+    by_tv_category = results['by_tv_category']
 
+    # Predictions for future matches
+    print("  - Predicting listeners for future matches...")
     overall_average = mean(training_targets) if training_targets else 0
     kickoff_averages = {}
     if training_records:
         kickoff_buckets = defaultdict(list)
-        for record in training_records:
-            kickoff_minutes = parse_kickoff(record.get('kickoff'))
-            kickoff_block = get_kickoff_block(kickoff_minutes) or "Unknown"
-            kickoff_buckets[kickoff_block].append(record.get('listeners', 0))
+        for record, kickoff_block in zip(training_records, get_kickoff_blocks(training_records)):
+            kickoff_buckets[kickoff_block or "Unknown"].append(record.get('listeners', 0))
         kickoff_averages = {
             block: mean(values) if values else overall_average
             for block, values in kickoff_buckets.items()
         }
 
-    future_matches = []
-    for record in future_records:
-        predicted = predict_listeners(record, schema, coefficients, overall_average, kickoff_averages)
-        future_matches.append({
-            'date': record.get('date', ''),
-            'weekday': get_weekday(record.get('date', '')),
-            'time': record.get('kickoff'),
-            'match_name': record.get('match_name', ''),
-            'commentators': " & ".join(record.get('commentators', [])) if record.get('commentators') else "N/A",
-            'competition': record.get('competition', ''),
-            'tv_channel': record.get('tv_channel'),
-            'tv_category': categorize_tv_channel(record.get('tv_channel')) or "Unknown",
-            'home_away': record.get('home_away', ''),
-            'opponent': record.get('opponent'),
-            'opponent_position': record.get('opponent_position'),
-            'predicted_listeners': predicted
-        })
-
-    recent_predictions = []
-    for record in training_records:
-        predicted = predict_listeners(record, schema, coefficients, overall_average, kickoff_averages)
-        recent_predictions.append({
-            'date': record.get('date', ''),
-            'match_name': record.get('match_name', ''),
-            'listeners': record.get('listeners'),
-            'predicted_listeners': predicted
-        })
-    recent_predictions.sort(key=lambda x: x.get('date', ''), reverse=True)
-    recent_predictions = list(reversed(recent_predictions[:10]))
+    with stage('predict_listeners') as s:
+        future_matches, recent_predictions = build_predictions(
+            future_records, training_records, schema, model, overall_average, kickoff_averages
+        )
+        s.add_records(len(future_records) + len(training_records))
     
     # Save JSON files
     print(f"\nSaving results to {output_dir}/...")
@@ -1136,13 +1082,17 @@ def main():
     save_json(kickoff_exact, f'{output_dir}/kickoff_exact.json')
     save_json(kickoff_blocks, f'{output_dir}/kickoff_blocks.json')
     save_json(weekday, f'{output_dir}/weekday.json')
-    save_json({'matches': all_matches}, f'{output_dir}/all_matches.json')
+    # Streamed: rows are formatted, written and diffed for the delta feed one at a time
+    all_matches_feed = FeedRecorder(output_dir, 'all_matches')
+    save_json({'matches': all_matches_feed.track(iter_all_matches(past_records))}, f'{output_dir}/all_matches.json')
     save_json(top5_games, f'{output_dir}/top5_games.json')
     save_json(by_result, f'{output_dir}/by_result.json')
     save_json(by_home_away, f'{output_dir}/by_home_away.json')
     save_json(by_tv_category, f'{output_dir}/by_tv_category.json')
     save_json({'matches': future_matches}, f'{output_dir}/future_matches.json')
     save_json({'matches': recent_predictions}, f'{output_dir}/recent_predictions.json')
+    save_json(leaderboards, f'{output_dir}/leaderboards.json')
+    save_cube(results['cube'], f'{output_dir}/analysis_cube.json')
     
     # Save CSV files
     save_csv(commentators_full, f'{output_dir}/commentators_full_credit.csv', 'commentators')
@@ -1151,6 +1101,15 @@ def main():
     save_csv(kickoff_exact, f'{output_dir}/kickoff_exact.csv', 'kickoff_times')
     save_csv(kickoff_blocks, f'{output_dir}/kickoff_blocks.csv', 'kickoff_blocks')
     save_csv(weekday, f'{output_dir}/weekday.csv', 'weekdays')
+
+    all_matches_feed.publish()
+    # Content-hashed copies + manifest.json, so the dashboard can cache outputs as immutable
+    publish_outputs(output_dir, [
+        'commentators_full_credit.json', 'commentators_split_credit.json', 'commentator_duos.json',
+        'kickoff_exact.json', 'kickoff_blocks.json', 'weekday.json', 'all_matches.json', 'top5_games.json',
+        'by_result.json', 'by_home_away.json', 'by_tv_category.json', 'future_matches.json',
+        'recent_predictions.json', 'leaderboards.json', 'analysis_cube.json',
+    ])
     
     print("All files saved successfully!")
     
@@ -1167,4 +1126,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    run_main(main, 'analyze_matchdays')
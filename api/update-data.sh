@@ -5,9 +5,7 @@ cd "$(dirname "$0")/.."
 
 echo "$(date): Starting data update..."
 
-# Update data
-python3 fetch_google_sheet.py
-python3 merge_data.py
-python3 analyze_matchdays.py
+# Update data (resumes from the first incomplete stage if the last run failed)
+python3 run_pipeline.py
 
 echo "$(date): Data update complete"
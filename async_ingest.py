@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+"""
+Concurrent ingest of every external source, followed by merge and analysis.
+
+The Google Sheet tabs, the allShows listener page, football-data.org match
+results and the Transistor API are independent, so they are
+fetched at the same time instead of one script after another. Each host has
+its own concurrency limit and the whole fan-out has one deadline: a source
+that fails, comes back empty or is still running at the deadline falls back
+to its cached data, so a refresh takes as long as the slowest source (at most
+the deadline) rather than the sum of all of them.
+
+Cached data per source:
+  sheets      google_sheet_data.json (rows of that tab)
+  listeners   api_data_full.json / api_data_full.idx
+  results     ingest_cache/football_results.json
+  podcast     the podcast_*.json outputs are left as they are
+
+Opponent standings are not fetched here: the analysis reads the local
+standings history, updated by the separate standings_history.py step.
+
+The run is checkpointed like run_pipeline.py (see pipeline_state.py, state in
+.pipeline_state/async_ingest/) in four stages: ingest, merge, scores (the
+manual match_scores.json, applied to merged_matchdays.json in place) and
+analyze. A run that fails stays open, and the next invocation skips the
+stages already completed in it, so a failed analysis does not refetch every
+source.
+
+Usage: python3 async_ingest.py [--fresh]
+Environment variables:
+  INGEST_DEADLINE_SECONDS   deadline for all fetches together (default 45)
+  INGEST_REQUEST_TIMEOUT    timeout per HTTP request (default 20)
+"""
+import argparse
+import asyncio
+import functools
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import analyze_matchdays
+import fetch_full_api_data
+import fetch_google_sheet
+import fetch_match_scores
+import fetch_transistor_podcast
+import json_stream
+import merge_data
+import validation
+from instrumentation import run_main, stage
+from listener_baseline import ListenerBaseline
+from listener_index import index_path_for, open_listener_index, write_listener_index
+from matchday_snapshot import load_merged_records, snapshot_path_for, write_snapshot
+from pipeline_state import STATE_DIR, Checkpoints, atomic_write, file_hash, write_json_atomic
+
+API_DATA_FILE = 'api_data_full.json'
+SHEET_DATA_FILE = 'google_sheet_data.json'
+MERGED_FILE = 'merged_matchdays.json'
+OUTPUT_DIR = 'dashboard/public/output'
+CACHE_DIR = 'ingest_cache'
+RESULTS_CACHE_FILE = os.path.join(CACHE_DIR, 'football_results.json')
+SCORES_FILE = 'match_scores.json'
+INGEST_STATE_DIR = os.path.join(STATE_DIR, 'async_ingest')
+
+# Stage -> (inputs, outputs) for the checkpoints, in run order
+STAGES: Dict[str, Tuple[Tuple[str, ...], Tuple[str, ...]]] = {
+    'ingest': ((), (SHEET_DATA_FILE, API_DATA_FILE, RESULTS_CACHE_FILE)),
+    'merge': ((SHEET_DATA_FILE, API_DATA_FILE, RESULTS_CACHE_FILE), (MERGED_FILE,)),
+    'scores': ((MERGED_FILE, SCORES_FILE), (MERGED_FILE,)),
+    'analyze': ((MERGED_FILE,), (os.path.join(OUTPUT_DIR, 'all_matches.json'),)),
+}
+
+GOOGLE_HOST = 'docs.google.com'
+LISTENER_HOST = 'ajaxradio.westeurope.azurecontainer.io'
+FOOTBALL_DATA_HOST = 'api.football-data.org'
+TRANSISTOR_HOST = 'api.transistor.fm'
+
+# Concurrent requests allowed per host (football-data.org's free tier allows 10 calls a minute)
+HOST_LIMITS = {
+    GOOGLE_HOST: 4,
+    LISTENER_HOST: 1,
+    FOOTBALL_DATA_HOST: 2,
+    TRANSISTOR_HOST: 3,
+}
+DEFAULT_HOST_LIMIT = 2
+DEFAULT_DEADLINE_SECONDS = 45.0
+DEFAULT_REQUEST_TIMEOUT = 20.0
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+class Fetcher:
+    """Runs blocking fetch functions on worker threads, limited per host"""
+
+    def __init__(self, executor: ThreadPoolExecutor, request_timeout: float,
+                 host_limits: Optional[Dict[str, int]] = None):
+        self.executor = executor
+        self.request_timeout = request_timeout
+        self.host_limits = host_limits or HOST_LIMITS
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def _semaphore(self, host: str) -> asyncio.Semaphore:
+        if host not in self._semaphores:
+            self._semaphores[host] = asyncio.Semaphore(self.host_limits.get(host, DEFAULT_HOST_LIMIT))
+        return self._semaphores[host]
+
+    async def run(self, func: Callable, *args, **kwargs):
+        """Run func on a worker thread without holding a host slot (parsing etc.)"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    async def fetch(self, host: str, func: Callable, *args, **kwargs):
+        """Run a request-making func while holding one of the host's slots"""
+        async with self._semaphore(host):
+            return await self.run(func, *args, **kwargs)
+
+
+def _read_cache(name: str) -> Any:
+    try:
+        with open(os.path.join(CACHE_DIR, f"{name}.json"), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_cache(name: str, payload: Any):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    write_json_atomic(os.path.join(CACHE_DIR, f"{name}.json"), payload, ensure_ascii=False)
+
+
+def cached_sheet_records() -> Dict[str, List[Dict[str, Any]]]:
+    """Last saved sheet rows, grouped by tab"""
+    by_sheet: Dict[str, List[Dict[str, Any]]] = {}
+    if os.path.exists(SHEET_DATA_FILE):
+        for record in merge_data.load_sheet_data(SHEET_DATA_FILE):
+            by_sheet.setdefault(record.get('sheet_name', ''), []).append(record)
+    return by_sheet
+
+
+def cached_listeners() -> Dict[str, int]:
+    index = open_listener_index(API_DATA_FILE)
+    if index is None:
+        return merge_data.load_api_data(API_DATA_FILE)
+    with index:
+        return dict(index.range('0001-01-01', '9999-12-31'))
+
+
+def cached_results() -> Dict[Tuple[str, str], str]:
+    rows = _read_cache('football_results') or []
+    return {(date, opponent): score for date, opponent, score in rows}
+
+
+async def fetch_sheet(fetcher: Fetcher, sheet_name: str) -> List[Dict[str, Any]]:
+    csv_content = await fetcher.fetch(GOOGLE_HOST, fetch_google_sheet.fetch_google_sheet,
+                                      sheet_name, timeout=fetcher.request_timeout)
+    return await fetcher.run(fetch_google_sheet.parse_csv_data, csv_content, sheet_name=sheet_name)
+
+
+async def fetch_listener_records(fetcher: Fetcher) -> List[Dict[str, Any]]:
+    html = await fetcher.fetch(LISTENER_HOST, fetch_full_api_data.fetch_api_data,
+                               fetch_full_api_data.API_URL, timeout=fetcher.request_timeout)
+    return await fetcher.run(fetch_full_api_data.parse_html_data, html)
+
+
+async def fetch_results(fetcher: Fetcher, date_range: Tuple[Optional[str], Optional[str]]) -> Dict[Tuple[str, str], str]:
+    date_from, date_to = date_range
+    if not date_from or not date_to:
+        return {}
+    return await fetcher.fetch(FOOTBALL_DATA_HOST, merge_data.fetch_ajax_match_results, date_from, date_to)
+
+
+async def fetch_podcast(fetcher: Fetcher) -> Dict[str, Dict[str, Any]]:
+    api_key = fetch_transistor_podcast.get_api_key()
+    feed_url = fetch_transistor_podcast.get_feed_url()
+    start_date, end_date = fetch_transistor_podcast.analytics_window()
+    show_id = await fetcher.fetch(TRANSISTOR_HOST, fetch_transistor_podcast.resolve_show_id, api_key, feed_url)
+    episodes_raw, episode_downloads, downloads = await asyncio.gather(
+        fetcher.fetch(TRANSISTOR_HOST, fetch_transistor_podcast.fetch_all_episodes, api_key, show_id),
+        fetcher.fetch(TRANSISTOR_HOST, fetch_transistor_podcast.fetch_episode_analytics,
+                      api_key, show_id, start_date, end_date),
+        fetcher.fetch(TRANSISTOR_HOST, fetch_transistor_podcast.fetch_show_analytics,
+                      api_key, show_id, start_date, end_date),
+    )
+    return fetch_transistor_podcast.build_podcast_payloads(
+        show_id, feed_url, start_date, end_date, episodes_raw, episode_downloads, downloads
+    )
+
+
+async def _timed(coroutine: Awaitable, report: Dict[str, Any]):
+    started = time.perf_counter()
+    try:
+        return await coroutine
+    finally:
+        report['seconds'] = round(time.perf_counter() - started, 3)
+
+
+async def ingest_all(deadline: float = DEFAULT_DEADLINE_SECONDS,
+                     request_timeout: float = DEFAULT_REQUEST_TIMEOUT,
+                     executor: Optional[ThreadPoolExecutor] = None) -> Dict[str, Any]:
+    """
+    Fetch every source concurrently. Returns the fresh-or-cached value of each
+    source plus a per-source report: status 'fresh', 'cached' (failed, empty or
+    timed out) and the error if there was one.
+    """
+    own_executor = executor is None
+    executor = executor or ThreadPoolExecutor(max_workers=16, thread_name_prefix='ingest')
+    fetcher = Fetcher(executor, request_timeout)
+
+    sheet_cache = cached_sheet_records()
+    # Finished results can only fall between the first known match and today,
+    # so the results request does not have to wait for the sheets
+    cached_from, _ = merge_data.sheet_date_range([r for rows in sheet_cache.values() for r in rows])
+    results_range = (cached_from, datetime.utcnow().date().isoformat())
+
+    sources: Dict[str, Tuple[Awaitable, Callable[[], Any]]] = {}
+    for sheet_name in fetch_google_sheet.SHEET_NAMES:
+        sources[f"sheet:{sheet_name}"] = (fetch_sheet(fetcher, sheet_name),
+                                          functools.partial(sheet_cache.get, sheet_name, []))
+    sources['listeners'] = (fetch_listener_records(fetcher), lambda: None)
+    sources['results'] = (fetch_results(fetcher, results_range), cached_results)
+    sources['podcast'] = (fetch_podcast(fetcher), lambda: None)
+
+    reports: Dict[str, Dict[str, Any]] = {name: {} for name in sources}
+    tasks = {
+        name: asyncio.ensure_future(_timed(coroutine, reports[name]))
+        for name, (coroutine, _) in sources.items()
+    }
+    try:
+        with stage('ingest_all'):
+            await asyncio.wait(tasks.values(), timeout=deadline)
+    finally:
+        for task in tasks.values():
+            task.cancel()
+        if own_executor:
+            # Requests still running past the deadline are abandoned; their request timeout bounds them
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    values: Dict[str, Any] = {}
+    for name, task in tasks.items():
+        report = reports[name]
+        value = None
+        if not task.cancelled() and task.done():
+            if task.exception() is not None:
+                report['error'] = str(task.exception())
+            else:
+                value = task.result()
+        else:
+            report['error'] = f"timed out after {deadline:g}s"
+        if value:
+            report['status'] = 'fresh'
+        else:
+            report['status'] = 'cached'
+            report.setdefault('error', 'empty response')
+            value = sources[name][1]()
+        values[name] = value
+
+    parsed_sheets = {
+        sheet_name: values[f"sheet:{sheet_name}"] or []
+        for sheet_name in fetch_google_sheet.SHEET_NAMES
+    }
+    return {
+        'parsed_sheets': parsed_sheets,
+        'sheet_data': fetch_google_sheet.combine_sheet_records(parsed_sheets),
+        'listener_records': values['listeners'],
+        'results_map': values['results'],
+        'podcast': values['podcast'],
+        'sources': reports,
+    }
+
+
+def save_ingested(ingested: Dict[str, Any]):
+    """Persist the fresh sources so the next run (and the other scripts) can fall back to them"""
+    sources = ingested['sources']
+    with stage('write ingested sources'):
+        if any(report['status'] == 'fresh' for name, report in sources.items() if name.startswith('sheet:')):
+            sheet_data = ingested['sheet_data']
+            with atomic_write(SHEET_DATA_FILE) as f:
+                json.dump({
+                    'metadata': fetch_google_sheet.analyze_sheet_structure(sheet_data),
+                    'all_data': sheet_data,
+                    'sheets_fetched': list(ingested['parsed_sheets'].keys())
+                }, f, indent=2, default=str, ensure_ascii=False)
+        if sources['listeners']['status'] == 'fresh':
+            with atomic_write(API_DATA_FILE) as f:
+                json.dump(ingested['listener_records'], f, indent=2, default=str)
+        if sources['results']['status'] == 'fresh':
+            _write_cache('football_results', [
+                [date, opponent, score] for (date, opponent), score in ingested['results_map'].items()
+            ])
+        if sources['podcast']['status'] == 'fresh':
+            fetch_transistor_podcast.write_podcast_outputs(ingested['podcast'])
+
+
+def ingest(deadline: float, request_timeout: float) -> Dict[str, Any]:
+    """Fetch every source, print the per-source report and persist the fresh ones"""
+    print(f"Fetching all sources concurrently (deadline {deadline:g}s)...")
+    started = time.perf_counter()
+    ingested = asyncio.run(ingest_all(deadline, request_timeout))
+    print(f"  Ingest finished in {time.perf_counter() - started:.2f}s")
+    for name, report in ingested['sources'].items():
+        detail = f" ({report['error']})" if report['status'] != 'fresh' else ''
+        print(f"  {name:28s} {report['status']:7s} {report.get('seconds', 0):7.2f}s{detail}")
+
+    save_ingested(ingested)
+    if ingested['sources']['listeners']['status'] == 'fresh':
+        write_listener_index(cached_listeners(), index_path_for(API_DATA_FILE))
+    return ingested
+
+
+def write_merged(merged: List[Dict[str, Any]]):
+    with stage('write merged_matchdays') as s:
+        json_stream.write_json(MERGED_FILE, merged)
+        write_snapshot(merged, snapshot_path_for(MERGED_FILE))
+        s.add_records(len(merged))
+    print(f"✓ Saved {len(merged)} records to {MERGED_FILE}")
+
+
+class StageRunner:
+    """Skips the stages already completed in a resumed run, up to the first one that is not"""
+
+    def __init__(self, checkpoints: Checkpoints, resuming: bool):
+        self.checkpoints = checkpoints
+        self.skipping = resuming
+        self._input_hashes: Dict[str, Dict[str, Optional[str]]] = {}
+
+    def pending(self, name: str) -> bool:
+        inputs, outputs = STAGES[name]
+        if self.skipping and self.checkpoints.is_complete(name, inputs, outputs):
+            print(f"  ✓ {name} (already completed in this run)")
+            return False
+        # Every stage after the first incomplete one runs again
+        self.skipping = False
+        self._input_hashes[name] = {path: file_hash(path) for path in inputs}
+        return True
+
+    def complete(self, name: str):
+        self.checkpoints.complete(name, self._input_hashes.pop(name), STAGES[name][1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest every source concurrently, then merge and analyze")
+    parser.add_argument('--fresh', action='store_true', help="start a new run instead of resuming")
+    args = parser.parse_args()
+    deadline = _env_float('INGEST_DEADLINE_SECONDS', DEFAULT_DEADLINE_SECONDS)
+    request_timeout = _env_float('INGEST_REQUEST_TIMEOUT', DEFAULT_REQUEST_TIMEOUT)
+
+    checkpoints = Checkpoints(INGEST_STATE_DIR)
+    resuming = checkpoints.resuming and not args.fresh
+    run = checkpoints.start(fresh=args.fresh)
+    print(f"{'Resuming' if resuming else 'Starting'} ingest run {run['run']}")
+    stages = StageRunner(checkpoints, resuming)
+
+    ingested = None
+    if stages.pending('ingest'):
+        ingested = ingest(deadline, request_timeout)
+        stages.complete('ingest')
+
+    merged = None
+    if stages.pending('merge'):
+        if ingested is not None:
+            sheet_data, results_map = ingested['sheet_data'], ingested['results_map']
+        else:
+            sheet_data = merge_data.load_sheet_data(SHEET_DATA_FILE) if os.path.exists(SHEET_DATA_FILE) else []
+            results_map = cached_results()
+        if not sheet_data:
+            print("Error: No Google Sheets data available (fetch failed and no cached data)")
+            return
+        listeners = cached_listeners()
+        validation.run_validation(sheet_data, listeners)
+        print(f"\nMerging {len(sheet_data)} sheet records with {len(listeners)} days of listener data...")
+        baseline = ListenerBaseline.load()
+        merged = merge_data.merge_data(listeners, sheet_data, results_map=results_map, baseline=baseline)
+        baseline.save()
+        write_merged(merged)
+        stages.complete('merge')
+
+    if stages.pending('scores'):
+        if os.path.exists(SCORES_FILE):
+            if merged is None:
+                merged = load_merged_records(MERGED_FILE)
+            print(f"\nApplying match scores from {SCORES_FILE}...")
+            merged = fetch_match_scores.add_scores_to_data(merged, SCORES_FILE)
+            write_merged(merged)
+        stages.complete('scores')
+
+    if stages.pending('analyze'):
+        if merged is None:
+            merged = load_merged_records(MERGED_FILE)
+        analyze_matchdays.run_analysis(merged, OUTPUT_DIR)
+        stages.complete('analyze')
+
+    checkpoints.finish()
+
+
+if __name__ == '__main__':
+    run_main(main, 'async_ingest')
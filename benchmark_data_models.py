@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Memory/time benchmark for the data_models record classes.
+Builds N instances (default 1,000,000) of each record type inside a shared
+batch timestamp and reports wall time and tracemalloc peak per class.
+
+Usage: python3 benchmark_data_models.py [count]
+"""
+import sys
+import time
+import tracemalloc
+from datetime import date, timedelta
+from typing import Callable, Dict, List
+
+from data_models import (
+    DailyListenerStats,
+    EnrichedShow,
+    FrozenDailyListenerStats,
+    FrozenShowMetadata,
+    ShowMetadata,
+    batch_timestamp,
+)
+
+
+def make_dates(count: int) -> List[str]:
+    """Daily ISO dates, repeating after ~10 years like a real listener history"""
+    start = date(2016, 1, 1)
+    span = 3650
+    unique = [(start + timedelta(days=i)).isoformat() for i in range(min(count, span))]
+    return [unique[i % span] for i in range(count)]
+
+
+def build_daily(dates: List[str]) -> list:
+    return [DailyListenerStats(date=d, listeners=i) for i, d in enumerate(dates)]
+
+
+def build_frozen_daily(dates: List[str]) -> list:
+    return [FrozenDailyListenerStats(date=d, listeners=i) for i, d in enumerate(dates)]
+
+
+def build_metadata(dates: List[str]) -> list:
+    labels = ["Eredivisie", "Thuis"]
+    return [
+        ShowMetadata(show_id=f"match_{d}", date=d, show_name="Ajax - PSV",
+                     duration_minutes=120.0, content_type="Live", labels=labels)
+        for d in dates
+    ]
+
+
+def build_frozen_metadata(dates: List[str]) -> list:
+    labels = ("Eredivisie", "Thuis")
+    return [
+        FrozenShowMetadata(show_id=f"match_{d}", date=d, show_name="Ajax - PSV",
+                           duration_minutes=120.0, content_type="Live", labels=labels)
+        for d in dates
+    ]
+
+
+def build_enriched(dates: List[str]) -> list:
+    return [
+        EnrichedShow(date=d, listeners=i, show_id="s", show_name="Ajax - PSV",
+                     duration_minutes=120.0)
+        for i, d in enumerate(dates)
+    ]
+
+
+def measure(builder: Callable[[List[str]], list], dates: List[str]) -> Dict[str, float]:
+    """Run one builder and return wall time and memory figures"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    with batch_timestamp():
+        records = builder(dates)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    count = len(records)
+    del records
+    return {
+        'seconds': round(elapsed, 3),
+        'peak_mb': round(peak / (1024 * 1024), 1),
+        'bytes_per_instance': round(peak / count, 1) if count else 0.0,
+    }
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    print(f"Building {count:,} instances per record type...")
+    dates = make_dates(count)
+
+    builders = [
+        ('DailyListenerStats', build_daily),
+        ('FrozenDailyListenerStats', build_frozen_daily),
+        ('ShowMetadata', build_metadata),
+        ('FrozenShowMetadata', build_frozen_metadata),
+        ('EnrichedShow', build_enriched),
+    ]
+
+    print("-" * 70)
+    for name, builder in builders:
+        result = measure(builder, dates)
+        print(f"{name:26s} | {result['seconds']:7.3f}s | peak {result['peak_mb']:7.1f} MB | "
+              f"{result['bytes_per_instance']:6.1f} B/instance")
+    print("-" * 70)
+
+
+if __name__ == '__main__':
+    main()
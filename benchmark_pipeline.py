@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Scale benchmark for the whole pipeline on synthetic data.
+
+Times and memory-profiles every stage (parse_csv_data, parse_html_data,
+merge_data, every analyze_* function, fit_linear_regression and the JSON
+writers) at the requested scales and writes a machine-readable report.
+
+Usage:
+  python3 benchmark_pipeline.py [--scales 10 100 1000] [--output benchmark_report.json]
+                                [--compare previous_report.json] [--threshold 1.25] [--workers 4]
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+# Measure the bare stage functions, not the instrumentation wrappers
+os.environ.setdefault('PIPELINE_INSTRUMENT', '0')
+
+import analyze_matchdays as analysis
+from analysis_executor import AnalysisExecutor, season_variants
+from categorical import CategoricalColumns, clear_columns_cache
+from explore_api import parse_html_data
+from fetch_google_sheet import parse_csv_data
+from fetch_transistor_podcast import aggregate_monthly
+from generate_synthetic_data import (
+    generate_all_shows_html,
+    generate_daily_listeners,
+    generate_sheet_csv,
+    generate_transistor,
+)
+from kickoff_buckets import KICKOFF_TABLES, parse_kickoffs
+from merge_data import merge_data
+from model_registry import LISTENER_MODEL, ModelRegistry, fit_model
+from standings_history import StandingsHistory
+
+
+def measure(func: Callable[[], Any], repeat: int = 1) -> Dict[str, Any]:
+    """Best wall time over `repeat` runs, plus tracemalloc peak of one run"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    stats = {'seconds': round(best, 6), 'peak_kb': round(peak / 1024, 1)}
+    if isinstance(result, (list, dict, str)):
+        stats['output_size'] = len(result)
+    return stats
+
+
+def cold(func: Callable[[], Any]) -> Callable[[], Any]:
+    """func with the columns_for cache cleared first, so every run pays for the encoding"""
+    def run():
+        clear_columns_cache()
+        return func()
+    return run
+
+
+def run_analysis_tasks(records: List[Dict[str, Any]], workers: int) -> Dict[str, Any]:
+    """Every analysis, overall and per season, through the analysis executor"""
+    tasks = analysis.ANALYSIS_TASKS + season_variants(analysis.ANALYSIS_TASKS, ["2024/2025", "2025/2026"])
+    with AnalysisExecutor(records, workers) as executor:
+        results = executor.run(tasks)
+        # The workers must get the compact snapshot, not a pickled record list
+        assert not executor.parallel or executor.payload_kind == 'snapshot', executor.payload_kind
+        return results
+
+
+def run_scale(scale: float, repeat: int, output_dir: str, workers: int = 0) -> Dict[str, Dict[str, Any]]:
+    """Run every stage once on data of the given scale"""
+    stages: Dict[str, Dict[str, Any]] = {}
+
+    csv_format1 = generate_sheet_csv(scale, fmt=1)
+    csv_format2 = generate_sheet_csv(scale, fmt=2)
+    html = generate_all_shows_html(scale)
+    daily = generate_daily_listeners(scale)
+    transistor = generate_transistor(scale)
+
+    stages['parse_csv_data[format1]'] = measure(lambda: parse_csv_data(csv_format1), repeat)
+    stages['parse_csv_data[format2]'] = measure(lambda: parse_csv_data(csv_format2, sheet_name="Ajax Radio 24/25"), repeat)
+    stages['parse_html_data'] = measure(lambda: parse_html_data(html), repeat)
+
+    sheet_data = parse_csv_data(csv_format1)
+    stages['merge_data'] = measure(lambda: merge_data(daily, sheet_data), repeat)
+    records = merge_data(daily, sheet_data)
+    # Annotated like run_analysis annotates them before the analyses run
+    analysis.add_opponent_positions(records, StandingsHistory())
+
+    analyses = [
+        ('analyze_commentators[full]', lambda: analysis.analyze_commentators(records, split_credit=False)),
+        ('analyze_commentators[split]', lambda: analysis.analyze_commentators(records, split_credit=True)),
+        ('analyze_commentator_duos', lambda: analysis.analyze_commentator_duos(records)),
+        ('analyze_kickoff_exact', lambda: analysis.analyze_kickoff_exact(records)),
+        ('analyze_kickoff_blocks', lambda: analysis.analyze_kickoff_blocks(records)),
+        ('analyze_weekday', lambda: analysis.analyze_weekday(records)),
+        ('analyze_by_result', lambda: analysis.analyze_by_result(records)),
+        ('analyze_by_home_away', lambda: analysis.analyze_by_home_away(records)),
+        ('analyze_by_tv_category', lambda: analysis.analyze_by_tv_category(records)),
+        ('prepare_all_matches', lambda: analysis.prepare_all_matches(records)),
+        ('get_top5_games', lambda: analysis.get_top5_games(records, "2024/2025")),
+        ('build_leaderboards', lambda: analysis.build_leaderboards(records)),
+        ('aggregate_monthly', lambda: aggregate_monthly(transistor['show_analytics']['data']['attributes']['downloads'])),
+    ]
+    for name, func in analyses:
+        stages[name] = measure(func, repeat)
+    # Dictionary encoding of the categorical fields; the analyses above reuse the cached columns
+    stages['categorical_columns'] = measure(lambda: CategoricalColumns(records), repeat)
+    stages['analysis_tasks[serial]'] = measure(lambda: run_analysis_tasks(records, 0), repeat)
+    if workers > 0:
+        stages[f'analysis_tasks[{workers} workers]'] = measure(lambda: run_analysis_tasks(records, workers), repeat)
+
+    training = [r for r in records if r.get('listeners') is not None]
+    # Both encode `training` through columns_for; timed cold, as run_analysis calls them on a new list
+    stages['build_feature_schema'] = measure(cold(lambda: analysis.build_feature_schema(training)), repeat)
+    schema = analysis.build_feature_schema(training)
+    stages['encode_record'] = measure(lambda: [analysis.encode_record(r, schema) for r in training], repeat)
+    stages['encode_records[batch]'] = measure(cold(lambda: analysis.encode_records(training, schema)), repeat)
+    features = [analysis.encode_record(r, schema) for r in training]
+    # Kickoffs parsed once, then bucketed with each table (finer tables cost one bisect more at most)
+    kickoff_minutes = parse_kickoffs(r.get('kickoff') for r in records)
+    stages['parse_kickoffs'] = measure(lambda: parse_kickoffs(r.get('kickoff') for r in records), repeat)
+    for name, table in KICKOFF_TABLES.items():
+        stages[f'kickoff_buckets[{name}]'] = measure(lambda: table.labels_for(kickoff_minutes), repeat)
+    targets = [r['listeners'] for r in training]
+    stages['fit_linear_regression'] = measure(lambda: analysis.fit_linear_regression(features, targets), repeat)
+    # Warm start with the last ten matches new: rank-one updates plus one solve instead of a full fit
+    stored = {LISTENER_MODEL: fit_model(schema, features[:-10], targets[:-10])}
+    stages['model_warm_start[+10]'] = measure(
+        lambda: ModelRegistry(dict(stored)).warm_start(LISTENER_MODEL, schema, features, targets), repeat)
+
+    all_matches = {'matches': analysis.prepare_all_matches(records)}
+    json_path = os.path.join(output_dir, 'all_matches.json')
+    stages['save_json[all_matches]'] = measure(lambda: analysis.save_json(all_matches, json_path), repeat)
+    stages['save_json[all_matches]']['bytes'] = os.path.getsize(json_path)
+    # Rows formatted and written one at a time, as run_analysis does (peak is one row, not the list)
+    stages['stream_json[all_matches]'] = measure(
+        lambda: analysis.save_json({'matches': analysis.iter_all_matches(records)}, json_path), repeat)
+
+    stages['_sizes'] = {
+        'sheet_rows': len(sheet_data),
+        'daily_rows': len(daily),
+        'merged_records': len(records),
+        'episodes': sum(len(page['data']) for page in transistor['episodes_pages']),
+    }
+    return stages
+
+
+def compare_reports(current: Dict[str, Any], previous: Dict[str, Any], threshold: float) -> List[str]:
+    """Stages whose wall time grew by more than `threshold` times versus a previous report"""
+    regressions = []
+    for scale, stages in current['scales'].items():
+        old_stages = previous.get('scales', {}).get(scale, {})
+        for name, stats in stages.items():
+            old = old_stages.get(name)
+            if name.startswith('_') or not old or not old.get('seconds'):
+                continue
+            ratio = stats['seconds'] / old['seconds']
+            if ratio > threshold:
+                regressions.append(f"x{scale} {name}: {old['seconds']:.4f}s -> {stats['seconds']:.4f}s ({ratio:.2f}x)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline on synthetic data")
+    parser.add_argument('--scales', type=float, nargs='+', default=[10, 100])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', default='benchmark_report.json')
+    parser.add_argument('--compare', help="previous report to check for regressions")
+    parser.add_argument('--threshold', type=float, default=1.25)
+    parser.add_argument('--workers', type=int, default=0, help="also time the analyses on a process pool")
+    args = parser.parse_args()
+
+    report = {
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': args.repeat,
+        'scales': {},
+    }
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        for scale in args.scales:
+            label = f"{scale:g}"
+            print(f"Benchmarking scale x{label}...")
+            stages = run_scale(scale, args.repeat, output_dir, args.workers)
+            report['scales'][label] = stages
+            for name, stats in stages.items():
+                if name.startswith('_'):
+                    continue
+                print(f"  {name:32s} {stats['seconds']:10.4f}s  peak {stats['peak_kb']:10.1f} KB")
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✓ Report saved to {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+        regressions = compare_reports(report, previous, args.threshold)
+        if regressions:
+            print(f"\nRegressions (> {args.threshold}x slower):")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("No regressions found.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+"""
+Dictionary encoding of the categorical fields of merged matchday records.
+
+CategoricalColumns interns every value of the string fields (date, kickoff,
+competition, channel, match name, home/away) and of the commentator lists
+once, with CategoryCodes from enriched_columns.py (code 0 is None), and keeps
+one array('I') of codes per field; commentator lists are stored as one flat
+code array sliced by per-record start offsets, as in matchday_snapshot.py.
+
+Derived categories (TV category, duo label, kickoff block, ...) are computed
+once per distinct value or commentator combination with derive() and
+derive_lists(), which return a code column and the label table. Grouping
+and one-hot encoding then work on the integer codes, and labels are decoded
+when the outputs are built.
+
+columns_for() keeps the columns of the last few record lists, so the
+analyses over one list encode it once. Records are treated as read-only
+once encoded: a cached entry is only checked against the list's identity
+and length.
+"""
+from array import array
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from enriched_columns import CategoryCodes
+
+CATEGORICAL_FIELDS = ('date', 'kickoff', 'competition', 'tv_channel', 'match_name', 'home_away')
+LIST_FIELDS = ('commentators',)
+COLUMNS_CACHE_SIZE = 4
+
+DerivedColumn = Tuple[array, CategoryCodes]
+
+
+class CategoricalColumns:
+    """Code arrays for the categorical fields of a list of records"""
+
+    def __init__(self, records: Sequence[Dict[str, Any]]):
+        self.records = records
+        self.vocab: Dict[str, CategoryCodes] = {field: CategoryCodes() for field in CATEGORICAL_FIELDS + LIST_FIELDS}
+        self.codes: Dict[str, array] = {}
+        for field in CATEGORICAL_FIELDS:
+            vocab = self.vocab[field]
+            self.codes[field] = array('I', (vocab.encode(record.get(field)) for record in records))
+        self.starts: Dict[str, array] = {}
+        self.refs: Dict[str, array] = {}
+        for field in LIST_FIELDS:
+            vocab = self.vocab[field]
+            starts = array('I', [0])
+            refs = array('I')
+            for record in records:
+                values = record.get(field)
+                if isinstance(values, list):
+                    refs.extend(vocab.encode(value) for value in values)
+                starts.append(len(refs))
+            self.starts[field] = starts
+            self.refs[field] = refs
+        self._derived: Dict[str, DerivedColumn] = {}
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def list_codes(self, field: str, row: int) -> array:
+        """Codes of the list field of one record"""
+        starts = self.starts[field]
+        return self.refs[field][starts[row]:starts[row + 1]]
+
+    def derive(self, name: str, field: str, label_of: Callable[[Optional[str]], Optional[str]]) -> DerivedColumn:
+        """Codes of label_of(value) per record, calling label_of once per distinct value of field"""
+        cached = self._derived.get(name)
+        if cached is not None:
+            return cached
+        source = self.vocab[field]
+        labels = CategoryCodes()
+        memo: Dict[int, int] = {}
+        codes = array('I')
+        for code in self.codes[field]:
+            derived = memo.get(code)
+            if derived is None:
+                derived = memo[code] = labels.encode(label_of(source.decode(code)))
+            codes.append(derived)
+        self._derived[name] = (codes, labels)
+        return codes, labels
+
+    def derive_lists(self, name: str, field: str,
+                     label_of: Callable[[Tuple[Optional[str], ...]], Optional[str]]) -> DerivedColumn:
+        """Codes of label_of(values) per record, calling label_of once per distinct list of field"""
+        cached = self._derived.get(name)
+        if cached is not None:
+            return cached
+        source = self.vocab[field]
+        starts, refs = self.starts[field], self.refs[field]
+        labels = CategoryCodes()
+        memo: Dict[Tuple[int, ...], int] = {}
+        codes = array('I')
+        for row in range(len(self.records)):
+            key = tuple(refs[starts[row]:starts[row + 1]])
+            derived = memo.get(key)
+            if derived is None:
+                derived = memo[key] = labels.encode(label_of(tuple(source.decode(code) for code in key)))
+            codes.append(derived)
+        self._derived[name] = (codes, labels)
+        return codes, labels
+
+    def take(self, rows: Sequence[int]) -> 'CategoricalColumns':
+        """Columns of the given rows, sharing this instance's vocabularies and derived label tables"""
+        subset = CategoricalColumns.__new__(CategoricalColumns)
+        subset.records = [self.records[row] for row in rows]
+        subset.vocab = self.vocab
+        subset.codes = {field: array('I', (codes[row] for row in rows)) for field, codes in self.codes.items()}
+        subset.starts = {}
+        subset.refs = {}
+        for field in self.starts:
+            starts = array('I', [0])
+            refs = array('I')
+            for row in rows:
+                refs.extend(self.list_codes(field, row))
+                starts.append(len(refs))
+            subset.starts[field] = starts
+            subset.refs[field] = refs
+        subset._derived = {
+            name: (array('I', (codes[row] for row in rows)), labels)
+            for name, (codes, labels) in self._derived.items()
+        }
+        return subset
+
+
+_cache: 'OrderedDict[int, Tuple[Sequence[Dict[str, Any]], int, CategoricalColumns]]' = OrderedDict()
+
+
+def columns_for(records: Sequence[Dict[str, Any]]) -> CategoricalColumns:
+    """CategoricalColumns of records, reused while the same list is analysed"""
+    entry = _cache.get(id(records))
+    if entry is not None and entry[0] is records and entry[1] == len(records):
+        _cache.move_to_end(id(records))
+        return entry[2]
+    columns = CategoricalColumns(records)
+    _cache[id(records)] = (records, len(records), columns)
+    while len(_cache) > COLUMNS_CACHE_SIZE:
+        _cache.popitem(last=False)
+    return columns
+
+
+def clear_columns_cache():
+    """Forget every list columns_for has encoded"""
+    _cache.clear()
+
+
+def group_by_code(codes: Sequence[int], values: Sequence[Any]) -> Dict[int, List[Any]]:
+    """Values per code in first-seen order, skipping code 0 (None) and None values"""
+    groups: Dict[int, List[Any]] = {}
+    for code, value in zip(codes, values):
+        if code and value is not None:
+            group = groups.get(code)
+            if group is None:
+                group = groups[code] = []
+            group.append(value)
+    return groups
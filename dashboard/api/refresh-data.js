@@ -4,6 +4,35 @@ export default async function handler(req, res) {
     return res.status(405).json({ message: 'Method Not Allowed' })
   }
 
+  // Prefer the resident refresh daemon (refresh_daemon.py) when one is configured
+  const daemonUrl = process.env.REFRESH_DAEMON_URL
+  if (daemonUrl) {
+    try {
+      const daemonToken = process.env.REFRESH_DAEMON_TOKEN
+      // A hung daemon must not hold the function until the platform kills it
+      const daemonTimeout = Number(process.env.REFRESH_DAEMON_TIMEOUT_MS) || 20000
+      const response = await fetch(`${daemonUrl.replace(/\/$/, '')}/refresh`, {
+        method: 'POST',
+        headers: daemonToken ? { Authorization: `Bearer ${daemonToken}` } : {},
+        signal: AbortSignal.timeout(daemonTimeout)
+      })
+      const summary = await response.json()
+      if (response.ok) {
+        return res.status(200).json({
+          message: `Data refreshed in ${summary.seconds}s.`,
+          details: summary
+        })
+      }
+      return res.status(response.status).json({
+        message: 'Refresh daemon reported an error',
+        details: summary
+      })
+    } catch (error) {
+      // Fall through to the GitHub workflow when the daemon is unreachable or timed out
+      console.error('Refresh daemon unreachable:', error)
+    }
+  }
+
   const token = process.env.GITHUB_TOKEN
   const owner = process.env.GITHUB_OWNER
   const repo = process.env.GITHUB_REPO
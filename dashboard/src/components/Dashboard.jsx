@@ -9,6 +9,7 @@ import HomeAwayAnalysisSection from './HomeAwayAnalysisSection'
 import TVCategoryAnalysisSection from './TVCategoryAnalysisSection'
 import KickoffBlocksSection from './KickoffBlocksSection'
 import WeekdaySection from './WeekdaySection'
+import { fetchFeedOutput, fetchOutput, loadManifest } from '../utils/outputs'
 import './Dashboard.css'
 
 function Dashboard() {
@@ -24,6 +25,8 @@ function Dashboard() {
     weekday: null,
     futureMatches: null,
     recentPredictions: null,
+    modelSelection: null,
+    analysisCube: null,
     podcastEpisodes: null,
     podcastMonthly: null,
     podcastApps: null
@@ -43,9 +46,8 @@ function Dashboard() {
     }
     setError(null)
 
-    const cacheBuster = `?t=${Date.now()}`
-
     try {
+      const manifest = await loadManifest()
       const [
         allMatchesRes,
         top5GamesRes,
@@ -62,20 +64,20 @@ function Dashboard() {
         podcastMonthlyRes,
         podcastAppsRes
       ] = await Promise.all([
-        fetch(`/output/all_matches.json${cacheBuster}`, { cache: 'no-store' }),
-        fetch(`/output/top5_games.json${cacheBuster}`, { cache: 'no-store' }),
-        fetch(`/output/commentator_duos.json${cacheBuster}`, { cache: 'no-store' }),
-        fetch(`/output/by_result.json${cacheBuster}`, { cache: 'no-store' }),
-        fetch(`/output/by_home_away.json${cacheBuster}`, { cache: 'no-store' }),
-        fetch(`/output/by_tv_category.json${cacheBuster}`, { cache: 'no-store' }),
-        fetch(`/output/commentators_full_credit.json${cacheBuster}`, { cache: 'no-store' }),
-        fetch(`/output/kickoff_blocks.json${cacheBuster}`, { cache: 'no-store' }),
-        fetch(`/output/weekday.json${cacheBuster}`, { cache: 'no-store' }),
-        fetch(`/output/future_matches.json${cacheBuster}`, { cache: 'no-store' }),
-        fetch(`/output/recent_predictions.json${cacheBuster}`, { cache: 'no-store' }),
-        fetch(`/output/podcast_episodes.json${cacheBuster}`, { cache: 'no-store' }),
-        fetch(`/output/podcast_monthly.json${cacheBuster}`, { cache: 'no-store' }),
-        fetch(`/output/podcast_apps.json${cacheBuster}`, { cache: 'no-store' })
+        fetchFeedOutput(manifest, 'all_matches'),
+        fetchOutput(manifest, 'top5_games.json'),
+        fetchOutput(manifest, 'commentator_duos.json'),
+        fetchOutput(manifest, 'by_result.json'),
+        fetchOutput(manifest, 'by_home_away.json'),
+        fetchOutput(manifest, 'by_tv_category.json'),
+        fetchOutput(manifest, 'commentators_full_credit.json'),
+        fetchOutput(manifest, 'kickoff_blocks.json'),
+        fetchOutput(manifest, 'weekday.json'),
+        fetchOutput(manifest, 'future_matches.json'),
+        fetchOutput(manifest, 'recent_predictions.json'),
+        fetchFeedOutput(manifest, 'podcast_episodes'),
+        fetchOutput(manifest, 'podcast_monthly.json'),
+        fetchOutput(manifest, 'podcast_apps.json')
       ])
 
       if (!allMatchesRes.ok || !top5GamesRes.ok || !commentatorDuosRes.ok ||
@@ -88,6 +90,15 @@ function Dashboard() {
         throw new Error('Failed to load podcast data files')
       }
 
+      // Backtest metrics are optional: model_selection.py may not have run yet
+      const modelSelectionData = await fetchOutput(manifest, 'model_selection.json')
+        .then((res) => (res.ok ? res.json() : null))
+        .catch(() => null)
+      // Optional as well: without the cube the sections show the unfiltered outputs only
+      const analysisCubeData = await fetchOutput(manifest, 'analysis_cube.json')
+        .then((res) => (res.ok ? res.json() : null))
+        .catch(() => null)
+
       const [
         allMatchesData,
         top5GamesData,
@@ -132,6 +143,8 @@ function Dashboard() {
         weekday: weekdayData.weekdays || [],
         futureMatches: futureMatchesData,
         recentPredictions: recentPredictionsData,
+        modelSelection: modelSelectionData,
+        analysisCube: analysisCubeData,
         podcastEpisodes: podcastEpisodesData,
         podcastMonthly: podcastMonthlyData,
         podcastApps: podcastAppsData
@@ -357,6 +370,7 @@ function Dashboard() {
                 <FutureMatchesSection
                   data={data.futureMatches}
                   recentPredictions={data.recentPredictions}
+                  modelSelection={data.modelSelection}
                 />
               </section>
 
@@ -369,7 +383,7 @@ function Dashboard() {
               </section>
 
               <section className="dashboard-section" id="by-home-away">
-                <HomeAwayAnalysisSection data={data.byHomeAway} />
+                <HomeAwayAnalysisSection data={data.byHomeAway} cube={data.analysisCube} />
               </section>
 
               <section className="dashboard-section" id="by-tv-category">
@@ -3,7 +3,7 @@ import { LineChart, Line, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContai
 import ExportPdfButton from './ExportPdfButton'
 import './FutureMatchesSection.css'
 
-function FutureMatchesSection({ data, recentPredictions }) {
+function FutureMatchesSection({ data, recentPredictions, modelSelection }) {
   if (!data || !data.matches || data.matches.length === 0) {
     return (
       <div className="section future-matches-section">
@@ -35,6 +35,9 @@ function FutureMatchesSection({ data, recentPredictions }) {
     predicted: match.predicted_listeners || 0
   }))
 
+  const backtest = modelSelection?.best
+  const baseline = modelSelection?.kickoff_average_baseline
+
   return (
     <div className="section future-matches-section">
       <div className="section-header-row">
@@ -97,6 +100,18 @@ function FutureMatchesSection({ data, recentPredictions }) {
           </ResponsiveContainer>
         </div>
       ) : null}
+
+      {backtest && backtest.mae != null ? (
+        <p className="model-backtest">
+          Backtest ({modelSelection.scheme}, {modelSelection.folds} folds, {backtest.predictions} matches):
+          {' '}MAE {Math.round(backtest.mae).toLocaleString()}
+          {baseline && baseline.mae != null
+            ? ` vs ${Math.round(baseline.mae).toLocaleString()} for kickoff-block averages`
+            : ''}
+          {' '}• features: {backtest.features.length ? backtest.features.join(', ') : 'intercept only'}
+          {backtest.ridge ? ` • ridge ${backtest.ridge}` : ''}
+        </p>
+      ) : null}
     </div>
   )
 }
@@ -1,9 +1,13 @@
-import React from 'react'
+import React, { useState } from 'react'
 import { BarChart, Bar, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer } from 'recharts'
 import ExportPdfButton from './ExportPdfButton'
+import { rollup } from '../utils/cube'
 import './HomeAwayAnalysisSection.css'
 
-function HomeAwayAnalysisSection({ data }) {
+function HomeAwayAnalysisSection({ data, cube }) {
+  const [season, setSeason] = useState('')
+  const [competition, setCompetition] = useState('')
+
   if (!data || !data.home_away || data.home_away.length === 0) {
     return (
       <div className="section">
@@ -17,7 +21,27 @@ function HomeAwayAnalysisSection({ data }) {
     return new Intl.NumberFormat('en-US').format(num)
   }
 
-  const chartData = data.home_away.map(item => ({
+  // A season or competition slice is rolled up from analysis_cube.json; medians
+  // are not additive, so the sliced rows have none
+  const filters = {}
+  if (season) filters.season = season
+  if (competition) filters.competition = competition
+  const rows = cube && (season || competition)
+    ? rollup(cube, ['home_away'], filters)
+        .filter(group => group.key.home_away !== null && group.count > 0)
+        .sort((a, b) => a.key.home_away.localeCompare(b.key.home_away))
+        .map(group => ({
+          home_away: group.key.home_away,
+          matches_count: group.count,
+          avg: group.avg,
+          median: null,
+          min: group.min,
+          max: group.max
+        }))
+    : data.home_away
+  const filterOptions = (dimension) => (cube?.values?.[dimension] || []).filter(value => value !== null)
+
+  const chartData = rows.map(item => ({
     home_away: item.home_away,
     avg: item.avg,
     matches: item.matches_count
@@ -29,7 +53,24 @@ function HomeAwayAnalysisSection({ data }) {
         <h2>Average Listeners by Home/Away</h2>
         <ExportPdfButton targetId="home-away-analysis-table" filename="home-away-analysis.pdf" />
       </div>
-      
+
+      {cube && (
+        <div className="home-away-filters">
+          <select value={season} onChange={(e) => setSeason(e.target.value)}>
+            <option value="">All seasons</option>
+            {filterOptions('season').map(value => (
+              <option key={value} value={value}>{value}</option>
+            ))}
+          </select>
+          <select value={competition} onChange={(e) => setCompetition(e.target.value)}>
+            <option value="">All competitions</option>
+            {filterOptions('competition').map(value => (
+              <option key={value} value={value}>{value}</option>
+            ))}
+          </select>
+        </div>
+      )}
+
       <div className="section-content">
         <div className="table-container" id="home-away-analysis-table">
           <table className="data-table">
@@ -44,12 +85,17 @@ function HomeAwayAnalysisSection({ data }) {
               </tr>
             </thead>
             <tbody>
-              {data.home_away.map((item, index) => (
+              {rows.length === 0 && (
+                <tr>
+                  <td colSpan={6}>No matches for this selection</td>
+                </tr>
+              )}
+              {rows.map((item, index) => (
                 <tr key={index}>
                   <td className="type-cell">{item.home_away}</td>
                   <td>{item.matches_count}</td>
                   <td className="avg-cell">{formatNumber(item.avg)}</td>
-                  <td>{formatNumber(item.median)}</td>
+                  <td>{item.median === null ? '–' : formatNumber(item.median)}</td>
                   <td>{formatNumber(item.min)}</td>
                   <td>{formatNumber(item.max)}</td>
                 </tr>
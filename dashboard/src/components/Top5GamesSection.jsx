@@ -3,7 +3,9 @@ import ExportPdfButton from './ExportPdfButton'
 import './Top5GamesSection.css'
 
 function Top5GamesSection({ data }) {
-  if (!data || (!data['2024/2025'] && !data['2025/2026'])) {
+  // Seasons ('YYYY/YYYY') are derived from the data by the pipeline
+  const seasons = data ? Object.keys(data).sort() : []
+  if (seasons.length === 0) {
     return (
       <div className="section">
         <h2>Top 5 Games by Season</h2>
@@ -105,8 +107,9 @@ function Top5GamesSection({ data }) {
     <div className="section top5-games-section">
       <h2>Top 5 Games by Season</h2>
       <div className="seasons-container">
-        {data['2024/2025'] && renderSeasonTable('2024/2025', data['2024/2025'])}
-        {data['2025/2026'] && renderSeasonTable('2025/2026', data['2025/2026'])}
+        {seasons.map((season) => (
+          <React.Fragment key={season}>{renderSeasonTable(season, data[season])}</React.Fragment>
+        ))}
       </div>
     </div>
   )
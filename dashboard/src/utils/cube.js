@@ -0,0 +1,46 @@
+// Client-side rollups over analysis_cube.json (see analysis_cube.py for the layout)
+
+const emptyCell = () => ({ count: 0, sum: 0, sumsq: 0, min: null, max: null, missing: 0 })
+
+const mergeRow = (cell, row, offset) => {
+  const [count, sum, sumsq, min, max, missing] = row.slice(offset)
+  cell.count += count
+  cell.sum += sum
+  cell.sumsq += sumsq
+  cell.missing += missing
+  if (min !== null) cell.min = cell.min === null ? min : Math.min(cell.min, min)
+  if (max !== null) cell.max = cell.max === null ? max : Math.max(cell.max, max)
+}
+
+// Group cube cells by the `by` dimensions, keeping cells that match `filters`
+// ({ season: '2024/2025', competition: ['Eredivisie', ...] }).
+// Returns [{ key: { dimension: value }, count, sum, sumsq, min, max, missing, avg }]
+export function rollup(cube, by = [], filters = {}) {
+  const { dimensions, values, cells } = cube
+  const positions = by.map((dimension) => dimensions.indexOf(dimension))
+  const checks = Object.entries(filters).map(([dimension, wanted]) => [
+    dimensions.indexOf(dimension),
+    new Set(Array.isArray(wanted) ? wanted : [wanted])
+  ])
+  const groups = new Map()
+
+  for (const row of cells) {
+    const matches = checks.every(([position, wanted]) => wanted.has(values[dimensions[position]][row[position]]))
+    if (!matches) continue
+    const groupKey = positions.map((position) => row[position]).join('|')
+    let group = groups.get(groupKey)
+    if (!group) {
+      group = { key: {}, ...emptyCell() }
+      by.forEach((dimension, i) => {
+        group.key[dimension] = values[dimension][row[positions[i]]]
+      })
+      groups.set(groupKey, group)
+    }
+    mergeRow(group, row, dimensions.length)
+  }
+
+  return [...groups.values()].map((group) => ({
+    ...group,
+    avg: group.count ? Math.round((group.sum / group.count) * 100) / 100 : null
+  }))
+}
@@ -0,0 +1,93 @@
+// Delta feeds (see output_deltas.py): the last payload and its version are kept
+// in localStorage, and only the deltas published since are downloaded.
+
+const FEEDS = {
+  all_matches: { listKey: 'matches', key: (match) => `${match.date || ''}|${match.match_name || ''}` },
+  podcast_episodes: { listKey: 'episodes', key: (episode) => String(episode.id || '') }
+}
+
+const storageKey = (feed) => `deltaFeed:${feed}`
+
+// key -> item, numbering repeated keys (#2, #3, ...) like the Python side
+const keyed = (items, key) => {
+  const map = new Map()
+  for (const item of items) {
+    const base = key(item)
+    let itemKey = base
+    let n = 1
+    while (map.has(itemKey)) {
+      n += 1
+      itemKey = `${base}#${n}`
+    }
+    map.set(itemKey, item)
+  }
+  return map
+}
+
+export function applyDelta(payload, delta, { listKey, key }) {
+  const items = keyed(payload[listKey] || [], key)
+  for (const itemKey of delta.deletes || []) {
+    items.delete(itemKey)
+  }
+  // Upserts are [key, item] pairs: the key already carries the #n of a repeated key
+  for (const [itemKey, item] of delta.upserts || []) {
+    items.set(itemKey, item)
+  }
+  const order = delta.order || Array.from(items.keys())
+  const result = delta.meta ? { ...delta.meta } : { ...payload }
+  result[listKey] = order.map((itemKey) => items.get(itemKey))
+  return result
+}
+
+const fetchJson = async (url, options) => {
+  const response = await fetch(url, options)
+  if (!response.ok) {
+    throw new Error(`Failed to load ${url}`)
+  }
+  return response.json()
+}
+
+const readCache = (feed) => {
+  try {
+    return JSON.parse(localStorage.getItem(storageKey(feed)))
+  } catch {
+    return null
+  }
+}
+
+// Latest payload of a feed, or null when the feed is not published
+export async function loadFeed(feed) {
+  const spec = FEEDS[feed]
+  const indexResponse = await fetch(`/output/deltas/${feed}.json`, { cache: 'no-cache' })
+  if (!indexResponse.ok) return null
+  const index = await indexResponse.json()
+
+  const cached = readCache(feed)
+  if (cached && cached.version === index.version) {
+    return cached.payload
+  }
+
+  let payload
+  let version
+  const firstDelta = index.deltas.length ? index.deltas[0].version : index.version + 1
+  if (cached && cached.version < index.version && cached.version + 1 >= firstDelta) {
+    payload = cached.payload
+    version = cached.version
+  } else {
+    version = index.snapshots[index.snapshots.length - 1]
+    payload = (await fetchJson(`/output/deltas/${feed}/snapshot.${version}.json`)).payload
+  }
+
+  const pending = index.deltas.filter((entry) => entry.version > version)
+  const deltas = await Promise.all(pending.map((entry) => fetchJson(`/output/deltas/${feed}/${entry.file}`)))
+  for (const delta of deltas) {
+    payload = applyDelta(payload, delta, spec)
+  }
+
+  try {
+    localStorage.setItem(storageKey(feed), JSON.stringify({ version: index.version, payload }))
+  } catch {
+    // Storage full or unavailable: the next visit starts from a snapshot again
+  }
+  return payload
+}
@@ -0,0 +1,35 @@
+// Output loading via manifest.json (see output_manifest.py): only the manifest is
+// revalidated; the content-hashed files it points to never change and are cached.
+// Without a manifest (older deployments) every file is fetched uncached as before.
+
+import { loadFeed } from './deltaFeed'
+
+export async function loadManifest() {
+  try {
+    const response = await fetch('/output/manifest.json', { cache: 'no-cache' })
+    if (!response.ok) return null
+    const manifest = await response.json()
+    return manifest && manifest.files ? manifest : null
+  } catch {
+    return null
+  }
+}
+
+export function fetchOutput(manifest, name) {
+  const hashed = manifest?.files?.[name]
+  if (hashed) {
+    return fetch(`/output/${hashed}`)
+  }
+  return fetch(`/output/${name}?t=${Date.now()}`, { cache: 'no-store' })
+}
+
+// Outputs published as a delta feed (all_matches, podcast_episodes) are rebuilt
+// from the locally cached version plus new deltas; anything else, or any
+// failure, falls back to the full file.
+export async function fetchFeedOutput(manifest, feed) {
+  const payload = await loadFeed(feed).catch(() => null)
+  if (payload) {
+    return new Response(JSON.stringify(payload), { headers: { 'Content-Type': 'application/json' } })
+  }
+  return fetchOutput(manifest, `${feed}.json`)
+}
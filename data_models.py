@@ -1,9 +1,11 @@
 """
 Data model definitions for Ajax Radio Dashboard
 """
+from contextlib import contextmanager
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import List, Optional
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
 from enum import Enum
 
 
@@ -16,7 +18,49 @@ class ContentType(Enum):
     UNKNOWN = "Unknown"
 
 
-@dataclass
+# Timestamp shared by every record created inside a batch_timestamp() block
+_batch_timestamp: Optional[datetime] = None
+
+
+def _now() -> datetime:
+    """Current batch timestamp, or datetime.now() outside of a batch"""
+    return _batch_timestamp if _batch_timestamp is not None else datetime.now()
+
+
+@contextmanager
+def batch_timestamp(timestamp: Optional[datetime] = None) -> Iterator[datetime]:
+    """
+    Stamp all records created inside the block with one shared timestamp
+    instead of calling datetime.now() per instance.
+    """
+    global _batch_timestamp
+    previous = _batch_timestamp
+    _batch_timestamp = timestamp or datetime.now()
+    try:
+        yield _batch_timestamp
+    finally:
+        _batch_timestamp = previous
+
+
+@lru_cache(maxsize=65536)
+def calendar_fields(date: str) -> Optional[Tuple[str, str, int, int]]:
+    """
+    Derive (day_of_week, month, year, week_number) from an ISO date string.
+    Cached per date, so a batch of shows on the same days parses each date once.
+    """
+    try:
+        date_obj = datetime.fromisoformat(date.replace('T00:00:00', ''))
+    except (ValueError, AttributeError, TypeError):
+        return None
+    return (
+        date_obj.strftime('%A'),
+        date_obj.strftime('%B'),
+        date_obj.year,
+        date_obj.isocalendar()[1],
+    )
+
+
+@dataclass(slots=True)
 class DailyListenerStats:
     """Daily listener statistics from the API"""
     date: str  # ISO 8601 format: "2026-01-20"
@@ -26,10 +70,23 @@ class DailyListenerStats:
     
     def __post_init__(self):
         if self.fetched_at is None:
-            self.fetched_at = datetime.now()
+            self.fetched_at = _now()
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
+class FrozenDailyListenerStats:
+    """Immutable, hashable variant of DailyListenerStats"""
+    date: str
+    listeners: int
+    source: str = "api"
+    fetched_at: Optional[datetime] = None
+    
+    def __post_init__(self):
+        if self.fetched_at is None:
+            object.__setattr__(self, 'fetched_at', _now())
+
+
+@dataclass(slots=True)
 class ShowMetadata:
     """Show metadata from Google Sheet"""
     show_id: str
@@ -45,20 +102,50 @@ class ShowMetadata:
     
     def __post_init__(self):
         if self.updated_at is None:
-            self.updated_at = datetime.now()
+            self.updated_at = _now()
+    
+    @property
+    def content_type_enum(self) -> ContentType:
+        """Convert content_type string to enum"""
+        return _content_type_enum(self.content_type)
+
+
+@dataclass(slots=True, frozen=True)
+class FrozenShowMetadata:
+    """Immutable, hashable variant of ShowMetadata (labels stored as a tuple)"""
+    show_id: str
+    date: str
+    show_name: str
+    duration_minutes: Optional[float] = None
+    content_type: Optional[str] = None
+    labels: Tuple[str, ...] = ()
+    host: Optional[str] = None
+    description: Optional[str] = None
+    source: str = "google_sheet"
+    updated_at: Optional[datetime] = None
+    
+    def __post_init__(self):
+        if not isinstance(self.labels, tuple):
+            object.__setattr__(self, 'labels', tuple(self.labels))
+        if self.updated_at is None:
+            object.__setattr__(self, 'updated_at', _now())
     
     @property
     def content_type_enum(self) -> ContentType:
         """Convert content_type string to enum"""
-        if not self.content_type:
-            return ContentType.UNKNOWN
-        try:
-            return ContentType(self.content_type)
-        except ValueError:
-            return ContentType.UNKNOWN
+        return _content_type_enum(self.content_type)
+
 
+def _content_type_enum(content_type: Optional[str]) -> ContentType:
+    if not content_type:
+        return ContentType.UNKNOWN
+    try:
+        return ContentType(content_type)
+    except ValueError:
+        return ContentType.UNKNOWN
 
-@dataclass
+
+@dataclass(slots=True)
 class EnrichedShow:
     """Combined and enriched show record"""
     # From API
@@ -87,20 +174,13 @@ class EnrichedShow:
     
     def __post_init__(self):
         """Calculate derived fields"""
-        from datetime import datetime as dt
-        
         if self.last_updated is None:
-            self.last_updated = datetime.now()
+            self.last_updated = _now()
         
-        # Parse date and extract time components
-        try:
-            date_obj = dt.fromisoformat(self.date.replace('T00:00:00', ''))
-            self.day_of_week = date_obj.strftime('%A')
-            self.month = date_obj.strftime('%B')
-            self.year = date_obj.year
-            self.week_number = date_obj.isocalendar()[1]
-        except (ValueError, AttributeError):
-            pass
+        # Calendar components come from the shared per-date cache
+        calendar = calendar_fields(self.date)
+        if calendar is not None:
+            self.day_of_week, self.month, self.year, self.week_number = calendar
         
         # Calculate listeners per minute
         if self.duration_minutes and self.duration_minutes > 0:
@@ -121,9 +201,10 @@ class EnrichedShow:
     def from_api_and_sheet(
         cls,
         api_data: DailyListenerStats,
-        sheet_data: Optional[ShowMetadata] = None
+        sheet_data: Optional[ShowMetadata] = None,
+        last_updated: Optional[datetime] = None
     ) -> 'EnrichedShow':
-        """Create EnrichedShow from API and optional sheet data"""
+        """Create EnrichedShow from API and optional sheet data (plain or frozen)"""
         if sheet_data:
             return cls(
                 date=api_data.date,
@@ -132,15 +213,104 @@ class EnrichedShow:
                 show_name=sheet_data.show_name,
                 duration_minutes=sheet_data.duration_minutes,
                 content_type=sheet_data.content_type,
-                labels=sheet_data.labels,
+                labels=list(sheet_data.labels),
                 host=sheet_data.host,
                 description=sheet_data.description,
+                last_updated=last_updated,
             )
         else:
             return cls(
                 date=api_data.date,
                 listeners=api_data.listeners,
+                last_updated=last_updated,
             )
+    
+    @classmethod
+    def from_sheet_only(
+        cls,
+        sheet_data: ShowMetadata,
+        last_updated: Optional[datetime] = None
+    ) -> 'EnrichedShow':
+        """Create EnrichedShow for a sheet row that has no API listener data"""
+        return cls(
+            date=sheet_data.date,
+            listeners=0,
+            show_id=sheet_data.show_id,
+            show_name=sheet_data.show_name,
+            duration_minutes=sheet_data.duration_minutes,
+            content_type=sheet_data.content_type,
+            labels=list(sheet_data.labels),
+            host=sheet_data.host,
+            description=sheet_data.description,
+            last_updated=last_updated,
+        )
+
+
+JOIN_TYPES = ("inner", "left", "outer")
+
+AnyListenerStats = Union[DailyListenerStats, FrozenDailyListenerStats]
+AnyShowMetadata = Union[ShowMetadata, FrozenShowMetadata]
+
+
+def _date_key(date: str) -> str:
+    """Normalize API ('2026-01-20T00:00:00') and sheet ('2026-01-20') dates to one key"""
+    return date.replace('T00:00:00', '')
+
+
+def index_sheet_by_date(
+    sheet_rows: Iterable[AnyShowMetadata]
+) -> Dict[str, Dict[str, AnyShowMetadata]]:
+    """Index sheet rows as date -> show_id -> metadata (first row per show_id wins)"""
+    index: Dict[str, Dict[str, AnyShowMetadata]] = {}
+    for row in sheet_rows:
+        shows = index.setdefault(_date_key(row.date), {})
+        if row.show_id not in shows:
+            shows[row.show_id] = row
+    return index
+
+
+def join_api_and_sheet(
+    api_rows: Iterable[AnyListenerStats],
+    sheet_rows: Iterable[AnyShowMetadata],
+    how: str = "left",
+    last_updated: Optional[datetime] = None
+) -> Iterator[EnrichedShow]:
+    """
+    Join daily API stats with sheet metadata by date, yielding EnrichedShow records.
+    
+    The sheet side is indexed once; API rows are streamed, so api_rows can be
+    a generator over millions of days. A day with several shows yields one
+    record per show.
+    
+    how:
+        "inner" - only days present in both sources
+        "left"  - every API day; days without sheet data become api_only records
+        "outer" - like "left", followed by sheet_only records for dates the API never had
+    """
+    if how not in JOIN_TYPES:
+        raise ValueError(f"how must be one of {JOIN_TYPES}, got {how!r}")
+    
+    timestamp = last_updated or datetime.now()
+    index = index_sheet_by_date(sheet_rows)
+    matched_dates = set() if how == "outer" else None
+    
+    for api_row in api_rows:
+        key = _date_key(api_row.date)
+        shows = index.get(key)
+        if shows:
+            if matched_dates is not None:
+                matched_dates.add(key)
+            for sheet_row in shows.values():
+                yield EnrichedShow.from_api_and_sheet(api_row, sheet_row, last_updated=timestamp)
+        elif how != "inner":
+            yield EnrichedShow.from_api_and_sheet(api_row, last_updated=timestamp)
+    
+    if matched_dates is not None:
+        for key in sorted(index):
+            if key in matched_dates:
+                continue
+            for sheet_row in index[key].values():
+                yield EnrichedShow.from_sheet_only(sheet_row, last_updated=timestamp)
 
 
 # Example usage and helper functions
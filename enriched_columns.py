@@ -0,0 +1,330 @@
+"""
+Columnar record store for bulk EnrichedShow data.
+
+Listeners, durations and dates (as day ordinals) live in typed arrays, and the
+repeated strings (content_type, host, day_of_week) are interned to integer
+codes. Derived fields are computed over whole columns at once, with NumPy
+used when it is installed.
+"""
+import math
+from array import array
+from datetime import date as date_cls
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from data_models import EnrichedShow, calendar_fields
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; the pure-Python paths are used instead
+    np = None
+
+
+COMPLETENESS_LABELS = ["api_only", "full", "sheet_only"]
+_COMPLETENESS_API_ONLY, _COMPLETENESS_FULL, _COMPLETENESS_SHEET_ONLY = 0, 1, 2
+
+
+class CategoryCodes:
+    """Interns string labels to integer codes. Code 0 is reserved for None."""
+
+    def __init__(self, labels: Iterable[str] = ()):
+        self.labels: List[Optional[str]] = [None]
+        self.codes: Dict[Optional[str], int] = {None: 0}
+        for label in labels:
+            self.encode(label)
+
+    def encode(self, label: Optional[str]) -> int:
+        code = self.codes.get(label)
+        if code is None:
+            code = len(self.labels)
+            self.codes[label] = code
+            self.labels.append(label)
+        return code
+
+    def lookup(self, label: Optional[str]) -> Optional[int]:
+        """Code for label without interning it (None if unseen)"""
+        return self.codes.get(label)
+
+    def decode(self, code: int) -> Optional[str]:
+        return self.labels[code]
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+
+def date_to_ordinal(date_str: str) -> int:
+    """Parse 'YYYY-MM-DD' (optionally with 'T00:00:00') to a proleptic day ordinal"""
+    return datetime.fromisoformat(date_str.replace('T00:00:00', '')).toordinal()
+
+
+class EnrichedShowColumns:
+    """Column-oriented container for many EnrichedShow records"""
+
+    def __init__(self):
+        self.date_ordinals = array('l')
+        self.listeners = array('q')
+        self.duration_minutes = array('d')  # NaN when unknown
+        self.content_type_codes = array('I')
+        self.host_codes = array('I')
+        self.day_of_week_codes = array('I')
+
+        self.content_types = CategoryCodes()
+        self.hosts = CategoryCodes()
+        self.days_of_week = CategoryCodes()
+
+        # Per-row values that are (nearly) unique, kept as plain lists
+        self.show_ids: List[Optional[str]] = []
+        self.show_names: List[Optional[str]] = []
+        self.descriptions: List[Optional[str]] = []
+        self.labels: List[List[str]] = []
+
+        self.last_updated: Optional[datetime] = None
+
+    def __len__(self) -> int:
+        return len(self.date_ordinals)
+
+    # Building
+
+    def append(self, show: EnrichedShow) -> None:
+        """Append one EnrichedShow"""
+        self.append_values(
+            date=show.date,
+            listeners=show.listeners,
+            show_id=show.show_id,
+            show_name=show.show_name,
+            duration_minutes=show.duration_minutes,
+            content_type=show.content_type,
+            labels=show.labels,
+            host=show.host,
+            description=show.description,
+        )
+        if self.last_updated is None:
+            self.last_updated = show.last_updated
+
+    def append_values(self, date: str, listeners: int,
+                      show_id: Optional[str] = None,
+                      show_name: Optional[str] = None,
+                      duration_minutes: Optional[float] = None,
+                      content_type: Optional[str] = None,
+                      labels: Optional[List[str]] = None,
+                      host: Optional[str] = None,
+                      description: Optional[str] = None) -> None:
+        """Append one row from raw values without building an EnrichedShow"""
+        self.date_ordinals.append(date_to_ordinal(date))
+        self.listeners.append(int(listeners))
+        self.duration_minutes.append(float(duration_minutes) if duration_minutes is not None else math.nan)
+        self.content_type_codes.append(self.content_types.encode(content_type))
+        self.host_codes.append(self.hosts.encode(host))
+        calendar = calendar_fields(date)
+        self.day_of_week_codes.append(self.days_of_week.encode(calendar[0] if calendar else None))
+        self.show_ids.append(show_id)
+        self.show_names.append(show_name)
+        self.descriptions.append(description)
+        self.labels.append(list(labels) if labels else [])
+
+    @classmethod
+    def from_shows(cls, shows: Iterable[EnrichedShow]) -> 'EnrichedShowColumns':
+        columns = cls()
+        for show in shows:
+            columns.append(show)
+        return columns
+
+    # Round trip
+
+    def row(self, index: int) -> EnrichedShow:
+        """Materialize a single row as an EnrichedShow"""
+        duration = self.duration_minutes[index]
+        return EnrichedShow(
+            date=date_cls.fromordinal(self.date_ordinals[index]).isoformat(),
+            listeners=self.listeners[index],
+            show_id=self.show_ids[index],
+            show_name=self.show_names[index],
+            duration_minutes=None if math.isnan(duration) else duration,
+            content_type=self.content_types.decode(self.content_type_codes[index]),
+            labels=list(self.labels[index]),
+            host=self.hosts.decode(self.host_codes[index]),
+            description=self.descriptions[index],
+            last_updated=self.last_updated,
+        )
+
+    def to_shows(self) -> Iterator[EnrichedShow]:
+        for index in range(len(self)):
+            yield self.row(index)
+
+    def select(self, indices: Sequence[int]) -> 'EnrichedShowColumns':
+        """New container holding only the given rows (category tables are shared)"""
+        subset = EnrichedShowColumns()
+        subset.content_types = self.content_types
+        subset.hosts = self.hosts
+        subset.days_of_week = self.days_of_week
+        subset.last_updated = self.last_updated
+        for name in ('date_ordinals', 'listeners', 'duration_minutes',
+                     'content_type_codes', 'host_codes', 'day_of_week_codes'):
+            source = getattr(self, name)
+            setattr(subset, name, array(source.typecode, (source[i] for i in indices)))
+        for name in ('show_ids', 'show_names', 'descriptions', 'labels'):
+            source = getattr(self, name)
+            setattr(subset, name, [source[i] for i in indices])
+        return subset
+
+    # Vectorized derived fields
+
+    def as_numpy(self) -> Dict[str, Any]:
+        """Zero-copy NumPy views over the numeric columns"""
+        if np is None:
+            raise RuntimeError("NumPy is not installed")
+        return {
+            'date_ordinals': np.frombuffer(self.date_ordinals, dtype=np.dtype(f"i{self.date_ordinals.itemsize}")),
+            'listeners': np.frombuffer(self.listeners, dtype=np.int64),
+            'duration_minutes': np.frombuffer(self.duration_minutes, dtype=np.float64),
+            'content_type_codes': np.frombuffer(self.content_type_codes, dtype=np.dtype(f"u{self.content_type_codes.itemsize}")),
+            'host_codes': np.frombuffer(self.host_codes, dtype=np.dtype(f"u{self.host_codes.itemsize}")),
+            'day_of_week_codes': np.frombuffer(self.day_of_week_codes, dtype=np.dtype(f"u{self.day_of_week_codes.itemsize}")),
+        }
+
+    def listeners_per_minute(self) -> array:
+        """Listeners divided by duration per row (NaN when the duration is unknown or zero)"""
+        if np is not None:
+            views = self.as_numpy()
+            durations = views['duration_minutes']
+            with np.errstate(divide='ignore', invalid='ignore'):
+                result = np.where(durations > 0, views['listeners'] / durations, np.nan)
+            return array('d', result.tobytes())
+        return array('d', (
+            listeners / duration if duration > 0 else math.nan
+            for listeners, duration in zip(self.listeners, self.duration_minutes)
+        ))
+
+    def completeness_codes(self) -> array:
+        """data_completeness per row as codes into COMPLETENESS_LABELS"""
+        has_sheet = [
+            show_id is not None and show_name is not None
+            for show_id, show_name in zip(self.show_ids, self.show_names)
+        ]
+        if np is not None:
+            api = np.frombuffer(self.listeners, dtype=np.int64) > 0
+            sheet = np.fromiter(has_sheet, dtype=bool, count=len(has_sheet))
+            codes = np.full(len(api), _COMPLETENESS_API_ONLY, dtype=np.uint32)
+            codes[api & sheet] = _COMPLETENESS_FULL
+            codes[~api & sheet] = _COMPLETENESS_SHEET_ONLY
+            return array('I', codes.astype(np.dtype(f"u{array('I').itemsize}")).tobytes())
+        codes = array('I')
+        for listeners, sheet in zip(self.listeners, has_sheet):
+            if listeners > 0 and sheet:
+                codes.append(_COMPLETENESS_FULL)
+            elif not listeners > 0 and sheet:
+                codes.append(_COMPLETENESS_SHEET_ONLY)
+            else:
+                codes.append(_COMPLETENESS_API_ONLY)
+        return codes
+
+    def data_completeness(self) -> List[str]:
+        return [COMPLETENESS_LABELS[code] for code in self.completeness_codes()]
+
+    def week_numbers(self) -> array:
+        """ISO week number per row"""
+        if np is not None and len(self):
+            ordinals = np.frombuffer(self.date_ordinals, dtype=np.dtype(f"i{self.date_ordinals.itemsize}")).astype(np.int64)
+            weekday = (ordinals - 1) % 7  # Monday == 0
+            thursday = ordinals - weekday + 3
+            # Day ordinal 719163 is 1970-01-01
+            years = (thursday - 719163).astype('datetime64[D]').astype('datetime64[Y]')
+            jan1 = years.astype('datetime64[D]').astype(np.int64) + 719163
+            weeks = (thursday - jan1) // 7 + 1
+            return array('H', weeks.astype(np.uint16).tobytes())
+        cache: Dict[int, int] = {}
+        weeks = array('H')
+        for ordinal in self.date_ordinals:
+            week = cache.get(ordinal)
+            if week is None:
+                week = date_cls.fromordinal(ordinal).isocalendar()[1]
+                cache[ordinal] = week
+            weeks.append(week)
+        return weeks
+
+    # Filtering and aggregation
+
+    def filter_indices(self, content_type: Optional[str] = None,
+                       host: Optional[str] = None,
+                       day_of_week: Optional[str] = None,
+                       date_from: Optional[str] = None,
+                       date_to: Optional[str] = None,
+                       min_listeners: Optional[int] = None) -> List[int]:
+        """Row indices matching all given filters; label filters compare integer codes"""
+        criteria = []
+        for label, table, codes in (
+            (content_type, self.content_types, self.content_type_codes),
+            (host, self.hosts, self.host_codes),
+            (day_of_week, self.days_of_week, self.day_of_week_codes),
+        ):
+            if label is None:
+                continue
+            code = table.lookup(label)
+            if code is None:
+                return []
+            criteria.append((codes, code))
+
+        low = date_to_ordinal(date_from) if date_from else None
+        high = date_to_ordinal(date_to) if date_to else None
+
+        if np is not None:
+            views = self.as_numpy()
+            mask = np.ones(len(self), dtype=bool)
+            for codes, code in criteria:
+                mask &= np.frombuffer(codes, dtype=np.dtype(f"u{codes.itemsize}")) == code
+            if low is not None:
+                mask &= views['date_ordinals'] >= low
+            if high is not None:
+                mask &= views['date_ordinals'] <= high
+            if min_listeners is not None:
+                mask &= views['listeners'] >= min_listeners
+            return np.flatnonzero(mask).tolist()
+
+        indices = []
+        for index in range(len(self)):
+            if any(codes[index] != code for codes, code in criteria):
+                continue
+            ordinal = self.date_ordinals[index]
+            if low is not None and ordinal < low:
+                continue
+            if high is not None and ordinal > high:
+                continue
+            if min_listeners is not None and self.listeners[index] < min_listeners:
+                continue
+            indices.append(index)
+        return indices
+
+    def listeners_by(self, dimension: str) -> List[Dict[str, Any]]:
+        """Count/sum/avg of listeners grouped by content_type, host or day_of_week"""
+        tables = {
+            'content_type': (self.content_types, self.content_type_codes),
+            'host': (self.hosts, self.host_codes),
+            'day_of_week': (self.days_of_week, self.day_of_week_codes),
+        }
+        if dimension not in tables:
+            raise ValueError(f"Unknown dimension: {dimension}")
+        table, codes = tables[dimension]
+
+        if np is not None:
+            code_view = np.frombuffer(codes, dtype=np.dtype(f"u{codes.itemsize}"))
+            counts = np.bincount(code_view, minlength=len(table)).tolist()
+            sums = np.bincount(code_view, weights=np.frombuffer(self.listeners, dtype=np.int64),
+                               minlength=len(table)).tolist()
+        else:
+            counts = [0] * len(table)
+            sums = [0] * len(table)
+            for code, listeners in zip(codes, self.listeners):
+                counts[code] += 1
+                sums[code] += listeners
+
+        results = []
+        for code, count in enumerate(counts):
+            if not count:
+                continue
+            results.append({
+                dimension: table.decode(code),
+                'count': count,
+                'listeners': int(sums[code]),
+                'avg': round(sums[code] / count, 2),
+            })
+        return results
@@ -7,12 +7,18 @@ from bs4 import BeautifulSoup
 import json
 from datetime import datetime
 
-def fetch_api_data(url: str) -> str:
+from instrumentation import instrument, record_bytes, run_main, stage
+from pipeline_state import atomic_write
+
+@instrument()
+def fetch_api_data(url: str, timeout=None) -> str:
     """Fetch HTML data from the API"""
-    response = requests.get(url)
+    response = requests.get(url, timeout=timeout)
     response.raise_for_status()
+    record_bytes(len(response.content))
     return response.text
 
+@instrument()
 def parse_html_data(html: str):
     """Parse HTML table and extract data"""
     soup = BeautifulSoup(html, 'html.parser')
@@ -44,8 +50,11 @@ def parse_html_data(html: str):
     
     return data
 
-if __name__ == '__main__':
-    api_url = 'http://ajaxradio.westeurope.azurecontainer.io/all_shows/'
+API_URL = 'http://ajaxradio.westeurope.azurecontainer.io/all_shows/'
+
+
+def main():
+    api_url = API_URL
     
     print("Fetching full API data...")
     html = fetch_api_data(api_url)
@@ -56,8 +65,10 @@ if __name__ == '__main__':
     print(f"Extracted {len(data)} records")
     
     # Save all data
-    with open('api_data_full.json', 'w') as f:
-        json.dump(data, f, indent=2, default=str)
+    with stage('write api_data_full') as s:
+        with atomic_write('api_data_full.json') as f:
+            json.dump(data, f, indent=2, default=str)
+        s.add_records(len(data))
     
     print(f"Saved {len(data)} records to 'api_data_full.json'")
     
@@ -70,3 +81,6 @@ if __name__ == '__main__':
     print(f"  2024: {len(dates_2024)} records")
     print(f"  2025: {len(dates_2025)} records")
     print(f"  2026: {len(dates_2026)} records")
+
+if __name__ == '__main__':
+    run_main(main, 'fetch_full_api_data')
@@ -10,6 +10,9 @@ from datetime import datetime
 from typing import List, Dict, Any, Optional
 import requests
 
+from instrumentation import instrument, record_bytes, run_main, stage
+from pipeline_state import atomic_write
+
 # Google Sheet ID from the URL
 SHEET_ID = "1OHAe_neJVg2eLjn54jWkSbTTQKNfWyP-sDbtDRAWuJc"
 # Sheets to fetch (tab names in the Google Sheet)
@@ -109,11 +112,13 @@ def parse_dutch_date(date_str: str, year: Optional[int] = None, sheet_name: Opti
         return None
 
 
-def fetch_google_sheet(sheet_name: str) -> str:
+@instrument()
+def fetch_google_sheet(sheet_name: str, timeout: Optional[float] = None) -> str:
     """Fetch Google Sheet as CSV for a specific sheet"""
     url = get_csv_url(sheet_name)
-    response = requests.get(url, allow_redirects=True)
+    response = requests.get(url, allow_redirects=True, timeout=timeout)
     response.raise_for_status()
+    record_bytes(len(response.content))
     return response.text
 
 def fetch_all_sheets() -> Dict[str, str]:
@@ -131,6 +136,7 @@ def fetch_all_sheets() -> Dict[str, str]:
     return sheets_data
 
 
+@instrument()
 def parse_csv_data(csv_content: str, sheet_name: Optional[str] = None) -> List[Dict[str, Any]]:
     """Parse CSV content into structured data using proper CSV parser"""
     if not csv_content.strip():
@@ -311,6 +317,20 @@ def parse_csv_data(csv_content: str, sheet_name: Optional[str] = None) -> List[D
     return data
 
 
+def combine_sheet_records(parsed_sheets: Dict[str, List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Tag records with their sheet name and drop (date, match) duplicates across sheets"""
+    combined = []
+    seen_matches = set()
+    for sheet_name, records in parsed_sheets.items():
+        for record in records:
+            unique_key = (record.get('date', ''), record.get('match', '') or record.get('show_name', ''))
+            if unique_key in seen_matches:
+                continue
+            seen_matches.add(unique_key)
+            combined.append(dict(record, sheet_name=sheet_name))
+    return combined
+
+
 def analyze_sheet_structure(data: List[Dict[str, Any]]) -> Dict[str, Any]:
     """Analyze the Google Sheet data structure"""
     if not data:
@@ -356,7 +376,7 @@ def analyze_sheet_structure(data: List[Dict[str, Any]]) -> Dict[str, Any]:
     }
 
 
-if __name__ == '__main__':
+def main():
     print("Fetching Google Sheet data from specified sheets...")
     print(f"Sheets to fetch: {', '.join(SHEET_NAMES)}\n")
     
@@ -428,12 +448,14 @@ if __name__ == '__main__':
             print(json.dumps(record, indent=2, default=str))
         
         # Save parsed data
-        with open('google_sheet_data.json', 'w', encoding='utf-8') as f:
-            json.dump({
-                'metadata': combined_analysis,
-                'all_data': all_data,
-                'sheets_fetched': list(sheets_data.keys())
-            }, f, indent=2, default=str, ensure_ascii=False)
+        with stage('write google_sheet_data') as s:
+            with atomic_write('google_sheet_data.json') as f:
+                json.dump({
+                    'metadata': combined_analysis,
+                    'all_data': all_data,
+                    'sheets_fetched': list(sheets_data.keys())
+                }, f, indent=2, default=str, ensure_ascii=False)
+            s.add_records(len(all_data))
         
         print(f"\nTotal records: {len(all_data)}")
         print(f"Data saved to 'google_sheet_data.json'")
@@ -442,3 +464,7 @@ if __name__ == '__main__':
         print(f"Error: {e}")
         import traceback
         traceback.print_exc()
+
+
+if __name__ == '__main__':
+    run_main(main, 'fetch_google_sheet')
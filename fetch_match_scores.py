@@ -11,12 +11,16 @@ from typing import List, Dict, Any, Optional
 import requests
 from bs4 import BeautifulSoup
 
+import json_stream
+from instrumentation import instrument, run_main, stage
+from matchday_snapshot import load_merged_records, snapshot_path_for, write_snapshot
 
+
+@instrument()
 def load_merged_data(filepath: str = 'merged_matchdays.json') -> List[Dict[str, Any]]:
-    """Load merged matchdays JSON data"""
+    """Load merged matchdays data (binary snapshot if up to date, else JSON)"""
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return load_merged_records(filepath)
     except FileNotFoundError:
         print(f"Warning: {filepath} not found")
         return []
@@ -73,6 +77,7 @@ def determine_result(score: str, home_away: str, match_name: str) -> Optional[st
         return None
 
 
+@instrument()
 def add_scores_to_data(data: List[Dict[str, Any]], scores_file: Optional[str] = None) -> List[Dict[str, Any]]:
     """
     Add scores to match data
@@ -164,8 +169,10 @@ def main():
     # Save updated data
     output_file = 'merged_matchdays.json'
     print(f"\nSaving updated data to {output_file}...")
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    with stage('write merged_matchdays') as s:
+        json_stream.write_json(output_file, data)
+        write_snapshot(data, snapshot_path_for(output_file))
+        s.add_records(len(data))
     
     print(f"✓ Saved {len(data)} records to {output_file}")
     
@@ -179,4 +186,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    run_main(main, 'fetch_match_scores')
@@ -6,13 +6,18 @@ Outputs:
   - dashboard/public/output/podcast_monthly.json
   - dashboard/public/output/podcast_apps.json
 """
-import json
 import os
 from datetime import datetime, timedelta
 from collections import defaultdict
+from typing import Iterable, Iterator
 
 import requests
 
+import json_stream
+from instrumentation import instrument, record_bytes, run_main, stage
+from output_deltas import FeedRecorder
+from output_manifest import publish_outputs
+
 
 API_BASE = "https://api.transistor.fm/v1"
 DEFAULT_FEED_URL = "https://feeds.transistor.fm/ajax-podcast"
@@ -38,9 +43,11 @@ def api_get(path: str, api_key: str, params: dict | None = None) -> dict:
         timeout=30
     )
     response.raise_for_status()
+    record_bytes(len(response.content))
     return response.json()
 
 
+@instrument()
 def resolve_show_id(api_key: str, feed_url: str) -> str:
     page = 1
     while True:
@@ -59,8 +66,8 @@ def resolve_show_id(api_key: str, feed_url: str) -> str:
     raise RuntimeError(f"Show not found for feed URL: {feed_url}")
 
 
-def fetch_all_episodes(api_key: str, show_id: str) -> list[dict]:
-    episodes = []
+def iter_episodes(api_key: str, show_id: str) -> Iterator[dict]:
+    """Published episodes, newest first, fetched a page at a time as they are consumed"""
     page = 1
     while True:
         payload = api_get("/episodes", api_key, params={
@@ -70,14 +77,19 @@ def fetch_all_episodes(api_key: str, show_id: str) -> list[dict]:
             "pagination[page]": page,
             "pagination[per]": 100
         })
-        episodes.extend(payload.get("data", []))
+        yield from payload.get("data", [])
         meta = payload.get("meta", {})
         if page >= meta.get("totalPages", page):
             break
         page += 1
-    return episodes
 
 
+@instrument()
+def fetch_all_episodes(api_key: str, show_id: str) -> list[dict]:
+    return list(iter_episodes(api_key, show_id))
+
+
+@instrument()
 def fetch_episode_analytics(api_key: str, show_id: str, start_date: str, end_date: str) -> dict:
     payload = api_get(f"/analytics/{show_id}/episodes", api_key, params={
         "start_date": start_date,
@@ -91,6 +103,7 @@ def fetch_episode_analytics(api_key: str, show_id: str, start_date: str, end_dat
     return analytics
 
 
+@instrument()
 def fetch_show_analytics(api_key: str, show_id: str, start_date: str, end_date: str) -> list[dict]:
     payload = api_get(f"/analytics/{show_id}", api_key, params={
         "start_date": start_date,
@@ -100,6 +113,7 @@ def fetch_show_analytics(api_key: str, show_id: str, start_date: str, end_date:
     return downloads
 
 
+@instrument()
 def aggregate_monthly(downloads: list[dict]) -> list[dict]:
     monthly = defaultdict(int)
     for item in downloads:
@@ -120,75 +134,99 @@ def ensure_output_dir():
     os.makedirs(OUTPUT_DIR, exist_ok=True)
 
 
-def main():
-    api_key = get_api_key()
-    feed_url = get_feed_url()
-
-    today = datetime.utcnow().date()
+def analytics_window(today=None) -> tuple[str, str]:
+    """(start_date, end_date) of the two-year analytics window, as DD-MM-YYYY"""
+    today = today or datetime.utcnow().date()
     end_date = today.strftime("%d-%m-%Y")
     start_date = (today - timedelta(days=730)).strftime("%d-%m-%Y")
+    return start_date, end_date
+
+
+def episode_row(episode: dict, episode_downloads: dict) -> dict:
+    attributes = episode.get("attributes", {})
+    episode_id = str(episode.get("id"))
+    return {
+        "id": episode_id,
+        "title": attributes.get("title"),
+        "published_at": attributes.get("published_at"),
+        "duration_in_mmss": attributes.get("duration_in_mmss"),
+        "share_url": attributes.get("share_url"),
+        "total_downloads": episode_downloads.get(episode_id, 0)
+    }
 
-    print("Resolving show ID...")
-    show_id = resolve_show_id(api_key, feed_url)
-    print(f"Resolved show ID: {show_id}")
-
-    print("Fetching episodes...")
-    episodes_raw = fetch_all_episodes(api_key, show_id)
 
-    print("Fetching episode analytics...")
-    episode_downloads = fetch_episode_analytics(api_key, show_id, start_date, end_date)
+def build_podcast_payloads(show_id: str, feed_url: str, start_date: str, end_date: str,
+                           episodes_raw: Iterable[dict], episode_downloads: dict,
+                           downloads: list[dict]) -> dict[str, dict]:
+    """
+    Output file name -> payload for the three podcast outputs. The episodes are
+    a generator over episodes_raw, consumed once by write_podcast_outputs.
+    """
+    episodes = (episode_row(episode, episode_downloads) for episode in episodes_raw)
+    monthly = aggregate_monthly(downloads)
+    window = {"start_date": start_date, "end_date": end_date}
 
-    episodes = []
-    for episode in episodes_raw:
-        attributes = episode.get("attributes", {})
-        episode_id = str(episode.get("id"))
-        episodes.append({
-            "id": episode_id,
-            "title": attributes.get("title"),
-            "published_at": attributes.get("published_at"),
-            "duration_in_mmss": attributes.get("duration_in_mmss"),
-            "share_url": attributes.get("share_url"),
-            "total_downloads": episode_downloads.get(episode_id, 0)
-        })
+    return {
+        "podcast_episodes.json": {
+            "show_id": show_id,
+            "feed_url": feed_url,
+            "window": window,
+            "episodes": episodes
+        },
+        "podcast_monthly.json": {
+            "show_id": show_id,
+            "feed_url": feed_url,
+            "window": window,
+            "months": monthly
+        },
+        "podcast_apps.json": {
+            "show_id": show_id,
+            "feed_url": feed_url,
+            "window": window,
+            "apps": []
+        },
+    }
 
-    print("Fetching show analytics...")
-    downloads = fetch_show_analytics(api_key, show_id, start_date, end_date)
-    monthly = aggregate_monthly(downloads)
 
+def write_podcast_outputs(payloads: dict[str, dict]):
     ensure_output_dir()
+    episodes_payload = payloads["podcast_episodes.json"]
+    # Episodes are streamed into the output and the delta feed in one pass
+    episodes_feed = FeedRecorder(OUTPUT_DIR, "podcast_episodes",
+                                 {key: value for key, value in episodes_payload.items() if key != "episodes"})
+    with stage("write podcast outputs") as s:
+        for filename, payload in payloads.items():
+            if payload is episodes_payload:
+                payload = {**payload, "episodes": episodes_feed.track(payload["episodes"])}
+            json_stream.write_json(os.path.join(OUTPUT_DIR, filename), payload)
+        s.add_records(episodes_feed.count + len(payloads["podcast_monthly.json"]["months"]))
+    episodes_feed.publish()
+    publish_outputs(OUTPUT_DIR, payloads)
 
-    episodes_payload = {
-        "show_id": show_id,
-        "feed_url": feed_url,
-        "window": {"start_date": start_date, "end_date": end_date},
-        "episodes": episodes
-    }
 
-    monthly_payload = {
-        "show_id": show_id,
-        "feed_url": feed_url,
-        "window": {"start_date": start_date, "end_date": end_date},
-        "months": monthly
-    }
+def main():
+    api_key = get_api_key()
+    feed_url = get_feed_url()
+    start_date, end_date = analytics_window()
 
-    apps_payload = {
-        "show_id": show_id,
-        "feed_url": feed_url,
-        "window": {"start_date": start_date, "end_date": end_date},
-        "apps": []
-    }
+    print("Resolving show ID...")
+    show_id = resolve_show_id(api_key, feed_url)
+    print(f"Resolved show ID: {show_id}")
 
-    with open(os.path.join(OUTPUT_DIR, "podcast_episodes.json"), "w", encoding="utf-8") as file:
-        json.dump(episodes_payload, file, indent=2, ensure_ascii=False)
+    print("Fetching episode analytics...")
+    episode_downloads = fetch_episode_analytics(api_key, show_id, start_date, end_date)
 
-    with open(os.path.join(OUTPUT_DIR, "podcast_monthly.json"), "w", encoding="utf-8") as file:
-        json.dump(monthly_payload, file, indent=2, ensure_ascii=False)
+    print("Fetching show analytics...")
+    downloads = fetch_show_analytics(api_key, show_id, start_date, end_date)
 
-    with open(os.path.join(OUTPUT_DIR, "podcast_apps.json"), "w", encoding="utf-8") as file:
-        json.dump(apps_payload, file, indent=2, ensure_ascii=False)
+    # Episode pages are fetched while the output is written, one page in memory at a time
+    print("Fetching and writing episodes...")
+    write_podcast_outputs(build_podcast_payloads(
+        show_id, feed_url, start_date, end_date, iter_episodes(api_key, show_id), episode_downloads, downloads
+    ))
 
     print("Podcast data saved.")
 
 
 if __name__ == "__main__":
-    main()
+    run_main(main, "fetch_transistor_podcast")
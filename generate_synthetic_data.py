@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Deterministic synthetic inputs for every pipeline stage.
+Scale 1 is roughly today's data (two seasons); 10, 100 and 1000 scale it up.
+
+Usage: python3 generate_synthetic_data.py [scale] [output_dir]
+Writes sheet CSVs (both parse_csv_data formats), an allShows HTML page,
+football-data payloads and Transistor payloads into output_dir.
+"""
+import csv
+import io
+import json
+import os
+import random
+import sys
+from datetime import date, timedelta
+from typing import Any, Dict, List
+
+# Approximate size of the real inputs at scale 1
+BASE_MATCHES = 100
+BASE_DAYS = 600
+BASE_EPISODES = 200
+
+START_DATE = date(2024, 7, 1)
+
+OPPONENTS = [
+    "PSV", "Feyenoord", "AZ", "FC Twente", "FC Utrecht", "NEC", "Sparta Rotterdam",
+    "Go Ahead Eagles", "sc Heerenveen", "FC Groningen", "PEC Zwolle", "Fortuna Sittard",
+    "Heracles Almelo", "NAC Breda", "Excelsior", "FC Volendam", "Telstar",
+    "Vojvodina", "Panathinaikos", "Lazio", "Besiktas", "Real Sociedad",
+]
+COMPETITIONS = ["VriendenLoterij Eredivisie", "Europa League", "Champions League", "KNVB Beker", "Vriendschappelijk"]
+COMMENTATORS = ["Diederik", "Corné", "Mike", "Sander", "Jan", "Kees", "Wesley", "Bas", "Hans", "Tim"]
+TV_CHANNELS = ["ESPN", "ESPN 1", "ESPN2", "ZIGGO", "Ziggo Sport", "Viaplay", "Future Cup", "RTL7", ""]
+KICKOFFS = ["12:15", "14:30", "16:45", "18:45", "20:00", "20:30", "21:00"]
+DUTCH_DAYS = ["ma.", "di.", "wo.", "do.", "vr.", "za.", "zo."]
+
+FORMAT1_HEADER = ["Datum", "Wedstrijd", "Thuis/Uit", "Tijd", "Competitie",
+                  "Commentator 1", "Commentator 2", "TV", "Uitslag", "W/D/L", "Vakantie?"]
+FORMAT2_HEADER = ["", "Dag", "Datum", "Wedstrijd weekend", "Host", "Co-host", "Productie", "Items", "Prijs"]
+
+
+def _match_dates(rng: random.Random, count: int, days: int) -> List[date]:
+    return sorted(START_DATE + timedelta(days=rng.randrange(days)) for _ in range(count))
+
+
+def _match_row(rng: random.Random, match_date: date) -> Dict[str, Any]:
+    opponent = rng.choice(OPPONENTS)
+    home = rng.random() < 0.5
+    home_goals, away_goals = rng.randrange(5), rng.randrange(4)
+    if home:
+        result = "W" if home_goals > away_goals else "L" if home_goals < away_goals else "D"
+    else:
+        result = "W" if away_goals > home_goals else "L" if away_goals < home_goals else "D"
+    commentators = rng.sample(COMMENTATORS, 2 if rng.random() < 0.8 else 1)
+    return {
+        'date': match_date,
+        'match': f"Ajax - {opponent}" if home else f"{opponent} - Ajax",
+        'home_away': "Thuis" if home else "Uit",
+        'time': rng.choice(KICKOFFS),
+        'competition': rng.choice(COMPETITIONS),
+        'commentators': commentators,
+        'tv': rng.choice(TV_CHANNELS),
+        'score': f"{home_goals}-{away_goals}",
+        'result': result,
+    }
+
+
+def generate_sheet_csv(scale: float = 1, seed: int = 1, fmt: int = 1) -> str:
+    """Sheet CSV in parse_csv_data format 1 (match agenda) or 2 (podcast/show)"""
+    rng = random.Random(seed)
+    count = max(1, int(BASE_MATCHES * scale))
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(FORMAT1_HEADER if fmt == 1 else FORMAT2_HEADER)
+    for match_date in _match_dates(rng, count, int(BASE_DAYS * scale)):
+        row = _match_row(rng, match_date)
+        commentators = row['commentators'] + ["N.v.t."] * (2 - len(row['commentators']))
+        datum = f"{match_date.day}/{match_date.month:02d}/{match_date.year}"
+        if fmt == 1:
+            writer.writerow([datum, row['match'], row['home_away'], row['time'], row['competition'],
+                             commentators[0], commentators[1], row['tv'],
+                             row['score'] if rng.random() < 0.9 else "", row['result'], ""])
+        else:
+            writer.writerow(["", DUTCH_DAYS[match_date.weekday()], datum, row['match'],
+                             commentators[0], commentators[1], "", f"{row['competition']}, Nabeschouwing", ""])
+    return output.getvalue()
+
+
+def generate_daily_listeners(scale: float = 1, seed: int = 2) -> Dict[str, int]:
+    """date -> listeners for every day, with match-day style spikes"""
+    rng = random.Random(seed)
+    days = max(1, int(BASE_DAYS * scale))
+    series = {}
+    for offset in range(days):
+        day = START_DATE + timedelta(days=offset)
+        listeners = int(rng.gauss(2000, 300))
+        if day.weekday() >= 5 and rng.random() < 0.6:
+            listeners += rng.randrange(8000, 36000)
+        series[day.isoformat()] = max(0, listeners)
+    return series
+
+
+def generate_all_shows_html(scale: float = 1, seed: int = 2) -> str:
+    """allShows page as served by the listener API (newest day first)"""
+    rows = [
+        f"<tr><td>{day}T00:00:00</td><td>{listeners}</td></tr>"
+        for day, listeners in sorted(generate_daily_listeners(scale, seed).items(), reverse=True)
+    ]
+    return ("<html><body><table id=\"allShows\"><thead><tr><th>Datum</th><th>Luisteraars</th></tr></thead>"
+            "<tbody>" + "".join(rows) + "</tbody></table></body></html>")
+
+
+def generate_football_data(scale: float = 1, seed: int = 3) -> Dict[str, Any]:
+    """football-data.org style team, matches and standings payloads"""
+    rng = random.Random(seed)
+    count = max(1, int(BASE_MATCHES * scale))
+    matches = []
+    for match_date in _match_dates(rng, count, int(BASE_DAYS * scale)):
+        row = _match_row(rng, match_date)
+        home_name, away_name = [part.strip() for part in row['match'].split(" - ")]
+        home_goals, away_goals = (int(x) for x in row['score'].split("-"))
+        matches.append({
+            'utcDate': f"{match_date.isoformat()}T{row['time']}:00Z",
+            'status': 'FINISHED',
+            'homeTeam': {'name': "AFC Ajax" if home_name == "Ajax" else home_name},
+            'awayTeam': {'name': "AFC Ajax" if away_name == "Ajax" else away_name},
+            'score': {'fullTime': {'home': home_goals, 'away': away_goals}},
+        })
+    teams = ["AFC Ajax"] + OPPONENTS[:17]
+    rng.shuffle(teams)
+    table = [
+        {'position': position, 'team': {'name': name, 'shortName': name}}
+        for position, name in enumerate(teams, 1)
+    ]
+    return {
+        'teams': {'teams': [{'id': 678, 'name': "AFC Ajax"}]},
+        'matches': {'matches': matches},
+        'standings': {'standings': [{'type': 'TOTAL', 'table': table}]},
+    }
+
+
+def generate_transistor(scale: float = 1, seed: int = 4) -> Dict[str, Any]:
+    """Transistor show, paged episodes and analytics payloads"""
+    rng = random.Random(seed)
+    count = max(1, int(BASE_EPISODES * scale))
+    episodes = []
+    for index in range(count):
+        published = START_DATE + timedelta(days=index * 3 % max(1, int(BASE_DAYS * scale)))
+        episodes.append({
+            'id': str(100000 + index),
+            'attributes': {
+                'title': f"Ajax Podcast #{index + 1}",
+                'published_at': f"{published.isoformat()}T08:00:00.000Z",
+                'duration_in_mmss': f"{rng.randrange(20, 90)}:{rng.randrange(60):02d}",
+                'share_url': f"https://share.transistor.fm/s/{100000 + index:x}",
+            },
+        })
+    per_page = 100
+    pages = [
+        {'data': episodes[i:i + per_page],
+         'meta': {'currentPage': i // per_page + 1, 'totalPages': max(1, -(-count // per_page))}}
+        for i in range(0, count, per_page)
+    ]
+    episode_analytics = {'data': {'attributes': {'episodes': [
+        {'id': int(episode['id']), 'downloads': [{'date': '01-01-2025', 'downloads': rng.randrange(50, 5000)}]}
+        for episode in episodes
+    ]}}}
+    days = max(1, int(BASE_DAYS * scale))
+    show_analytics = {'data': {'attributes': {'downloads': [
+        {'date': (START_DATE + timedelta(days=offset)).strftime('%d-%m-%Y'), 'downloads': rng.randrange(100, 3000)}
+        for offset in range(days)
+    ]}}}
+    return {
+        'shows': {'data': [{'id': '12345', 'attributes': {'feed_url': "https://feeds.transistor.fm/ajax-podcast"}}],
+                  'meta': {'totalPages': 1}},
+        'episodes_pages': pages,
+        'episode_analytics': episode_analytics,
+        'show_analytics': show_analytics,
+    }
+
+
+def write_dataset(scale: float, output_dir: str) -> Dict[str, str]:
+    """Write all synthetic inputs for one scale; returns name -> path"""
+    os.makedirs(output_dir, exist_ok=True)
+    paths = {}
+    for name, content in [
+        ('sheet_format1.csv', generate_sheet_csv(scale, fmt=1)),
+        ('sheet_format2.csv', generate_sheet_csv(scale, fmt=2)),
+        ('all_shows.html', generate_all_shows_html(scale)),
+    ]:
+        path = os.path.join(output_dir, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        paths[name] = path
+    for name, payload in [
+        ('football_data.json', generate_football_data(scale)),
+        ('transistor.json', generate_transistor(scale)),
+    ]:
+        path = os.path.join(output_dir, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False)
+        paths[name] = path
+    return paths
+
+
+if __name__ == '__main__':
+    scale = float(sys.argv[1]) if len(sys.argv) > 1 else 1
+    output_dir = sys.argv[2] if len(sys.argv) > 2 else f"synthetic_data/x{sys.argv[1] if len(sys.argv) > 1 else 1}"
+    for name, path in write_dataset(scale, output_dir).items():
+        print(f"  {name}: {path} ({os.path.getsize(path)} bytes)")
@@ -0,0 +1,248 @@
+"""
+Lightweight per-stage instrumentation for the data pipeline scripts.
+
+Wrap a step with the @instrument decorator or the stage() context manager
+to record wall time, CPU time, record counts and bytes fetched. Each script
+then writes a JSON run report via run_main()/write_run_report().
+
+Environment variables:
+  PIPELINE_INSTRUMENT=0     disable; decorators return the original function
+  PIPELINE_TRACEMALLOC=1    also record per-stage tracemalloc peaks (slower)
+  PIPELINE_PROFILE=1|<dir>  dump a cProfile file per script (<script>.prof)
+  PIPELINE_REPORT=<path>    run report location (default: run_report.json, kept out of the
+                            deployed dashboard outputs)
+"""
+import cProfile
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from pipeline_state import write_json_atomic
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+ENABLED = os.environ.get('PIPELINE_INSTRUMENT', '1').lower() not in ('0', 'false', 'no', '')
+TRACE_MEMORY = ENABLED and os.environ.get('PIPELINE_TRACEMALLOC', '0').lower() in ('1', 'true', 'yes')
+DEFAULT_REPORT_PATH = 'run_report.json'
+
+_stats: Dict[str, Dict[str, Any]] = {}
+_stats_lock = threading.Lock()
+_local = threading.local()
+_started_at = datetime.now()
+_started_wall = time.perf_counter()
+
+if TRACE_MEMORY:
+    tracemalloc.start()
+
+
+def _active() -> List['_Stage']:
+    """Running stages of the current thread, innermost last"""
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def _max_rss_kb() -> Optional[int]:
+    if resource is None:
+        return None
+    return int(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+
+
+class _Stage:
+    """Context manager that accumulates one stage's measurements into _stats"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.records = None
+        self.bytes = None
+        self.peak_seen = 0
+
+    def add_records(self, count: int):
+        self.records = (self.records or 0) + count
+
+    def add_bytes(self, count: int):
+        self.bytes = (self.bytes or 0) + count
+
+    def __enter__(self):
+        active = _active()
+        if TRACE_MEMORY:
+            current, peak = tracemalloc.get_traced_memory()
+            if active:
+                active[-1].peak_seen = max(active[-1].peak_seen, peak)
+            tracemalloc.reset_peak()
+            self.memory_start = current
+        active.append(self)
+        self.wall_start = time.perf_counter()
+        self.cpu_start = time.process_time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        wall = time.perf_counter() - self.wall_start
+        cpu = time.process_time() - self.cpu_start
+        active = _active()
+        active.pop()
+
+        rss = _max_rss_kb()
+        with _stats_lock:
+            entry = _stats.get(self.name)
+            if entry is None:
+                entry = {'stage': self.name, 'calls': 0, 'wall_seconds': 0.0, 'cpu_seconds': 0.0}
+                _stats[self.name] = entry
+            entry['calls'] += 1
+            entry['wall_seconds'] += wall
+            entry['cpu_seconds'] += cpu
+            if self.records is not None:
+                entry['records'] = entry.get('records', 0) + self.records
+            if self.bytes is not None:
+                entry['bytes'] = entry.get('bytes', 0) + self.bytes
+            if exc_type is not None:
+                entry['errors'] = entry.get('errors', 0) + 1
+            if TRACE_MEMORY:
+                peak = max(self.peak_seen, tracemalloc.get_traced_memory()[1])
+                entry['tracemalloc_peak_kb'] = max(entry.get('tracemalloc_peak_kb', 0),
+                                                   round((peak - self.memory_start) / 1024, 1))
+                if active:
+                    active[-1].peak_seen = max(active[-1].peak_seen, peak)
+            if rss is not None:
+                entry['max_rss_kb'] = rss
+        return False
+
+
+class _NullStage:
+    """Shared no-op stage used when instrumentation is disabled"""
+
+    def add_records(self, count: int):
+        pass
+
+    def add_bytes(self, count: int):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+def stage(name: str):
+    """Measure a block: `with stage('write outputs') as s: ...; s.add_records(n)`"""
+    return _Stage(name) if ENABLED else _NULL_STAGE
+
+
+def record_bytes(count: int):
+    """Add fetched bytes to the innermost running stage of this thread"""
+    active = _active()
+    if active:
+        active[-1].add_bytes(count)
+
+
+def record_count(count: int):
+    """Add a record count to the innermost running stage of this thread"""
+    active = _active()
+    if active:
+        active[-1].add_records(count)
+
+
+def instrument(name: Optional[str] = None) -> Callable:
+    """
+    Decorator that measures every call of a function as a stage. The length
+    of a list/dict result is recorded as its record count.
+    """
+    def decorator(func: Callable) -> Callable:
+        if not ENABLED:
+            return func
+        label = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with _Stage(label) as current:
+                result = func(*args, **kwargs)
+                if isinstance(result, (list, dict, tuple)) and current.records is None:
+                    current.add_records(len(result))
+                return result
+        return wrapper
+    return decorator
+
+
+def reset():
+    """Clear collected stages (a long-running process calls this before each run)"""
+    global _started_at, _started_wall
+    with _stats_lock:
+        _stats.clear()
+    _started_at = datetime.now()
+    _started_wall = time.perf_counter()
+
+
+def build_report(script: str, status: str = 'ok') -> Dict[str, Any]:
+    stages = []
+    with _stats_lock:
+        entries = list(_stats.values())
+    for entry in entries:
+        entry = dict(entry)
+        entry['wall_seconds'] = round(entry['wall_seconds'], 6)
+        entry['cpu_seconds'] = round(entry['cpu_seconds'], 6)
+        stages.append(entry)
+    return {
+        'script': script,
+        'status': status,
+        'started_at': _started_at.isoformat(timespec='seconds'),
+        'finished_at': datetime.now().isoformat(timespec='seconds'),
+        'wall_seconds': round(time.perf_counter() - _started_wall, 6),
+        'cpu_seconds': round(time.process_time(), 6),
+        'max_rss_kb': _max_rss_kb(),
+        'stages': stages,
+    }
+
+
+def write_run_report(script: str, status: str = 'ok', path: Optional[str] = None):
+    """Store this process's stages under `script` in the shared run report file"""
+    if not ENABLED:
+        return
+    path = path or os.environ.get('PIPELINE_REPORT', DEFAULT_REPORT_PATH)
+    report = {'runs': {}}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            existing = json.load(f)
+        if isinstance(existing.get('runs'), dict):
+            report = existing
+    except (OSError, ValueError):
+        pass
+    report['runs'][script] = build_report(script, status)
+    report['updated_at'] = datetime.now().isoformat(timespec='seconds')
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    write_json_atomic(path, report, indent=2, ensure_ascii=False)
+
+
+def run_main(main: Callable[[], Any], script: str) -> Any:
+    """Run a script's main(), optionally under cProfile, then write its run report"""
+    profile_target = os.environ.get('PIPELINE_PROFILE')
+    status = 'error'
+    try:
+        if profile_target:
+            profiler = cProfile.Profile()
+            try:
+                result = profiler.runcall(main)
+            finally:
+                directory = '.' if profile_target.lower() in ('1', 'true', 'yes') else profile_target
+                os.makedirs(directory, exist_ok=True)
+                profiler.dump_stats(os.path.join(directory, f"{script}.prof"))
+        else:
+            result = main()
+        status = 'ok'
+        return result
+    finally:
+        write_run_report(script, status)
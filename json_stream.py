@@ -0,0 +1,104 @@
+"""
+Streaming JSON writer for the large dashboard outputs.
+
+dump() writes the same bytes as json.dump(obj, f, indent=2, ensure_ascii=False),
+but any iterator in obj (a generator, map(), ...) is written as a JSON array
+element by element as it is consumed, so a payload like
+
+  {'matches': (format_match(r) for r in records)}
+
+never exists as a full list of dicts. Each element is encoded on its own, so
+peak memory is bounded by the largest element rather than by the dataset.
+Lists, tuples and dicts without iterators inside are encoded as usual.
+"""
+import json
+import os
+from collections.abc import Iterator
+from typing import Any, IO, Iterable
+
+INDENT = 2
+_ENCODER = json.JSONEncoder(indent=INDENT, ensure_ascii=False)
+
+
+def _key(key: Any) -> str:
+    """A dict key as json.dumps writes it"""
+    if isinstance(key, str):
+        return key
+    if key is True:
+        return 'true'
+    if key is False:
+        return 'false'
+    if key is None:
+        return 'null'
+    if isinstance(key, (int, float)):
+        return json.dumps(key)
+    raise TypeError(f"keys must be str, int, float, bool or None, not {type(key).__name__}")
+
+
+def _streams(value: Any) -> bool:
+    """Whether value holds an iterator that has to be written element by element"""
+    if isinstance(value, Iterator):
+        return True
+    if isinstance(value, dict):
+        return any(_streams(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return any(_streams(item) for item in value)
+    return False
+
+
+def _encode(value: Any, level: int) -> Iterable[str]:
+    if not _streams(value):
+        # Raw newlines only occur between tokens (strings escape theirs), so
+        # indenting every chunk's newlines nests the text one level deeper
+        pad = '\n' + ' ' * (INDENT * level)
+        for chunk in _ENCODER.iterencode(value):
+            yield chunk.replace('\n', pad) if level else chunk
+        return
+
+    inner = '\n' + ' ' * (INDENT * (level + 1))
+    if isinstance(value, dict):
+        yield '{'
+        separator = inner
+        for key, item in value.items():
+            yield separator + json.dumps(_key(key), ensure_ascii=False) + ': '
+            yield from _encode(item, level + 1)
+            separator = ',' + inner
+        yield '\n' + ' ' * (INDENT * level) + '}'
+        return
+
+    # A list, tuple or iterator: '[]' when it turns out to be empty, as json.dump writes it
+    separator = '[' + inner
+    for item in value:
+        yield separator
+        yield from _encode(item, level + 1)
+        separator = ',' + inner
+    yield '[]' if separator.startswith('[') else '\n' + ' ' * (INDENT * level) + ']'
+
+
+def iterencode(obj: Any) -> Iterable[str]:
+    """Chunks of the indented JSON text for obj"""
+    return _encode(obj, 0)
+
+
+def dump(obj: Any, f: IO[str]):
+    for chunk in iterencode(obj):
+        f.write(chunk)
+
+
+def write_json(filepath: str, obj: Any):
+    """
+    dump() obj to filepath, creating its directory. The text goes to a temporary
+    file that replaces filepath only once the iterators are exhausted, so a
+    generator failing halfway (e.g. a paged API call) leaves the old file intact.
+    """
+    directory = os.path.dirname(filepath)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = f"{filepath}.tmp"
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            dump(obj, f)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+    os.replace(temp_path, filepath)
@@ -0,0 +1,122 @@
+"""
+Kickoff-time buckets from boundary tables.
+
+A BucketTable is a sorted list of boundaries in minutes since midnight and
+one label per interval: labels[0] covers everything before boundaries[0],
+labels[i] covers boundaries[i-1] <= minutes < boundaries[i]. A single
+kickoff is bucketed with one bisect; a whole column of kickoffs is parsed
+once into an integer array (MISSING for unparseable values) and bucketed
+at once, with NumPy's searchsorted when it is installed.
+
+KICKOFF_TABLES holds the hour blocks used by the dashboard and finer
+half-hour and quarter-hour tables; KICKOFF_BUCKETS selects one by name.
+"""
+import os
+from array import array
+from bisect import bisect_right
+from typing import Iterable, List, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; the pure-Python paths are used instead
+    np = None
+
+MINUTES_PER_DAY = 24 * 60
+# Unparseable kickoff in a minutes array (no real kickoff is this far before midnight)
+MISSING = -(1 << 31)
+DEFAULT_TABLE = 'blocks'
+
+
+def parse_kickoff(kickoff: str) -> Optional[int]:
+    """Parse kickoff time 'HH:MM' to minutes since midnight"""
+    if not kickoff or not isinstance(kickoff, str):
+        return None
+    try:
+        parts = kickoff.split(':')
+        if len(parts) != 2:
+            return None
+        hours = int(parts[0])
+        minutes = int(parts[1])
+        return hours * 60 + minutes
+    except (ValueError, AttributeError):
+        return None
+
+
+def parse_kickoffs(kickoffs: Iterable[Optional[str]]) -> array:
+    """Minutes since midnight per kickoff string, MISSING where it does not parse"""
+    parsed = {}
+    minutes = array('l')
+    for kickoff in kickoffs:
+        # Kickoffs repeat a lot, so each distinct string is parsed once
+        value = parsed.get(kickoff) if isinstance(kickoff, str) else None
+        if value is None:
+            value = parse_kickoff(kickoff)
+            value = MISSING if value is None else value
+            if isinstance(kickoff, str):
+                parsed[kickoff] = value
+        minutes.append(value)
+    return minutes
+
+
+def _clock(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+class BucketTable:
+    """Interval labels over kickoff minutes, split at sorted boundaries"""
+
+    def __init__(self, name: str, boundaries: Sequence[int], labels: Sequence[str]):
+        if list(boundaries) != sorted(set(boundaries)):
+            raise ValueError(f"Bucket table {name!r}: boundaries must be strictly increasing")
+        if len(labels) != len(boundaries) + 1:
+            raise ValueError(f"Bucket table {name!r}: expected {len(boundaries) + 1} labels, got {len(labels)}")
+        self.name = name
+        self.boundaries = list(boundaries)
+        self.labels = list(labels)
+
+    @classmethod
+    def uniform(cls, name: str, step: int) -> 'BucketTable':
+        """Equal buckets of step minutes over the day, labelled 'HH:MM-HH:MM'"""
+        starts = list(range(0, MINUTES_PER_DAY, step))
+        labels = [f"{_clock(start)}-{_clock(min(start + step, MINUTES_PER_DAY) - 1)}" for start in starts]
+        return cls(name, starts[1:], labels)
+
+    def label(self, minutes: Optional[int]) -> Optional[str]:
+        """Bucket label for one kickoff (None when it is missing)"""
+        if minutes is None or minutes == MISSING:
+            return None
+        return self.labels[bisect_right(self.boundaries, minutes)]
+
+    def codes(self, minutes: Sequence[int]) -> array:
+        """Bucket index + 1 per kickoff, 0 where it is MISSING (see labels_for)"""
+        if np is not None and len(minutes):
+            values = np.asarray(minutes, dtype=np.int64)
+            codes = np.searchsorted(np.asarray(self.boundaries, dtype=np.int64), values, side='right') + 1
+            codes[values == MISSING] = 0
+            return array('H', codes.astype(np.uint16).tobytes())
+        boundaries = self.boundaries
+        return array('H', (0 if value == MISSING else bisect_right(boundaries, value) + 1 for value in minutes))
+
+    def labels_for(self, minutes: Sequence[int]) -> List[Optional[str]]:
+        """Bucket label per kickoff (None where it is MISSING)"""
+        lookup = [None] + self.labels
+        return [lookup[code] for code in self.codes(minutes)]
+
+
+KICKOFF_TABLES = {
+    'blocks': BucketTable(
+        'blocks',
+        [12 * 60, 15 * 60, 18 * 60, 20 * 60, 21 * 60],
+        ["Other", "12:00-14:59", "15:00-17:59", "18:00-19:59", "20:00-20:59", "21:00+"],
+    ),
+    'half_hour': BucketTable.uniform('half_hour', 30),
+    'quarter_hour': BucketTable.uniform('quarter_hour', 15),
+}
+
+
+def kickoff_table(name: Optional[str] = None) -> BucketTable:
+    """The named table (default: $KICKOFF_BUCKETS, else 'blocks')"""
+    name = name or os.environ.get('KICKOFF_BUCKETS') or DEFAULT_TABLE
+    if name not in KICKOFF_TABLES:
+        raise ValueError(f"Unknown kickoff bucket table {name!r} (expected {', '.join(KICKOFF_TABLES)})")
+    return KICKOFF_TABLES[name]
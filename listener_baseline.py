@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Rolling baseline of the daily listener series, kept up to date incrementally.
+
+api_data_full.json has one row per day; match days spike far above the
+listeners of the days around them. ListenerBaseline folds the non-match days
+into an exponentially weighted mean and variance (half-life HALFLIFE_DAYS)
+of log(1 + listeners), one day at a time in date order, so the state is a
+handful of numbers however long the history is, and a new day costs O(1).
+Quiet-day listeners are heavy-tailed (a podcast release can lift a day
+tenfold), and on the log scale such days pull the baseline far less than a
+plain mean would: the baseline follows the typical day, close to a rolling
+median. Each match day is measured against the baseline as it stood the day
+before:
+
+  listeners_over_baseline = listeners - baseline   (None without either)
+
+The series before the first match (the podcast's pre-launch zeros) and the
+day after each match, which still carries part of the match's listeners,
+are left out of the baseline. Once WARMUP_DAYS days are folded in, a day further
+than CLIP_SIGMAS standard deviations (at least MIN_LOG_STD) from the
+baseline on the log scale is recorded as an anomaly (the last MAX_ANOMALIES
+are kept) and folded in clipped, so a single odd day barely moves the
+baseline. SHIFT_DAYS such days in a row on the same side are a change of
+level and are folded in as they are.
+
+The state is persisted in listener_baseline.json. A run only folds in the
+days after the last one it saw; it starts over when the match dates it has
+already passed changed (a match added to or removed from the sheet). Listener
+counts revised for days already folded in are picked up with --rebuild:
+
+  python3 listener_baseline.py [--rebuild]
+"""
+import argparse
+import json
+import math
+from datetime import date as date_cls, timedelta
+from typing import Any, Collection, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from instrumentation import run_main, stage
+from listener_index import ListenerIndex
+from matchday_snapshot import load_merged_records
+from pipeline_state import write_json_atomic
+
+BASELINE_FILE = 'listener_baseline.json'
+STATE_VERSION = 2
+HALFLIFE_DAYS = 14
+WARMUP_DAYS = 7
+CLIP_SIGMAS = 3.0
+MIN_LOG_STD = 0.25
+SHIFT_DAYS = 3
+MAX_ANOMALIES = 50
+
+
+def listeners_over_baseline(listeners: Optional[int], baseline: Optional[float]) -> Optional[int]:
+    """Listeners above the baseline (negative when below), None when either is unknown"""
+    if listeners is None or baseline is None:
+        return None
+    return int(round(listeners - baseline))
+
+
+def _previous_day(day: str) -> str:
+    return (date_cls.fromisoformat(day) - timedelta(days=1)).isoformat()
+
+
+def _days_after(listeners: Mapping[str, int], after: Optional[str]) -> Iterable[Tuple[str, int]]:
+    """(date, listeners) for every day after `after`, in date order"""
+    if isinstance(listeners, ListenerIndex):  # only the new rows are read
+        start = (date_cls.fromisoformat(after) + timedelta(days=1)).isoformat() if after else '0001-01-01'
+        return listeners.range(start, '9999-12-31')
+    return sorted((day, value) for day, value in listeners.items() if after is None or day > after)
+
+
+class ListenerBaseline:
+    """Exponentially weighted mean and variance of log(1 + listeners) on non-match days"""
+
+    def __init__(self, halflife_days: float = HALFLIFE_DAYS):
+        self.halflife_days = halflife_days
+        self.alpha = 1 - 0.5 ** (1 / halflife_days)
+        self.reset()
+
+    def reset(self):
+        self.last_date: Optional[str] = None
+        self.mean: Optional[float] = None  # of log1p(listeners)
+        self.var = 0.0
+        self.days = 0
+        self.outlier_run = 0  # clipped days in a row, negative when below the baseline
+        self.match_baselines: Dict[str, Optional[float]] = {}
+        self.anomalies: List[Dict[str, Any]] = []
+
+    @property
+    def baseline(self) -> Optional[float]:
+        """Current baseline, None until WARMUP_DAYS non-match days are folded in"""
+        return math.expm1(self.mean) if self.days >= WARMUP_DAYS else None
+
+    def update(self, day: str, listeners: int, match_day: bool) -> Optional[float]:
+        """Fold in the day after last_date; returns the baseline it is measured against"""
+        if self.last_date is not None and day <= self.last_date:
+            raise ValueError(f"Day {day} is not after {self.last_date}")
+        baseline = self.baseline
+        self.last_date = day
+        if match_day:
+            self.match_baselines[day] = baseline
+            return baseline
+        if _previous_day(day) in self.match_baselines:
+            return baseline
+        value = math.log1p(max(listeners, 0))
+        if self.mean is None:
+            self.mean = value
+            self.days = 1
+            return baseline
+
+        deviation = value - self.mean
+        if baseline is not None:
+            limit = CLIP_SIGMAS * max(math.sqrt(self.var), MIN_LOG_STD)
+            if abs(deviation) <= limit:
+                self.outlier_run = 0
+            else:
+                side = 1 if deviation > 0 else -1
+                self.outlier_run = self.outlier_run + side if self.outlier_run * side > 0 else side
+                if abs(self.outlier_run) < SHIFT_DAYS:
+                    self.anomalies.append({'date': day, 'listeners': listeners, 'baseline': round(baseline, 1)})
+                    del self.anomalies[:-MAX_ANOMALIES]
+                    deviation = side * limit
+        increment = self.alpha * deviation
+        self.mean += increment
+        self.var = (1 - self.alpha) * (self.var + deviation * increment)
+        self.days += 1
+        return baseline
+
+    def is_stale(self, listeners: Mapping[str, int], match_dates: Collection[str]) -> bool:
+        """Whether the match days already folded in differ from match_dates"""
+        if self.last_date is None:
+            return False
+        if any(day not in match_dates for day in self.match_baselines):
+            return True
+        return any(day <= self.last_date and day not in self.match_baselines and listeners.get(day) is not None
+                   for day in match_dates)
+
+    def extend(self, listeners: Mapping[str, int], match_dates: Collection[str]) -> int:
+        """Fold in the days after last_date (all of them when stale) from the first match on; returns how many"""
+        if self.is_stale(listeners, match_dates):
+            self.reset()
+        if not match_dates:
+            return 0
+        first_match = min(match_dates)
+        added = 0
+        for day, value in _days_after(listeners, self.last_date):
+            if day < first_match:
+                continue
+            self.update(day, value, day in match_dates)
+            added += 1
+        return added
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'version': STATE_VERSION,
+            'halflife_days': self.halflife_days,
+            'last_date': self.last_date,
+            'mean': self.mean,
+            'var': self.var,
+            'days': self.days,
+            'outlier_run': self.outlier_run,
+            'match_baselines': self.match_baselines,
+            'anomalies': self.anomalies,
+        }
+
+    @classmethod
+    def from_dict(cls, payload: Dict[str, Any], halflife_days: float = HALFLIFE_DAYS) -> 'ListenerBaseline':
+        baseline = cls(halflife_days)
+        if payload.get('version') != STATE_VERSION or payload.get('halflife_days') != halflife_days:
+            return baseline  # different format or smoothing: start over
+        baseline.last_date = payload.get('last_date')
+        baseline.mean = payload.get('mean')
+        baseline.var = payload.get('var', 0.0)
+        baseline.days = payload.get('days', 0)
+        baseline.outlier_run = payload.get('outlier_run', 0)
+        baseline.match_baselines = payload.get('match_baselines', {})
+        baseline.anomalies = payload.get('anomalies', [])
+        return baseline
+
+    @classmethod
+    def load(cls, path: str = BASELINE_FILE) -> 'ListenerBaseline':
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return cls.from_dict(json.load(f))
+        except (OSError, ValueError):
+            return cls()
+
+    def save(self, path: str = BASELINE_FILE):
+        write_json_atomic(path, self.to_dict(), indent=2)
+
+
+def main():
+    from merge_data import load_api_data
+
+    parser = argparse.ArgumentParser(description="Update the rolling listener baseline")
+    parser.add_argument('--rebuild', action='store_true', help="fold in the whole history again")
+    args = parser.parse_args()
+
+    listeners = load_api_data()
+    match_dates = {record['date'] for record in load_merged_records('merged_matchdays.json')}
+    baseline = ListenerBaseline() if args.rebuild else ListenerBaseline.load()
+    with stage('listener baseline') as s:
+        added = baseline.extend(listeners, match_dates)
+        s.add_records(added)
+    baseline.save()
+
+    current = baseline.baseline
+    print(f"✓ Folded in {added} day(s) up to {baseline.last_date}; baseline: "
+          + (f"{current:.0f} listeners" if current is not None else "not enough non-match days yet"))
+    excess = []
+    for day, value in baseline.match_baselines.items():
+        over = listeners_over_baseline(listeners.get(day), value)
+        if over is not None:
+            excess.append((over, day))
+    excess.sort(reverse=True)
+    print("\nLargest match-day excess:")
+    for over, day in excess[:5]:
+        print(f"  {day}  {over:+d}")
+    if baseline.anomalies:
+        print(f"\nRecent non-match-day anomalies ({len(baseline.anomalies)}):")
+        for anomaly in baseline.anomalies[-5:]:
+            print(f"  {anomaly['date']}  {anomaly['listeners']} vs baseline {anomaly['baseline']:g}")
+
+
+if __name__ == '__main__':
+    run_main(main, 'listener_baseline')
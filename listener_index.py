@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Memory-mapped, date-indexed daily listener file.
+
+Layout (little-endian, version 1):
+  header      magic b'AJLI', version u16, flags u16, count u32,
+              first ordinal i32, last ordinal i32
+  ordinals    i32[count], sorted day ordinals (date.toordinal())
+  listeners   i32[count]
+
+Lookups are O(1) when the history has no gaps (ordinal - first ordinal is
+the row) and a binary search otherwise. Only the rows that are looked up are
+touched, so merge_data reads just the days it needs.
+
+Build it from api_data_full.json with: python3 listener_index.py
+"""
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping
+from datetime import date as date_cls
+from typing import Dict, Iterator, Optional, Tuple
+
+from pipeline_state import atomic_write
+
+MAGIC = b'AJLI'
+INDEX_VERSION = 1
+HEADER = struct.Struct('<4sHHIii')
+FLAG_DENSE = 1
+
+DEFAULT_INDEX_PATH = 'api_data_full.idx'
+
+
+def index_path_for(json_path: str) -> str:
+    """api_data_full.json -> api_data_full.idx"""
+    base, _ = os.path.splitext(json_path)
+    return base + '.idx'
+
+
+def _ordinal(date_str: str) -> int:
+    return date_cls.fromisoformat(date_str[:10]).toordinal()
+
+
+def _le_bytes(values: array) -> bytes:
+    if sys.byteorder != 'little':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def write_listener_index(date_listeners: Dict[str, int], path: str = DEFAULT_INDEX_PATH) -> int:
+    """Write a date -> listeners mapping as an index file; returns the row count"""
+    rows = sorted((_ordinal(date_str), int(listeners)) for date_str, listeners in date_listeners.items())
+    ordinals = array('i', (ordinal for ordinal, _ in rows))
+    listeners = array('i', (value for _, value in rows))
+    first = ordinals[0] if rows else 0
+    last = ordinals[-1] if rows else -1
+    flags = FLAG_DENSE if last - first + 1 == len(rows) else 0
+    with atomic_write(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, INDEX_VERSION, flags, len(rows), first, last))
+        f.write(_le_bytes(ordinals))
+        f.write(_le_bytes(listeners))
+    return len(rows)
+
+
+class ListenerIndex(Mapping):
+    """
+    Read-only view over an index file: a Mapping of 'YYYY-MM-DD' -> listeners,
+    like the Dict[str, int] that merge_data.load_api_data returns, iterated
+    in date order.
+    """
+
+    def __init__(self, path: str = DEFAULT_INDEX_PATH):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            self._file.close()
+            raise ValueError(f"{path} is not a listener index")
+
+        magic, version, flags, count, first, last = HEADER.unpack_from(self._buffer, 0)
+        if magic != MAGIC or version != INDEX_VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a version {INDEX_VERSION} listener index")
+        self.count = count
+        self.first_ordinal = first
+        self.last_ordinal = last
+        self.dense = bool(flags & FLAG_DENSE)
+
+        view = memoryview(self._buffer)
+        ordinals_start = HEADER.size
+        listeners_start = ordinals_start + count * 4
+        self._ordinals = self._column(view, ordinals_start, count)
+        self._listeners = self._column(view, listeners_start, count)
+        view.release()
+
+    @staticmethod
+    def _column(view: memoryview, offset: int, length: int):
+        chunk = view[offset:offset + length * 4]
+        if sys.byteorder == 'little':
+            return chunk.cast('i')
+        values = array('i', chunk.tobytes())
+        values.byteswap()
+        return values
+
+    def _position(self, ordinal: int) -> Optional[int]:
+        if not self.count or ordinal < self.first_ordinal or ordinal > self.last_ordinal:
+            return None
+        if self.dense:
+            return ordinal - self.first_ordinal
+        position = bisect_left(self._ordinals, ordinal)
+        if position < self.count and self._ordinals[position] == ordinal:
+            return position
+        return None
+
+    def get(self, date_str: str, default: Optional[int] = None) -> Optional[int]:
+        """Listeners for 'YYYY-MM-DD' (a 'T00:00:00' suffix is ignored)"""
+        try:
+            position = self._position(_ordinal(date_str))
+        except (ValueError, TypeError):
+            return default
+        if position is None:
+            return default
+        return self._listeners[position]
+
+    def __getitem__(self, date_str: str) -> int:
+        value = self.get(date_str)
+        if value is None:
+            raise KeyError(date_str)
+        return value
+
+    def __contains__(self, date_str: object) -> bool:
+        return isinstance(date_str, str) and self.get(date_str) is not None
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __iter__(self) -> Iterator[str]:
+        for ordinal in self._ordinals:
+            yield date_cls.fromordinal(ordinal).isoformat()
+
+    def range(self, date_from: str, date_to: str) -> Iterator[Tuple[str, int]]:
+        """Yield (date, listeners) for every stored day in [date_from, date_to]"""
+        low = _ordinal(date_from)
+        high = _ordinal(date_to)
+        if self.dense:
+            start = max(low - self.first_ordinal, 0)
+            end = min(high - self.first_ordinal + 1, self.count)
+        else:
+            start = bisect_left(self._ordinals, low)
+            end = bisect_left(self._ordinals, high + 1)
+        for position in range(start, end):
+            yield date_cls.fromordinal(self._ordinals[position]).isoformat(), self._listeners[position]
+
+    def season(self, start_year: int) -> Iterator[Tuple[str, int]]:
+        """Days of the season starting in July of start_year (e.g. 2024 -> 2024/2025)"""
+        return self.range(f"{start_year}-07-01", f"{start_year + 1}-06-30")
+
+    def close(self):
+        self._ordinals = None
+        self._listeners = None
+        self._buffer.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_listener_index(json_path: str) -> Optional[ListenerIndex]:
+    """Open the index next to json_path if it is at least as new as the JSON file"""
+    path = index_path_for(json_path)
+    try:
+        if os.path.getmtime(path) < os.path.getmtime(json_path):
+            return None
+        return ListenerIndex(path)
+    except (OSError, ValueError):
+        return None
+
+
+def main():
+    from merge_data import load_api_data
+
+    json_path = sys.argv[1] if len(sys.argv) > 1 else 'api_data_full.json'
+    date_listeners = load_api_data(json_path)
+    if not date_listeners:
+        print(f"No listener data found in {json_path}")
+        return
+    path = index_path_for(json_path)
+    count = write_listener_index(date_listeners, path)
+    print(f"✓ Wrote {count} days to {path}")
+
+
+if __name__ == '__main__':
+    main()
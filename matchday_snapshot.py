@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+Compact binary snapshot format for merged_matchdays.json.
+
+Layout (little-endian, version 4):
+  header      magic b'AJMD', version u16, flags u16, record count u32,
+              string count u32, string bytes u32, commentator refs u32
+  strings     u32 offsets[string count + 1], UTF-8 bytes (padded to 4)
+  columns     one fixed-width column per field, `record count` entries each
+  refs        u32 string codes of all commentators, sliced by commentator_start
+
+All strings (commentators, competitions, channels, match names, ...) are
+interned in one table; string code 0 means None. The `present` column has
+one bit per OPTIONAL_FIELDS entry the record carries, and rows decode with
+only those optional keys, so a record without listeners_over_baseline comes
+back without it and the export matches the input. The opponent columns hold
+what analyze_matchdays.add_opponent_positions stamps on the records, so the
+annotated records can be snapshotted for the analysis workers too. Records with a field
+outside RECORD_FIELDS are not encoded (encode_snapshot raises ValueError),
+so the snapshot never drops data silently. The file is memory-mapped
+and rows are decoded on access. JSON stays the human/git-diff format;
+export it with: python3 matchday_snapshot.py export merged_matchdays.bin out.json
+"""
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from datetime import date as date_cls
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from pipeline_state import atomic_write
+
+MAGIC = b'AJMD'
+SNAPSHOT_VERSION = 4
+HEADER = struct.Struct('<4sHHIIII')
+
+NULL_LISTENERS = -1
+# listeners_over_baseline can be negative, so its None is the smallest int32
+NULL_OVER_BASELINE = -(1 << 31)
+NULL_POSITION = -1
+
+# (field, typecode) in file order; 'i' columns hold numbers, 'I' columns string codes
+COLUMNS = [
+    ('date', 'i'),
+    ('listeners', 'i'),
+    ('listeners_over_baseline', 'i'),
+    ('kickoff', 'I'),
+    ('competition', 'I'),
+    ('tv_channel', 'I'),
+    ('match_name', 'I'),
+    ('home_away', 'I'),
+    ('score', 'I'),
+    ('result', 'I'),
+    ('opponent', 'I'),
+    ('opponent_position', 'i'),
+    ('commentator_start', 'I'),
+    ('present', 'I'),
+]
+
+_STRING_FIELDS = ['kickoff', 'competition', 'tv_channel', 'match_name', 'home_away', 'score', 'result', 'opponent']
+
+# Keys a record may lack (older merges have no baseline, only analysed records an opponent);
+# bit i of `present` is OPTIONAL_FIELDS[i]
+OPTIONAL_FIELDS = ['listeners_over_baseline', 'opponent', 'opponent_position']
+ALL_PRESENT = (1 << len(OPTIONAL_FIELDS)) - 1
+
+# Every key a record may have: the columns plus the commentator list
+RECORD_FIELDS = frozenset(name for name, _ in COLUMNS if name not in ('commentator_start', 'present')) | {'commentators'}
+
+
+def snapshot_path_for(json_path: str) -> str:
+    """merged_matchdays.json -> merged_matchdays.bin"""
+    base, _ = os.path.splitext(json_path)
+    return base + '.bin'
+
+
+def _pad4(data: bytes) -> bytes:
+    return data + b'\0' * (-len(data) % 4)
+
+
+def _drop_absent(record: Dict[str, Any], present: int) -> Dict[str, Any]:
+    for bit, name in enumerate(OPTIONAL_FIELDS):
+        if not present & (1 << bit):
+            del record[name]
+    return record
+
+
+def _le_bytes(values: array) -> bytes:
+    if sys.byteorder != 'little':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def encode_snapshot(records: Sequence[Dict[str, Any]]) -> bytes:
+    """Encode merged matchday records into snapshot bytes; ValueError when a record has a field outside the schema"""
+    strings: List[str] = []
+    codes: Dict[str, int] = {}
+
+    def intern(value: Optional[str]) -> int:
+        if value is None:
+            return 0
+        value = str(value)
+        code = codes.get(value)
+        if code is None:
+            strings.append(value)
+            code = len(strings)
+            codes[value] = code
+        return code
+
+    columns = {name: array(typecode) for name, typecode in COLUMNS}
+    refs = array('I')
+
+    for record in records:
+        unknown = record.keys() - RECORD_FIELDS
+        if unknown:
+            raise ValueError(f"Record {record.get('date')} has fields the snapshot cannot hold: "
+                             f"{', '.join(sorted(unknown))}")
+        columns['date'].append(date_cls.fromisoformat(record['date']).toordinal())
+        listeners = record.get('listeners')
+        columns['listeners'].append(NULL_LISTENERS if listeners is None else int(listeners))
+        over_baseline = record.get('listeners_over_baseline')
+        columns['listeners_over_baseline'].append(NULL_OVER_BASELINE if over_baseline is None else int(over_baseline))
+        position = record.get('opponent_position')
+        columns['opponent_position'].append(NULL_POSITION if position is None else int(position))
+        for name in _STRING_FIELDS:
+            columns[name].append(intern(record.get(name)))
+        columns['commentator_start'].append(len(refs))
+        columns['present'].append(sum(1 << bit for bit, name in enumerate(OPTIONAL_FIELDS) if name in record))
+        for commentator in record.get('commentators') or []:
+            refs.append(intern(commentator))
+
+    encoded = [s.encode('utf-8') for s in strings]
+    offsets = array('I', [0])
+    for chunk in encoded:
+        offsets.append(offsets[-1] + len(chunk))
+    string_bytes = b''.join(encoded)
+
+    parts = [
+        HEADER.pack(MAGIC, SNAPSHOT_VERSION, 0, len(records), len(strings), len(string_bytes), len(refs)),
+        _le_bytes(offsets),
+        _pad4(string_bytes),
+    ]
+    parts.extend(_le_bytes(columns[name]) for name, _ in COLUMNS)
+    parts.append(_le_bytes(refs))
+    return b''.join(parts)
+
+
+def write_snapshot(records: Sequence[Dict[str, Any]], path: str) -> int:
+    """
+    Write records as a snapshot file; returns the number of bytes written.
+    Records the snapshot cannot hold are not written: any older snapshot at
+    path is removed, so readers fall back to the JSON file, and 0 is returned.
+    """
+    try:
+        data = encode_snapshot(records)
+    except ValueError as e:
+        print(f"⚠ Skipping binary snapshot {path}: {e}")
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        return 0
+    with atomic_write(path, 'wb') as f:
+        f.write(data)
+    return len(data)
+
+
+class MatchdaySnapshot:
+    """Memory-mapped, lazily decoded view over a snapshot file"""
+
+    def __init__(self, path: str):
+        self._file = open(path, 'rb')
+        try:
+            self._buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            self._file.close()
+            raise ValueError(f"{path} is not a matchday snapshot")
+        self._load(memoryview(self._buffer), path)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'MatchdaySnapshot':
+        """View over snapshot bytes already in memory (e.g. handed to a worker process)"""
+        snapshot = cls.__new__(cls)
+        snapshot._file = None
+        snapshot._buffer = None
+        snapshot._load(memoryview(data), '<bytes>')
+        return snapshot
+
+    def _load(self, view: memoryview, label: str):
+        self._view = view
+        magic, version, _flags, count, string_count, string_bytes, ref_count = HEADER.unpack_from(self._view, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{label} is not a matchday snapshot")
+        if version != SNAPSHOT_VERSION:
+            self.close()
+            raise ValueError(f"Unsupported snapshot version {version} (expected {SNAPSHOT_VERSION})")
+        self.version = version
+        self.count = count
+
+        offset = HEADER.size
+        self._string_offsets = self._column('I', offset, string_count + 1)
+        offset += (string_count + 1) * 4
+        self._string_data = self._view[offset:offset + string_bytes]
+        offset += string_bytes + (-string_bytes % 4)
+
+        self._columns = {}
+        for name, typecode in COLUMNS:
+            self._columns[name] = self._column(typecode, offset, count)
+            offset += count * 4
+        self._refs = self._column('I', offset, ref_count)
+        self._strings: List[Optional[str]] = [None] * (string_count + 1)
+
+    def _column(self, typecode: str, offset: int, length: int):
+        chunk = self._view[offset:offset + length * 4]
+        if sys.byteorder == 'little':
+            return chunk.cast(typecode)
+        values = array(typecode, chunk.tobytes())
+        values.byteswap()
+        return values
+
+    def string(self, code: int) -> Optional[str]:
+        if code == 0:
+            return None
+        value = self._strings[code]
+        if value is None:
+            start = self._string_offsets[code - 1]
+            end = self._string_offsets[code]
+            value = bytes(self._string_data[start:end]).decode('utf-8')
+            self._strings[code] = value
+        return value
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, index: int) -> Dict[str, Any]:
+        """Decode one row; keys follow the record layout of merge_data.merge_data"""
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        columns = self._columns
+        listeners = columns['listeners'][index]
+        over_baseline = columns['listeners_over_baseline'][index]
+        position = columns['opponent_position'][index]
+        start = columns['commentator_start'][index]
+        end = columns['commentator_start'][index + 1] if index + 1 < self.count else len(self._refs)
+        record = {
+            'date': date_cls.fromordinal(columns['date'][index]).isoformat(),
+            'listeners': None if listeners == NULL_LISTENERS else listeners,
+            'listeners_over_baseline': None if over_baseline == NULL_OVER_BASELINE else over_baseline,
+            'kickoff': self.string(columns['kickoff'][index]),
+            'competition': self.string(columns['competition'][index]),
+            'commentators': [self.string(code) for code in self._refs[start:end]],
+            'tv_channel': self.string(columns['tv_channel'][index]),
+            'match_name': self.string(columns['match_name'][index]),
+            'home_away': self.string(columns['home_away'][index]),
+            'score': self.string(columns['score'][index]),
+            'result': self.string(columns['result'][index]),
+            'opponent': self.string(columns['opponent'][index]),
+            'opponent_position': None if position == NULL_POSITION else position,
+        }
+        present = columns['present'][index]
+        return record if present == ALL_PRESENT else _drop_absent(record, present)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for index in range(self.count):
+            yield self[index]
+
+    def records(self) -> List[Dict[str, Any]]:
+        """Decode every row at once (bulk path: strings and columns converted in one go)"""
+        offsets = self._string_offsets.tolist()
+        data = bytes(self._string_data)
+        strings = [None] + [data[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(len(offsets) - 1)]
+        columns = {name: column.tolist() for name, column in self._columns.items()}
+        refs = [strings[code] for code in self._refs.tolist()]
+        starts = columns['commentator_start'] + [len(refs)]
+        fromordinal = date_cls.fromordinal
+        records = [
+            {
+                'date': fromordinal(ordinal).isoformat(),
+                'listeners': None if listeners == NULL_LISTENERS else listeners,
+                'listeners_over_baseline': None if over_baseline == NULL_OVER_BASELINE else over_baseline,
+                'kickoff': strings[kickoff],
+                'competition': strings[competition],
+                'commentators': refs[starts[i]:starts[i + 1]],
+                'tv_channel': strings[tv_channel],
+                'match_name': strings[match_name],
+                'home_away': strings[home_away],
+                'score': strings[score],
+                'result': strings[result],
+                'opponent': strings[opponent],
+                'opponent_position': None if position == NULL_POSITION else position,
+            }
+            for i, (ordinal, listeners, over_baseline, kickoff, competition, tv_channel, match_name, home_away,
+                    score, result, opponent, position)
+            in enumerate(zip(columns['date'], columns['listeners'], columns['listeners_over_baseline'],
+                             columns['kickoff'],
+                             columns['competition'], columns['tv_channel'], columns['match_name'],
+                             columns['home_away'], columns['score'], columns['result'],
+                             columns['opponent'], columns['opponent_position']))
+        ]
+        for record, present in zip(records, columns['present']):
+            if present != ALL_PRESENT:
+                _drop_absent(record, present)
+        return records
+
+    def close(self):
+        for name in ('_columns', '_refs', '_string_offsets', '_string_data'):
+            if hasattr(self, name):
+                delattr(self, name)
+        self._view.release()
+        if self._buffer is not None:
+            self._buffer.close()
+        if self._file is not None:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def load_snapshot(path: str) -> List[Dict[str, Any]]:
+    """Decode every record of a snapshot file"""
+    with MatchdaySnapshot(path) as snapshot:
+        return snapshot.records()
+
+
+def decode_snapshot(data: bytes) -> List[Dict[str, Any]]:
+    """Decode every record of in-memory snapshot bytes"""
+    with MatchdaySnapshot.from_bytes(data) as snapshot:
+        return snapshot.records()
+
+
+def load_merged_records(json_path: str) -> List[Dict[str, Any]]:
+    """
+    Load merged matchdays, preferring the binary snapshot next to json_path
+    when it is at least as new as the JSON file.
+    """
+    snapshot_path = snapshot_path_for(json_path)
+    try:
+        if os.path.getmtime(snapshot_path) >= os.path.getmtime(json_path):
+            return load_snapshot(snapshot_path)
+    except (OSError, ValueError):
+        pass
+    with open(json_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def export_json(snapshot_path: str, json_path: str):
+    """Write a snapshot back out as indented JSON (same layout as merge_data.py)"""
+    records = load_snapshot(snapshot_path)
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(records, f, indent=2, ensure_ascii=False)
+    return len(records)
+
+
+def main():
+    usage = ("Usage:\n"
+             "  python3 matchday_snapshot.py build [merged_matchdays.json]\n"
+             "  python3 matchday_snapshot.py export <snapshot.bin> <output.json>")
+    if len(sys.argv) < 2 or sys.argv[1] not in ('build', 'export'):
+        print(usage)
+        return
+
+    if sys.argv[1] == 'build':
+        json_path = sys.argv[2] if len(sys.argv) > 2 else 'merged_matchdays.json'
+        with open(json_path, 'r', encoding='utf-8') as f:
+            records = json.load(f)
+        snapshot_path = snapshot_path_for(json_path)
+        size = write_snapshot(records, snapshot_path)
+        if size:
+            print(f"✓ Wrote {len(records)} records to {snapshot_path} ({size} bytes)")
+    else:
+        if len(sys.argv) < 4:
+            print(usage)
+            return
+        count = export_json(sys.argv[2], sys.argv[3])
+        print(f"✓ Exported {count} records to {sys.argv[3]}")
+
+
+if __name__ == '__main__':
+    main()
@@ -7,11 +7,18 @@ import json
 import os
 import re
 from datetime import datetime
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Mapping, Optional, Tuple
 
 import requests
 
+import json_stream
+from instrumentation import instrument, record_bytes, run_main, stage
+from listener_baseline import ListenerBaseline, listeners_over_baseline
+from listener_index import ListenerIndex, index_path_for, open_listener_index, write_listener_index
+from matchday_snapshot import snapshot_path_for, write_snapshot
 
+
+@instrument()
 def load_api_data(filepath: str = 'api_data_full.json') -> Dict[str, int]:
     """Load API data and create date -> listeners mapping"""
     date_listeners = {}
@@ -68,12 +75,14 @@ def load_api_data(filepath: str = 'api_data_full.json') -> Dict[str, int]:
         return {}
 
 
+@instrument()
 def fetch_fresh_api_data() -> Dict[str, int]:
     """Fetch fresh data from API if sample file doesn't exist"""
     try:
         from explore_api import fetch_api_data, parse_html_data
         print("Fetching fresh API data...")
         html = fetch_api_data('http://ajaxradio.westeurope.azurecontainer.io/all_shows/')
+        record_bytes(len(html))
         data = parse_html_data(html)
         
         date_listeners = {}
@@ -98,6 +107,7 @@ def fetch_fresh_api_data() -> Dict[str, int]:
         return {}
 
 
+@instrument()
 def load_sheet_data(filepath: str = 'google_sheet_data.json') -> List[Dict[str, Any]]:
     """Load Google Sheets data"""
     try:
@@ -283,6 +293,21 @@ def extract_opponent(match_name: Optional[str]) -> Optional[str]:
     return None
 
 
+def normalize_score(uitslag: Optional[str]) -> Optional[str]:
+    """Sheet score with dash variants and encoding artifacts turned into a single '-'"""
+    # Fix encoding issue: replace en-dash/em-dash and encoding artifacts with regular dash
+    if uitslag:
+        # Handle various dash characters and encoding issues
+        uitslag = uitslag.replace('–', '-').replace('—', '-')
+        # Fix Unicode en-dash and em-dash
+        uitslag = uitslag.replace('\u2013', '-').replace('\u2014', '-')
+        # Fix the specific 'â' encoding issue - replace any non-digit, non-dash character with dash
+        uitslag = re.sub(r'[^\d\-]', '-', uitslag)
+        # Clean up multiple dashes
+        uitslag = re.sub(r'-+', '-', uitslag)
+    return uitslag
+
+
 def determine_result(score: str, home_away: str, match_name: str) -> Optional[str]:
     if not score:
         return None
@@ -314,12 +339,14 @@ def determine_result(score: str, home_away: str, match_name: str) -> Optional[st
         return None
 
 
+@instrument()
 def fetch_ajax_team_id(token: str) -> Optional[int]:
     url = "https://api.football-data.org/v4/teams?name=Ajax"
     headers = {"X-Auth-Token": token}
     try:
         response = requests.get(url, headers=headers, timeout=20)
         response.raise_for_status()
+        record_bytes(len(response.content))
         payload = response.json()
     except (requests.RequestException, ValueError):
         return None
@@ -336,6 +363,7 @@ def fetch_ajax_team_id(token: str) -> Optional[int]:
     return None
 
 
+@instrument()
 def fetch_ajax_match_results(date_from: str, date_to: str) -> Dict[Tuple[str, str], str]:
     token = os.environ.get("FOOTBALL_DATA_TOKEN")
     if not token:
@@ -358,6 +386,7 @@ def fetch_ajax_match_results(date_from: str, date_to: str) -> Dict[Tuple[str, st
     try:
         response = requests.get(url, headers=headers, params=params, timeout=20)
         response.raise_for_status()
+        record_bytes(len(response.content))
         payload = response.json()
     except (requests.RequestException, ValueError) as exc:
         print(f"  Warning: failed to fetch match results ({exc})")
@@ -394,14 +423,27 @@ def fetch_ajax_match_results(date_from: str, date_to: str) -> Dict[Tuple[str, st
     return results
 
 
-def merge_data(api_data: Dict[str, int], sheet_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """Merge API and sheet data by date, with deduplication"""
+def sheet_date_range(sheet_data: List[Dict[str, Any]]) -> Tuple[Optional[str], Optional[str]]:
+    """First and last date present in the sheet records"""
+    dates = [r.get('date', '') for r in sheet_data if r.get('date')]
+    return (min(dates), max(dates)) if dates else (None, None)
+
+
+@instrument()
+def merge_data(api_data: Mapping[str, int], sheet_data: List[Dict[str, Any]],
+               results_map: Optional[Dict[Tuple[str, str], str]] = None,
+               baseline: Optional[ListenerBaseline] = None) -> List[Dict[str, Any]]:
+    """
+    Merge API and sheet data by date, with deduplication.
+    results_map ((date, opponent) -> score) is fetched from football-data.org when not given.
+    baseline is brought up to date with api_data for listeners_over_baseline; a
+    fresh one (folding in the whole history) is used when not given.
+    """
     merged = []
     seen_matches = set()  # Track duplicates by (date, match_name)
-    dates = [r.get('date', '') for r in sheet_data if r.get('date')]
-    date_from = min(dates) if dates else None
-    date_to = max(dates) if dates else None
-    results_map = fetch_ajax_match_results(date_from, date_to) if date_from and date_to else {}
+    if results_map is None:
+        date_from, date_to = sheet_date_range(sheet_data)
+        results_map = fetch_ajax_match_results(date_from, date_to) if date_from and date_to else {}
     
     for sheet_record in sheet_data:
         date = sheet_record.get('date', '')
@@ -452,18 +494,7 @@ def merge_data(api_data: Dict[str, int], sheet_data: List[Dict[str, Any]]) -> Li
         home_away = sheet_record.get('home_away', '')
         
         # Extract score and result from sheet
-        uitslag = sheet_record.get('uitslag', '')
-        # Fix encoding issue: replace en-dash/em-dash and encoding artifacts with regular dash
-        if uitslag:
-            import re
-            # Handle various dash characters and encoding issues
-            uitslag = uitslag.replace('–', '-').replace('—', '-')
-            # Fix Unicode en-dash and em-dash
-            uitslag = uitslag.replace('\u2013', '-').replace('\u2014', '-')
-            # Fix the specific 'â' encoding issue - replace any non-digit, non-dash character with dash
-            uitslag = re.sub(r'[^\d\-]', '-', uitslag)
-            # Clean up multiple dashes
-            uitslag = re.sub(r'-+', '-', uitslag)
+        uitslag = normalize_score(sheet_record.get('uitslag', ''))
         result = sheet_record.get('result', '')
 
         # Fill missing scores/results from football-data.org for Ajax matches
@@ -480,6 +511,7 @@ def merge_data(api_data: Dict[str, int], sheet_data: List[Dict[str, Any]]) -> Li
         merged_record = {
             'date': date_key,
             'listeners': listeners,
+            'listeners_over_baseline': None,
             'kickoff': kickoff,
             'competition': competition,
             'commentators': commentators,
@@ -494,6 +526,14 @@ def merge_data(api_data: Dict[str, int], sheet_data: List[Dict[str, Any]]) -> Li
     
     # Sort by date
     merged.sort(key=lambda x: x['date'])
+
+    # Match-day listeners above the rolling baseline of the days without a match
+    if baseline is None:
+        baseline = ListenerBaseline()
+    baseline.extend(api_data, {record['date'] for record in merged})
+    for record in merged:
+        record['listeners_over_baseline'] = listeners_over_baseline(
+            record['listeners'], baseline.match_baselines.get(record['date']))
     
     return merged
 
@@ -502,9 +542,16 @@ def main():
     print("Merging API and Google Sheets data...")
     print("-" * 60)
     
-    # Load API data
+    # Load API data (memory-mapped index when it is up to date with the JSON)
     print("Loading API data...")
-    api_data = load_api_data()
+    api_file = 'api_data_full.json'
+    api_data = open_listener_index(api_file)
+    if api_data is not None:
+        print(f"  Using listener index {api_data.path}")
+    else:
+        api_data = load_api_data(api_file)
+        if api_data:
+            write_listener_index(api_data, index_path_for(api_file))
     if not api_data:
         print("  No API data found in file, fetching fresh...")
         api_data = fetch_fresh_api_data()
@@ -514,19 +561,31 @@ def main():
     else:
         print("  Warning: No API data available")
     
-    # Load Google Sheets data
-    print("\nLoading Google Sheets data...")
-    sheet_data = load_sheet_data()
-    if sheet_data:
-        print(f"  Loaded {len(sheet_data)} match records")
-    else:
-        print("  Error: No Google Sheets data found")
-        print("  Please run: python3 fetch_google_sheet.py")
-        return
+    try:
+        # Load Google Sheets data
+        print("\nLoading Google Sheets data...")
+        sheet_data = load_sheet_data()
+        if sheet_data:
+            print(f"  Loaded {len(sheet_data)} match records")
+        else:
+            print("  Error: No Google Sheets data found")
+            print("  Please run: python3 fetch_google_sheet.py")
+            return
     
-    # Merge data
-    print("\nMerging data...")
-    merged = merge_data(api_data, sheet_data)
+        # Report bad input rows before merging (validation imports this module)
+        from validation import run_validation
+        print("\nValidating inputs...")
+        run_validation(sheet_data, api_data)
+
+        # Merge data
+        print("\nMerging data...")
+        baseline = ListenerBaseline.load()
+        merged = merge_data(api_data, sheet_data, baseline=baseline)
+        baseline.save()
+    finally:
+        # The index is only read while merging; release its mmap and file handle
+        if isinstance(api_data, ListenerIndex):
+            api_data.close()
     
     # Statistics
     with_listeners = sum(1 for m in merged if m['listeners'] is not None)
@@ -539,10 +598,15 @@ def main():
     # Save merged data
     output_file = 'merged_matchdays.json'
     print(f"\nSaving to {output_file}...")
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(merged, f, indent=2, ensure_ascii=False)
+    with stage('write merged_matchdays') as s:
+        json_stream.write_json(output_file, merged)
+        snapshot_file = snapshot_path_for(output_file)
+        snapshot_size = write_snapshot(merged, snapshot_file)
+        s.add_records(len(merged))
     
     print(f"✓ Saved {len(merged)} records to {output_file}")
+    if snapshot_size:
+        print(f"✓ Saved binary snapshot to {snapshot_file}")
     
     # Show sample
     print("\nSample records (first 3):")
@@ -555,4 +619,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    run_main(main, 'merge_data')
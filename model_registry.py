@@ -0,0 +1,283 @@
+"""
+Persisted listener models with warm-start refits.
+
+Each registered model keeps what is needed to score and to refit cheaply:
+the categorical schema, the coefficients, the normal equations (XᵀX and Xᵀy)
+and one short key per training row plus a fingerprint over all of them.
+
+On the next run:
+  - same schema and same training rows   -> stored coefficients, no refit
+  - same schema, only a few rows added   -> one rank-one update of XᵀX and
+                                            Xᵀy per new row, then one small
+                                            solve
+  - schema changed, rows changed or
+    removed, or many rows added          -> full fit
+
+Features are 0/1 indicators, an opponent position and integer targets, so
+XᵀX and Xᵀy are exact sums and the incremental path gives the same
+coefficients as a full fit. Scoring a fixture is one dot product.
+"""
+import hashlib
+import json
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from pipeline_state import write_json_atomic
+
+REGISTRY_FILE = 'model_registry.json'
+REGISTRY_VERSION = 1
+LISTENER_MODEL = 'listeners'
+# Beyond this many changed rows a full fit is as cheap and resets the state
+MAX_INCREMENTAL_ROWS = 50
+
+
+def transpose(matrix: List[List[float]]) -> List[List[float]]:
+    return [list(row) for row in zip(*matrix)]
+
+
+def matmul(a: List[List[float]], b: List[List[float]]) -> List[List[float]]:
+    result = [[0.0 for _ in range(len(b[0]))] for _ in range(len(a))]
+    for i in range(len(a)):
+        for k in range(len(b)):
+            for j in range(len(b[0])):
+                result[i][j] += a[i][k] * b[k][j]
+    return result
+
+
+def invert_matrix(matrix: List[List[float]]) -> Optional[List[List[float]]]:
+    size = len(matrix)
+    augmented = [row[:] + [1.0 if i == j else 0.0 for j in range(size)] for i, row in enumerate(matrix)]
+
+    for i in range(size):
+        pivot = augmented[i][i]
+        if abs(pivot) < 1e-9:
+            swap_row = None
+            for j in range(i + 1, size):
+                if abs(augmented[j][i]) > 1e-9:
+                    swap_row = j
+                    break
+            if swap_row is None:
+                return None
+            augmented[i], augmented[swap_row] = augmented[swap_row], augmented[i]
+            pivot = augmented[i][i]
+
+        pivot_inv = 1.0 / pivot
+        augmented[i] = [value * pivot_inv for value in augmented[i]]
+
+        for j in range(size):
+            if j == i:
+                continue
+            factor = augmented[j][i]
+            augmented[j] = [
+                augmented[j][k] - factor * augmented[i][k]
+                for k in range(2 * size)
+            ]
+
+    return [row[size:] for row in augmented]
+
+
+def solve_normal_equations(xtx: List[List[float]], xty: List[float], rows: int,
+                           ridge: float = 0.0) -> Optional[List[float]]:
+    """
+    Least-squares coefficients from XᵀX and Xᵀy, with an optional ridge penalty
+    on every coefficient but the intercept (column 0). None when an unpenalised
+    system is underdetermined, or when it is singular.
+    """
+    if ridge:
+        xtx = [[value + ridge if i == j and i > 0 else value for j, value in enumerate(row)]
+               for i, row in enumerate(xtx)]
+    elif rows <= len(xtx):
+        return None
+    xtx_inv = invert_matrix(xtx)
+    if xtx_inv is None:
+        return None
+    beta = matmul(xtx_inv, [[value] for value in xty])
+    return [row[0] for row in beta]
+
+
+def row_key(features: Sequence[float], target: float) -> str:
+    """Short key for one training row (features and target)"""
+    payload = json.dumps([list(features), target], separators=(',', ':'))
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def fingerprint_rows(row_keys: Sequence[str]) -> str:
+    """Order-independent fingerprint of a training set"""
+    return hashlib.sha256('\n'.join(sorted(row_keys)).encode('utf-8')).hexdigest()
+
+
+def select_columns(features: List[List[float]], columns: Optional[Sequence[int]]) -> List[List[float]]:
+    if columns is None:
+        return features
+    return [[row[i] for i in columns] for row in features]
+
+
+class LinearModel:
+    """
+    A fitted linear model and the sufficient statistics to update it. columns
+    selects the feature vector entries the model uses (None = all of them);
+    XᵀX and Xᵀy are over those columns only.
+    """
+
+    def __init__(self, schema: Dict[str, List[str]], coefficients: Optional[List[float]],
+                 xtx: List[List[float]], xty: List[float], row_keys: List[str],
+                 fitted_at: Optional[str] = None, fit_mode: str = 'full',
+                 columns: Optional[List[int]] = None, ridge: float = 0.0):
+        self.schema = schema
+        self.columns = columns
+        self.ridge = ridge
+        self.coefficients = coefficients
+        self.xtx = xtx
+        self.xty = xty
+        self.row_keys = row_keys
+        self.fingerprint = fingerprint_rows(row_keys)
+        self.fitted_at = fitted_at or datetime.utcnow().isoformat(timespec='seconds')
+        self.fit_mode = fit_mode
+
+    @property
+    def rows(self) -> int:
+        return len(self.row_keys)
+
+    def predict(self, features: Sequence[float]) -> Optional[float]:
+        if self.coefficients is None:
+            return None
+        if self.columns is not None:
+            features = [features[i] for i in self.columns]
+        return sum(weight * value for weight, value in zip(self.coefficients, features))
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            'schema': self.schema,
+            'columns': self.columns,
+            'ridge': self.ridge,
+            'coefficients': self.coefficients,
+            'xtx': self.xtx,
+            'xty': self.xty,
+            'row_keys': self.row_keys,
+            'fingerprint': self.fingerprint,
+            'fitted_at': self.fitted_at,
+            'fit_mode': self.fit_mode,
+        }
+
+    @classmethod
+    def from_json(cls, payload: Dict[str, Any]) -> 'LinearModel':
+        return cls(payload['schema'], payload.get('coefficients'), payload['xtx'], payload['xty'],
+                   payload.get('row_keys', []), payload.get('fitted_at'), payload.get('fit_mode', 'full'),
+                   payload.get('columns'), payload.get('ridge', 0.0))
+
+
+def normal_equations(features: List[List[float]], targets: List[float]) -> Tuple[List[List[float]], List[float]]:
+    """XᵀX and Xᵀy"""
+    if not features:
+        return [], []
+    xt = transpose(features)
+    xtx = matmul(xt, features)
+    xty = [row[0] for row in matmul(xt, [[value] for value in targets])]
+    return xtx, xty
+
+
+def fit_model(schema: Dict[str, List[str]], features: List[List[float]], targets: List[float],
+              columns: Optional[List[int]] = None, ridge: float = 0.0) -> LinearModel:
+    """Full fit: build XᵀX and Xᵀy from scratch and solve"""
+    keys = [row_key(f, t) for f, t in zip(features, targets)]
+    xtx, xty = normal_equations(select_columns(features, columns), targets)
+    coefficients = solve_normal_equations(xtx, xty, len(keys), ridge) if xtx else None
+    return LinearModel(schema, coefficients, xtx, xty, keys, columns=columns, ridge=ridge)
+
+
+def _rank_one(xtx: List[List[float]], xty: List[float], features: Sequence[float], target: float):
+    """XᵀX += x xᵀ and Xᵀy += x·y, in place (skipping the zero indicators)"""
+    nonzero = [(j, xj) for j, xj in enumerate(features) if xj != 0.0]
+    for i, xi in nonzero:
+        row = xtx[i]
+        for j, xj in nonzero:
+            row[j] += xi * xj
+        xty[i] += xi * target
+
+
+class ModelRegistry:
+    """
+    Named LinearModels persisted to one JSON file, plus the configuration
+    (feature groups, ridge penalty) model selection picked for each name.
+    """
+
+    def __init__(self, models: Optional[Dict[str, LinearModel]] = None, path: str = REGISTRY_FILE,
+                 selections: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.models: Dict[str, LinearModel] = models or {}
+        self.selections: Dict[str, Dict[str, Any]] = selections or {}
+        self.path = path
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path: str = REGISTRY_FILE) -> 'ModelRegistry':
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                payload = json.load(f)
+        except FileNotFoundError:
+            return cls(path=path)
+        except ValueError:
+            print(f"  Warning: {path} is not valid JSON; starting with an empty model registry")
+            return cls(path=path)
+        if payload.get('version') != REGISTRY_VERSION:
+            return cls(path=path)
+        models = {name: LinearModel.from_json(model) for name, model in payload.get('models', {}).items()}
+        return cls(models, path, payload.get('selections'))
+
+    def save(self, path: Optional[str] = None):
+        write_json_atomic(path or self.path, {
+            'version': REGISTRY_VERSION,
+            'models': {name: model.to_json() for name, model in self.models.items()},
+            'selections': self.selections,
+        }, separators=(',', ':'), ensure_ascii=False)
+        self.dirty = False
+
+    def get(self, name: str) -> Optional[LinearModel]:
+        return self.models.get(name)
+
+    def register(self, name: str, model: LinearModel):
+        self.models[name] = model
+        self.dirty = True
+
+    def selection(self, name: str) -> Optional[Dict[str, Any]]:
+        return self.selections.get(name)
+
+    def select(self, name: str, features: Sequence[str], ridge: float, **details):
+        """Record the configuration to fit `name` with from now on"""
+        self.selections[name] = {'features': list(features), 'ridge': ridge, **details}
+        self.dirty = True
+
+    def warm_start(self, name: str, schema: Dict[str, List[str]],
+                   features: List[List[float]], targets: List[float],
+                   columns: Optional[List[int]] = None, ridge: float = 0.0) -> Optional[LinearModel]:
+        """
+        The stored model when the training set is unchanged, or an incrementally
+        updated one when only a few rows changed; None when a full fit is needed.
+        """
+        stored = self.models.get(name)
+        if stored is None or stored.schema != schema or stored.columns != columns or stored.ridge != ridge:
+            return None
+        keys = [row_key(f, t) for f, t in zip(features, targets)]
+        if fingerprint_rows(keys) == stored.fingerprint:
+            return stored
+
+        current = Counter(keys)
+        previous = Counter(stored.row_keys)
+        added = current - previous
+        removed = previous - current
+        if removed or sum(added.values()) > MAX_INCREMENTAL_ROWS:
+            # Row keys cannot be turned back into features, so removals need a full fit
+            return None
+
+        xtx = [row[:] for row in stored.xtx]
+        xty = stored.xty[:]
+        pending = Counter(added)
+        for row_features, target, key in zip(select_columns(features, columns), targets, keys):
+            if pending[key]:
+                _rank_one(xtx, xty, row_features, target)
+                pending[key] -= 1
+        coefficients = solve_normal_equations(xtx, xty, len(keys), ridge)
+        model = LinearModel(schema, coefficients, xtx, xty, stored.row_keys + list(added.elements()),
+                            fit_mode='incremental', columns=columns, ridge=ridge)
+        self.register(name, model)
+        return model
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Cross-validated selection of the listener model's feature groups and ridge penalty.
+
+Candidates are every subset of analyze_matchdays.FEATURE_GROUPS (the
+intercept is always in) combined with each penalty in RIDGE_PENALTIES. Each
+candidate is backtested over the same folds:
+
+  rolling   train on all matches before a cutoff, test on the next block
+            (rolling origin, the default: never trains on the future)
+  kfold     k contiguous blocks, each tested against a fit on the others
+
+For every fold the feature schema, XᵀX and Xᵀy are built once over all
+feature columns; a candidate only slices its columns out of those cached
+matrices and solves, so a candidate costs one small solve per fold. Folds a
+candidate cannot be solved on (too few matches without a penalty) use the
+kickoff-block averages, like the dashboard's own fallback.
+
+Candidates are evaluated in batches on the analysis executor (serial unless
+--workers / ANALYSIS_WORKERS says otherwise), largest feature sets first,
+until the time budget runs out. The best candidate by mean absolute error is
+stored in the model registry, so the next analysis run fits with it, and the
+metrics are written to dashboard/public/output/model_selection.json.
+
+Usage:
+  python3 model_selection.py [--scheme rolling|kfold] [--folds 5] [--budget 60] [--workers 4]
+
+Environment variables:
+  MODEL_SELECTION_BUDGET_SECONDS   default time budget (default 60)
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import time
+from collections import defaultdict
+from datetime import datetime
+from itertools import combinations
+from statistics import mean
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import analyze_matchdays
+from analysis_executor import AnalysisExecutor
+from analyze_matchdays import (
+    FEATURE_GROUPS, encode_columns, feature_codes, feature_columns, feature_schema, get_kickoff_blocks,
+)
+from categorical import CategoricalColumns
+from instrumentation import run_main, stage
+from model_registry import LISTENER_MODEL, ModelRegistry, normal_equations, solve_normal_equations
+from output_manifest import publish_outputs
+from pipeline_state import write_json_atomic
+from standings_history import StandingsHistory
+
+RIDGE_PENALTIES = (0.0, 1.0, 3.0, 10.0, 30.0)
+SCHEMES = ('rolling', 'kfold')
+DEFAULT_FOLDS = 5
+DEFAULT_BUDGET_SECONDS = 60
+CANDIDATES_PER_BATCH = 8
+OUTPUT_FILE = 'dashboard/public/output/model_selection.json'
+
+
+class Fold(NamedTuple):
+    """Cached matrices for one train/test split"""
+    schema: Dict[str, List[str]]
+    xtx: List[List[float]]
+    xty: List[float]
+    rows: int
+    test_features: List[List[float]]
+    test_targets: List[float]
+    fallback: List[float]
+
+
+def fold_splits(count: int, scheme: str = 'rolling', folds: int = DEFAULT_FOLDS) -> List[Tuple[List[int], List[int]]]:
+    """(train indices, test indices) per fold over records sorted by date"""
+    if scheme not in SCHEMES:
+        raise ValueError(f"Unknown scheme '{scheme}' (expected one of {', '.join(SCHEMES)})")
+    blocks_wanted = folds + 1 if scheme == 'rolling' else folds
+    blocks_wanted = max(2, min(blocks_wanted, count))
+    bounds = [round(i * count / blocks_wanted) for i in range(blocks_wanted + 1)]
+    blocks = [list(range(bounds[i], bounds[i + 1])) for i in range(blocks_wanted)]
+    if scheme == 'rolling':
+        return [(list(range(0, bounds[i + 1])), blocks[i + 1]) for i in range(blocks_wanted - 1)]
+    return [
+        ([index for other, block in enumerate(blocks) if other != i for index in block], blocks[i])
+        for i in range(blocks_wanted)
+    ]
+
+
+def build_folds(records: List[Dict[str, Any]], scheme: str = 'rolling', folds: int = DEFAULT_FOLDS) -> List[Fold]:
+    """Schema and normal equations per training split (records sorted by date, all with listeners)"""
+    result = []
+    # Categorical fields are dictionary-encoded once; each split takes its rows of the codes
+    columns = CategoricalColumns(records)
+    feature_codes(columns)
+    for train_indices, test_indices in fold_splits(len(records), scheme, folds):
+        train = [records[i] for i in train_indices]
+        test = [records[i] for i in test_indices]
+        if not train or not test:
+            continue
+        train_columns = columns.take(train_indices)
+        schema = feature_schema(train_columns)
+        targets = [r['listeners'] for r in train]
+        xtx, xty = normal_equations(encode_columns(train_columns, schema), targets)
+
+        overall = mean(targets)
+        buckets = defaultdict(list)
+        for record, block in zip(train, get_kickoff_blocks(train)):
+            buckets[block or "Unknown"].append(record['listeners'])
+        fallback = [mean(buckets[block or "Unknown"]) if buckets.get(block or "Unknown") else overall
+                    for block in get_kickoff_blocks(test)]
+
+        result.append(Fold(schema, xtx, xty, len(train), encode_columns(columns.take(test_indices), schema),
+                           [r['listeners'] for r in test], fallback))
+    return result
+
+
+# dataset fingerprint, scheme, folds -> folds; reused by repeated selections over the same data
+_fold_cache: Dict[Tuple[str, str, int], List[Fold]] = {}
+
+
+def cached_folds(records: List[Dict[str, Any]], scheme: str, folds: int) -> List[Fold]:
+    key = (dataset_fingerprint(records), scheme, folds)
+    if key not in _fold_cache:
+        _fold_cache.clear()
+        _fold_cache[key] = build_folds(records, scheme, folds)
+    return _fold_cache[key]
+
+
+def dataset_fingerprint(records: List[Dict[str, Any]]) -> str:
+    digest = hashlib.sha256()
+    for record in records:
+        digest.update(json.dumps(record, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def error_metrics(predictions: Sequence[float], targets: Sequence[float]) -> Dict[str, Any]:
+    errors = [p - t for p, t in zip(predictions, targets)]
+    if not errors:
+        return {'mae': None, 'rmse': None, 'mape': None, 'predictions': 0}
+    relative = [abs(e) / t for e, t in zip(errors, targets) if t]
+    return {
+        'mae': round(mean(abs(e) for e in errors), 2),
+        'rmse': round(math.sqrt(mean(e * e for e in errors)), 2),
+        'mape': round(100 * mean(relative), 2) if relative else None,
+        'predictions': len(errors),
+    }
+
+
+def evaluate_candidate(folds: List[Fold], features: Sequence[str], ridge: float) -> Dict[str, Any]:
+    """Backtest one configuration over cached folds"""
+    predictions, targets, fold_mae = [], [], []
+    fallback_folds = 0
+    for fold in folds:
+        columns = feature_columns(fold.schema, list(features))
+        xtx = [[fold.xtx[i][j] for j in columns] for i in columns]
+        xty = [fold.xty[i] for i in columns]
+        coefficients = solve_normal_equations(xtx, xty, fold.rows, ridge)
+        if coefficients is None:
+            fallback_folds += 1
+            fold_predictions = fold.fallback
+        else:
+            fold_predictions = [
+                max(0.0, sum(weight * row[i] for weight, i in zip(coefficients, columns)))
+                for row in fold.test_features
+            ]
+        predictions.extend(fold_predictions)
+        targets.extend(fold.test_targets)
+        fold_mae.append(error_metrics(fold_predictions, fold.test_targets)['mae'])
+    return {
+        'features': list(features),
+        'ridge': ridge,
+        **error_metrics(predictions, targets),
+        'fold_mae': fold_mae,
+        'fallback_folds': fallback_folds,
+    }
+
+
+def evaluate_batch(folds: List[Fold], candidates: List[Tuple[Tuple[str, ...], float]]) -> List[Dict[str, Any]]:
+    return [evaluate_candidate(folds, features, ridge) for features, ridge in candidates]
+
+
+def candidate_configs() -> List[Tuple[Tuple[str, ...], float]]:
+    """All feature-group subsets × penalties, largest subsets first"""
+    candidates = []
+    for size in range(len(FEATURE_GROUPS), -1, -1):
+        for features in combinations(FEATURE_GROUPS, size):
+            candidates.extend((features, ridge) for ridge in RIDGE_PENALTIES)
+    return candidates
+
+
+def training_rows(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Past matches with listener data, oldest first"""
+    today = datetime.utcnow().date()
+    rows = [
+        r for r in records
+        if r.get('listeners') is not None and not analyze_matchdays.is_future_date(r.get('date', ''), today)
+    ]
+    rows.sort(key=lambda r: r.get('date', ''))
+    return rows
+
+
+def _rank(result: Dict[str, Any]) -> Tuple[float, int, float]:
+    """Lowest error first; on ties the smaller and then the less penalised model"""
+    mae = result['mae'] if result['mae'] is not None else float('inf')
+    return (mae, len(result['features']), result['ridge'])
+
+
+def select_model(records: List[Dict[str, Any]], scheme: str = 'rolling', folds: int = DEFAULT_FOLDS,
+                 budget: float = DEFAULT_BUDGET_SECONDS, workers: Optional[int] = None) -> Dict[str, Any]:
+    """Backtest candidates within the time budget; returns the metrics report"""
+    started = time.time()
+    training = training_rows(records)
+    with stage('build folds') as s:
+        fold_data = cached_folds(training, scheme, folds)
+        s.add_records(len(fold_data))
+    candidates = candidate_configs()
+    batches = [candidates[i:i + CANDIDATES_PER_BATCH] for i in range(0, len(candidates), CANDIDATES_PER_BATCH)]
+
+    results: List[Dict[str, Any]] = []
+    with AnalysisExecutor(training, workers) as executor, stage('evaluate candidates') as s:
+        wave_size = max(1, executor.workers)
+        for start in range(0, len(batches), wave_size):
+            if results and time.time() - started >= budget:
+                break
+            futures = [executor.submit(evaluate_batch, fold_data, batch) for batch in batches[start:start + wave_size]]
+            for future in futures:
+                results.extend(future.result())
+        s.add_records(len(results))
+
+    results.sort(key=_rank)
+    fallback = error_metrics(
+        [p for fold in fold_data for p in fold.fallback],
+        [t for fold in fold_data for t in fold.test_targets],
+    )
+    return {
+        'generated_at': datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+        'scheme': scheme,
+        'folds': len(fold_data),
+        'training_matches': len(training),
+        'fold_sizes': [len(fold.test_targets) for fold in fold_data],
+        'budget_seconds': budget,
+        'elapsed_seconds': round(time.time() - started, 2),
+        'candidates': len(candidates),
+        'evaluated': len(results),
+        'complete': len(results) == len(candidates),
+        'kickoff_average_baseline': fallback,
+        'best': results[0] if results else None,
+        'results': results,
+    }
+
+
+def save_report(report: Dict[str, Any], filepath: str = OUTPUT_FILE):
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    write_json_atomic(filepath, report, indent=2, ensure_ascii=False)
+    publish_outputs(os.path.dirname(filepath), [os.path.basename(filepath)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest listener model configurations")
+    parser.add_argument('--input', default='merged_matchdays.json')
+    parser.add_argument('--output', default=OUTPUT_FILE)
+    parser.add_argument('--scheme', choices=SCHEMES, default='rolling')
+    parser.add_argument('--folds', type=int, default=DEFAULT_FOLDS)
+    parser.add_argument('--budget', type=float,
+                        default=float(os.environ.get('MODEL_SELECTION_BUDGET_SECONDS', DEFAULT_BUDGET_SECONDS)))
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: ANALYSIS_WORKERS)")
+    args = parser.parse_args()
+
+    records = analyze_matchdays.load_merged_data(args.input)
+    analyze_matchdays.add_opponent_positions(records, StandingsHistory.load())
+    report = select_model(records, args.scheme, args.folds, args.budget, args.workers)
+    save_report(report, args.output)
+
+    best = report['best']
+    baseline = report['kickoff_average_baseline']
+    print(f"Evaluated {report['evaluated']}/{report['candidates']} candidates over {report['folds']} "
+          f"{report['scheme']} folds in {report['elapsed_seconds']}s")
+    print(f"  Kickoff-average baseline MAE: {baseline['mae']}")
+    if best is None:
+        print("  No candidate could be evaluated; keeping the current model configuration")
+        return
+    print(f"  Best: {', '.join(best['features']) or 'intercept only'} (ridge {best['ridge']:g}) MAE: {best['mae']}")
+
+    registry = ModelRegistry.load()
+    current = registry.selection(LISTENER_MODEL)
+    if not current or current['features'] != best['features'] or current['ridge'] != best['ridge']:
+        registry.select(LISTENER_MODEL, best['features'], best['ridge'], mae=best['mae'], scheme=report['scheme'])
+        registry.save()
+        print("✓ Model registry updated; the next analysis run fits with this configuration")
+    print(f"✓ Metrics saved to {args.output}")
+
+
+if __name__ == '__main__':
+    run_main(main, 'model_selection')
@@ -0,0 +1,273 @@
+"""
+Versioned delta feeds for the largest outputs (all_matches, podcast_episodes).
+
+Each publish compares the new payload with the previous version and, when
+anything changed, writes an upsert/delete log entry under a new version
+number. Every SNAPSHOT_EVERY versions (and for version 1) a full snapshot is
+written as well, so a client holding version N downloads only the deltas
+after N, and a new or far-behind client downloads the latest snapshot plus
+the deltas after it.
+
+Layout under <output_dir>/deltas/:
+  <feed>.json                  index, revalidated by clients:
+                               {"feed", "key", "version", "snapshots": [...],
+                                "deltas": [{"version", "file", "upserts", "deletes"}]}
+  <feed>/delta.<v>.json        {"version", "base_version", "upserts": [[key, item]],
+                                "deletes": [keys], "order"?: [keys], "meta"?: {...}}
+  <feed>/snapshot.<v>.json     {"version", "payload": <full output>}
+  <feed>.state.json            key and content hash of every item in the latest
+                               version, which is all the next diff needs
+
+Items are keyed by FEEDS[feed].key (mirrored in dashboard/src/utils/
+deltaFeed.js), with repeated keys numbered '#2', '#3', ... in item order;
+upserts carry the numbered key, so a changed second item with a repeated
+key replaces that item and not the first. "order" is only present when the item order differs from the
+previous order with deletions dropped and new keys appended; "meta" carries
+the non-list payload fields when they changed.
+FeedRecorder diffs a stream of items against the state, so the writer of
+the stable output and the delta share one pass and neither needs the full
+list. Delta and snapshot files never change once written. Only deltas after
+the oldest of the last KEEP_SNAPSHOTS snapshots are kept.
+"""
+import hashlib
+import json
+import os
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+DELTA_DIR = 'deltas'
+SNAPSHOT_EVERY = 20
+KEEP_SNAPSHOTS = 2
+
+
+class FeedSpec(NamedTuple):
+    list_key: str
+    key: Callable[[Dict[str, Any]], str]
+    key_name: str
+
+
+def _match_key(match: Dict[str, Any]) -> str:
+    return f"{match.get('date') or ''}|{match.get('match_name') or ''}"
+
+
+FEEDS: Dict[str, FeedSpec] = {
+    'all_matches': FeedSpec('matches', _match_key, 'date|match_name'),
+    'podcast_episodes': FeedSpec('episodes', lambda episode: str(episode.get('id') or ''), 'id'),
+}
+
+
+def _keyed(items: List[Dict[str, Any]], key: Callable[[Dict[str, Any]], str]) -> Dict[str, Dict[str, Any]]:
+    """key -> item, numbering repeated keys (#2, #3, ...) so every item is addressable"""
+    keyed: Dict[str, Dict[str, Any]] = {}
+    for item in items:
+        base = key(item)
+        item_key, n = base, 1
+        while item_key in keyed:
+            n += 1
+            item_key = f"{base}#{n}"
+        keyed[item_key] = item
+    return keyed
+
+
+def _read_json(path: str) -> Optional[Any]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path: str, payload: Any):
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(temp_path, path)
+
+
+def _index_path(output_dir: str, feed: str) -> str:
+    return os.path.join(output_dir, DELTA_DIR, f"{feed}.json")
+
+
+def load_index(output_dir: str, feed: str) -> Optional[Dict[str, Any]]:
+    return _read_json(_index_path(output_dir, feed))
+
+
+def apply_delta(payload: Dict[str, Any], delta: Dict[str, Any], spec: FeedSpec) -> Dict[str, Any]:
+    """Payload of delta['version'] from the payload of delta['base_version']"""
+    items = _keyed(payload.get(spec.list_key, []), spec.key)
+    for item_key in delta.get('deletes', []):
+        items.pop(item_key, None)
+    for item_key, item in delta.get('upserts', []):
+        items[item_key] = item
+    order = delta.get('order') or list(items)
+    result = dict(delta['meta']) if 'meta' in delta else {k: v for k, v in payload.items() if k != spec.list_key}
+    result[spec.list_key] = [items[item_key] for item_key in order]
+    return result
+
+
+def materialize(output_dir: str, feed: str) -> Optional[Dict[str, Any]]:
+    """Latest payload, rebuilt from the newest snapshot and the deltas after it"""
+    index = load_index(output_dir, feed)
+    if not index or not index.get('snapshots'):
+        return None
+    spec = FEEDS[feed]
+    feed_dir = os.path.join(output_dir, DELTA_DIR, feed)
+    snapshot_version = index['snapshots'][-1]
+    snapshot = _read_json(os.path.join(feed_dir, f"snapshot.{snapshot_version}.json"))
+    if snapshot is None:
+        return None
+    payload = snapshot['payload']
+    for entry in index['deltas']:
+        if entry['version'] > snapshot_version:
+            payload = apply_delta(payload, _read_json(os.path.join(feed_dir, entry['file'])), spec)
+    return payload
+
+
+def _item_hash(item: Dict[str, Any]) -> str:
+    payload = json.dumps(item, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def _state_path(output_dir: str, feed: str) -> str:
+    return os.path.join(output_dir, DELTA_DIR, f"{feed}.state.json")
+
+
+def _load_state(output_dir: str, feed: str, index: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Item keys and hashes of the latest version (rebuilt from the feed when missing or stale)"""
+    state = _read_json(_state_path(output_dir, feed))
+    if state is not None and state.get('version') == index['version']:
+        return state
+    previous = materialize(output_dir, feed)
+    if previous is None:
+        return None
+    spec = FEEDS[feed]
+    items = _keyed(previous.get(spec.list_key, []), spec.key)
+    return {
+        'version': index['version'],
+        'meta': {k: v for k, v in previous.items() if k != spec.list_key},
+        'items': [[item_key, _item_hash(item)] for item_key, item in items.items()],
+    }
+
+
+class FeedRecorder:
+    """
+    Records the next version of a feed from a stream of items: track() passes
+    the items through (to the writer of the stable output) while hashing them
+    against the previous version, and publish() writes the delta. Only the
+    changed items are kept in memory; a due snapshot is streamed to disk as
+    the items go by.
+    """
+
+    def __init__(self, output_dir: str, feed: str, meta: Optional[Dict[str, Any]] = None):
+        self.output_dir = output_dir
+        self.feed = feed
+        self.spec = FEEDS[feed]
+        self.meta = meta or {}
+        self.feed_dir = os.path.join(output_dir, DELTA_DIR, feed)
+        os.makedirs(self.feed_dir, exist_ok=True)
+        self.index = load_index(output_dir, feed) or {
+            'feed': feed, 'key': self.spec.key_name, 'version': 0, 'snapshots': [], 'deltas': [],
+        }
+        self.previous = _load_state(output_dir, feed, self.index)
+        self.version = self.index['version'] + 1
+        self.old_hashes = dict(self.previous['items']) if self.previous else {}
+        self.items: List[List[str]] = []
+        self.upserts: List[List[Any]] = []  # [item key, item]
+        self.count = 0
+        self.snapshot_due = (self.previous is None or not self.index['snapshots']
+                             or self.version - self.index['snapshots'][-1] >= SNAPSHOT_EVERY)
+        self._snapshot_path = os.path.join(self.feed_dir, f"snapshot.{self.version}.json")
+        self._snapshot = None
+
+    def _open_snapshot(self):
+        self._snapshot = open(f"{self._snapshot_path}.tmp", 'w', encoding='utf-8')
+        self._snapshot.write(f'{{"version":{self.version},"payload":{{')
+        for key, value in self.meta.items():
+            self._snapshot.write(f'{json.dumps(key)}:{json.dumps(value, ensure_ascii=False, separators=(",", ":"))},')
+        self._snapshot.write(f'{json.dumps(self.spec.list_key)}:[')
+
+    def track(self, items: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        if self.snapshot_due:
+            self._open_snapshot()
+        seen: Dict[str, int] = {}
+        for item in items:
+            base = self.spec.key(item)
+            n = seen[base] = seen.get(base, 0) + 1
+            item_key = base if n == 1 else f"{base}#{n}"
+            item_hash = _item_hash(item)
+            self.items.append([item_key, item_hash])
+            if self.old_hashes.get(item_key) != item_hash:
+                self.upserts.append([item_key, item])
+            if self._snapshot is not None:
+                if self.count:
+                    self._snapshot.write(',')
+                self._snapshot.write(json.dumps(item, ensure_ascii=False, separators=(',', ':')))
+            self.count += 1
+            yield item
+
+    def _discard_snapshot(self):
+        if self._snapshot is not None:
+            self._snapshot.close()
+            os.remove(f"{self._snapshot_path}.tmp")
+            self._snapshot = None
+
+    def publish(self) -> Optional[int]:
+        """Record the tracked items as the feed's next version; returns it, or None when nothing changed"""
+        index = self.index
+        if self.snapshot_due and self._snapshot is None:
+            self._open_snapshot()
+        if self.previous is not None:
+            new_keys = [item_key for item_key, _ in self.items]
+            new_set = set(new_keys)
+            old_keys = [item_key for item_key, _ in self.previous['items']]
+            delta: Dict[str, Any] = {
+                'upserts': self.upserts,
+                'deletes': [item_key for item_key in old_keys if item_key not in new_set],
+            }
+            expected_order = [k for k in old_keys if k in new_set] + [k for k in new_keys if k not in self.old_hashes]
+            if new_keys != expected_order:
+                delta['order'] = new_keys
+            if self.meta != self.previous['meta']:
+                delta['meta'] = self.meta
+            if not delta['upserts'] and not delta['deletes'] and 'order' not in delta and 'meta' not in delta:
+                self._discard_snapshot()
+                return None
+            filename = f"delta.{self.version}.json"
+            _write_json(os.path.join(self.feed_dir, filename),
+                        {'version': self.version, 'base_version': self.version - 1, **delta})
+            index['deltas'].append({
+                'version': self.version,
+                'file': filename,
+                'upserts': len(delta['upserts']),
+                'deletes': len(delta['deletes']),
+            })
+
+        if self._snapshot is not None:
+            self._snapshot.write(']}}')
+            self._snapshot.close()
+            self._snapshot = None
+            os.replace(f"{self._snapshot_path}.tmp", self._snapshot_path)
+            index['snapshots'].append(self.version)
+
+        # Retention: the last KEEP_SNAPSHOTS snapshots and every delta after the oldest of them
+        index['snapshots'] = index['snapshots'][-KEEP_SNAPSHOTS:]
+        oldest = index['snapshots'][0]
+        index['deltas'] = [entry for entry in index['deltas'] if entry['version'] > oldest]
+        index['version'] = self.version
+        _write_json(_index_path(self.output_dir, self.feed), index)
+        _write_json(_state_path(self.output_dir, self.feed),
+                    {'version': self.version, 'meta': self.meta, 'items': self.items})
+
+        keep = {f"snapshot.{v}.json" for v in index['snapshots']} | {entry['file'] for entry in index['deltas']}
+        for name in os.listdir(self.feed_dir):
+            if name not in keep:
+                os.remove(os.path.join(self.feed_dir, name))
+        return self.version
+
+
+def publish_delta(output_dir: str, feed: str, payload: Dict[str, Any]) -> Optional[int]:
+    """Record payload as the feed's next version; returns it, or None when nothing changed"""
+    spec = FEEDS[feed]
+    recorder = FeedRecorder(output_dir, feed, {k: v for k, v in payload.items() if k != spec.list_key})
+    for _ in recorder.track(payload.get(spec.list_key, [])):
+        pass
+    return recorder.publish()
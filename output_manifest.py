@@ -0,0 +1,95 @@
+"""
+Content-hashed copies of the dashboard outputs plus a manifest.
+
+The writers keep writing their stable names (all_matches.json, ...); after
+an output stage, publish_outputs() copies each file to
+v/<name>.<hash>.<ext> and records the mapping in manifest.json:
+
+  {"version": "<hash over all entries>",
+   "generated_at": "...",
+   "files": {"all_matches.json": "v/all_matches.3f2a9c01b7de.json", ...}}
+
+A hashed file never changes once written, so the dashboard only revalidates
+manifest.json and can cache everything under v/ as immutable (see the
+headers in dashboard/vercel.json). Entries are merged, so the analysis and
+the podcast stage can publish independently. Hashed files referenced by
+neither the new nor the previous manifest are removed, which keeps a client
+that just read the previous manifest working. Hashed copies are written
+atomically, and one already on disk is only reused when its content still
+matches its name, so an interrupted copy is never served as immutable.
+"""
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
+from typing import Dict, Iterable, Set
+
+from pipeline_state import atomic_write, write_json_atomic
+
+MANIFEST_FILE = 'manifest.json'
+HASHED_DIR = 'v'
+HASH_LENGTH = 12
+
+
+def content_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:HASH_LENGTH]
+
+
+def hashed_name(filename: str, digest: str) -> str:
+    stem, ext = os.path.splitext(filename)
+    return f"{HASHED_DIR}/{stem}.{digest}{ext}"
+
+
+def load_manifest(output_dir: str) -> Dict[str, str]:
+    """Output name -> hashed path relative to output_dir (empty when there is no manifest)"""
+    try:
+        with open(os.path.join(output_dir, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f).get('files', {})
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_manifest(output_dir: str, files: Dict[str, str]):
+    entries = dict(sorted(files.items()))
+    version = hashlib.sha256(json.dumps(entries).encode('utf-8')).hexdigest()[:HASH_LENGTH]
+    payload = {
+        'version': version,
+        'generated_at': datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+        'files': entries,
+    }
+    write_json_atomic(os.path.join(output_dir, MANIFEST_FILE), payload, indent=2, ensure_ascii=False)
+
+
+def _prune(output_dir: str, keep: Set[str]):
+    hashed_dir = os.path.join(output_dir, HASHED_DIR)
+    for name in os.listdir(hashed_dir):
+        if f"{HASHED_DIR}/{name}" not in keep:
+            os.remove(os.path.join(hashed_dir, name))
+
+
+def publish_outputs(output_dir: str, filenames: Iterable[str]) -> Dict[str, str]:
+    """Copy outputs to their content-hashed names and update manifest.json; returns the manifest files"""
+    os.makedirs(os.path.join(output_dir, HASHED_DIR), exist_ok=True)
+    previous = load_manifest(output_dir)
+    files = dict(previous)
+    for filename in filenames:
+        source = os.path.join(output_dir, filename)
+        if not os.path.exists(source):
+            continue
+        digest = content_hash(source)
+        target = hashed_name(filename, digest)
+        target_path = os.path.join(output_dir, target)
+        if not os.path.exists(target_path) or content_hash(target_path) != digest:
+            with open(source, 'rb') as src, atomic_write(target_path, 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+        files[filename] = target
+
+    if files != previous:
+        _write_manifest(output_dir, files)
+    _prune(output_dir, set(files.values()) | set(previous.values()))
+    return files
@@ -0,0 +1,164 @@
+"""
+Crash-safe intermediate files and per-stage completion markers.
+
+atomic_write() is open() for writing that leaves the target untouched until
+the block completes: the data goes to <path>.tmp, which replaces the target
+only then, so a crash mid-write never leaves a truncated
+merged_matchdays.json (or any other intermediate) behind.
+
+Checkpoints keeps the state of the current pipeline run in STATE_DIR:
+
+  run.json         {"run", "started_at", "finished_at"}; finished_at is null
+                   while the run is incomplete
+  <stage>.json     completion marker: {"stage", "run", "completed_at",
+                   "inputs": {path: sha256}, "outputs": {path: sha256}}
+
+A stage counts as complete when its marker belongs to the current run and
+the hashes of its inputs and outputs on disk still match the marker, so an
+input changed by hand, or an output removed, makes it run again. A file a
+later stage rewrites in place (fetch_match_scores.py on
+merged_matchdays.json) still counts as the earlier stage's output when the
+chain of markers in this run leads from the earlier hash to the one on disk.
+run_pipeline.py and async_ingest.py drive the stages.
+"""
+import hashlib
+import json
+import os
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, IO, Iterator, List, Optional, Sequence
+
+STATE_DIR = '.pipeline_state'
+RUN_FILE = 'run.json'
+
+
+@contextmanager
+def atomic_write(path: str, mode: str = 'w', encoding: Optional[str] = 'utf-8') -> Iterator[IO]:
+    """open(path, mode) whose file replaces path only when the block exits without an exception"""
+    temp_path = f"{path}.tmp"
+    f = open(temp_path, mode, encoding=None if 'b' in mode else encoding)
+    try:
+        with f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+    except BaseException:
+        os.remove(temp_path)
+        raise
+    os.replace(temp_path, path)
+
+
+def write_json_atomic(path: str, payload: Any, **dump_kwargs):
+    """json.dump(payload) to path through atomic_write"""
+    with atomic_write(path) as f:
+        json.dump(payload, f, **dump_kwargs)
+
+
+def file_hash(path: str) -> Optional[str]:
+    """SHA-256 of a file's bytes, None when it does not exist"""
+    digest = hashlib.sha256()
+    try:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    except FileNotFoundError:
+        return None
+    return digest.hexdigest()
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec='seconds')
+
+
+class Checkpoints:
+    """The current run and the completion markers of its stages"""
+
+    def __init__(self, state_dir: str = STATE_DIR):
+        self.state_dir = state_dir
+        os.makedirs(state_dir, exist_ok=True)
+        self.run = self._read(RUN_FILE)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.state_dir, name)
+
+    def _read(self, name: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(name), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @property
+    def resuming(self) -> bool:
+        return self.run is not None and not self.run.get('finished_at')
+
+    def start(self, fresh: bool = False, reopen: bool = False) -> Dict[str, Any]:
+        """
+        Resume the current run if it did not finish (or even if it did, with
+        reopen); start a new one otherwise or when fresh is set.
+        """
+        if not fresh and self.run is not None and (self.resuming or reopen):
+            self.run['finished_at'] = None
+        else:
+            self.run = {'run': uuid.uuid4().hex[:12], 'started_at': _now(), 'finished_at': None}
+        write_json_atomic(self._path(RUN_FILE), self.run, indent=2)
+        return self.run
+
+    def finish(self):
+        self.run['finished_at'] = _now()
+        write_json_atomic(self._path(RUN_FILE), self.run, indent=2)
+
+    def marker(self, stage: str) -> Optional[Dict[str, Any]]:
+        return self._read(f"{stage}.json")
+
+    def _run_markers(self) -> List[Dict[str, Any]]:
+        markers = []
+        for name in os.listdir(self.state_dir):
+            if name.endswith('.json') and name != RUN_FILE:
+                marker = self._read(name)
+                if marker and self.run is not None and marker.get('run') == self.run['run']:
+                    markers.append(marker)
+        return markers
+
+    def _is_current(self, path: str, digest: Optional[str]) -> bool:
+        """Whether path still holds digest, or stages of this run rewrote it in place from digest to what is on disk"""
+        on_disk = file_hash(path)
+        markers = None
+        seen = set()
+        while digest != on_disk:
+            if digest in seen:
+                return False
+            seen.add(digest)
+            if markers is None:
+                markers = self._run_markers()
+            following = [m['outputs'][path] for m in markers
+                         if m.get('inputs', {}).get(path) == digest and path in m.get('outputs', {})]
+            if not following:
+                return False
+            digest = following[0]
+        return True
+
+    def is_complete(self, stage: str, inputs: Sequence[str], outputs: Sequence[str]) -> bool:
+        """Whether stage completed in the current run and its files are unchanged since"""
+        marker = self.marker(stage)
+        if marker is None or self.run is None or marker.get('run') != self.run['run']:
+            return False
+        recorded_inputs = marker.get('inputs', {})
+        recorded_outputs = marker.get('outputs', {})
+        if set(recorded_inputs) != set(inputs) or set(recorded_outputs) != set(outputs):
+            return False
+        # A file the stage rewrites in place is checked as an output only
+        if any(recorded_inputs[path] != file_hash(path) for path in inputs if path not in outputs):
+            return False
+        return all(self._is_current(path, recorded_outputs[path]) for path in outputs)
+
+    def complete(self, stage: str, input_hashes: Dict[str, Optional[str]], outputs: Sequence[str]):
+        """Record stage as complete; input_hashes are the hashes the stage started from"""
+        write_json_atomic(self._path(f"{stage}.json"), {
+            'stage': stage,
+            'run': self.run['run'],
+            'completed_at': _now(),
+            'inputs': input_hashes,
+            'outputs': {path: file_hash(path) for path in outputs},
+        }, indent=2)
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Local query API over the merged matchdays.
+
+Loads the merged records once (the binary snapshot when it is current),
+builds the analysis cube and per-dimension indexes in memory, and answers
+filtered aggregate queries without rerunning the analysis:
+
+  GET /query?group_by=season,competition&season=2024/2025&date_from=2024-08-01
+  GET /dimensions   dimension -> known values
+  GET /health       record count and data version
+
+Any cube dimension (see analysis_cube.DIMENSIONS) can be grouped by or
+filtered on; several values are comma separated (or the parameter is
+repeated) and 'null' matches records without a value. date_from / date_to
+(inclusive, YYYY-MM-DD) restrict the date range; anything but a valid date
+is a 400. Queries without a date range are rolled up from the cube's
+precomputed cells; with one, the rows in range are found by bisecting the
+date-sorted records and intersected with the dimension indexes. Only past
+matches are included, as in the analysis outputs.
+
+Every 200 response carries an ETag built from the data version and the
+normalised query (filter values sorted, dates in ISO form), so clients
+revalidate with If-None-Match and get a 304, without the query being run,
+until merged_matchdays.json changes (it is reloaded on the next request).
+When it cannot be loaded, requests are answered with 503.
+
+LocalQueryClient answers the same requests in-process, without a socket,
+as a stand-in for the server in tests; --stand-in serves synthetic data.
+
+Usage: python3 query_server.py [--input merged_matchdays.json] [--stand-in]
+
+Environment variables:
+  QUERY_SERVER_HOST / QUERY_SERVER_PORT   bind address (default 127.0.0.1:8766)
+"""
+import argparse
+import hashlib
+import json
+import os
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import date as date_cls, datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import analyze_matchdays
+from analysis_cube import DIMENSION_VALUES, DIMENSIONS, AnalysisCube, CubeCell
+from matchday_snapshot import load_merged_records, snapshot_path_for
+
+MERGED_FILE = 'merged_matchdays.json'
+RESERVED_PARAMS = {'group_by', 'date_from', 'date_to'}
+
+
+class QueryError(ValueError):
+    """A malformed query (answered with 400)"""
+
+
+def _parse_values(raw: str) -> List[Optional[str]]:
+    """Comma separated filter values, deduplicated and sorted ('null' first)"""
+    values = {None if value == 'null' else value for value in raw.split(',')}
+    return sorted(values, key=lambda v: (v is not None, v or ''))
+
+
+def _parse_date(name: str, raw: Optional[str]) -> Optional[str]:
+    if raw is None:
+        return None
+    if ',' in raw:
+        raise QueryError(f"{name} takes a single date")
+    try:
+        return date_cls.fromisoformat(raw).isoformat()
+    except ValueError:
+        raise QueryError(f"{name} is not a YYYY-MM-DD date: {raw}") from None
+
+
+def _cell_json(cell: CubeCell) -> Dict[str, Any]:
+    return {
+        'count': cell.count,
+        'sum': cell.sum,
+        'avg': round(cell.mean, 2) if cell.mean is not None else None,
+        'stddev': round(cell.stddev, 2) if cell.stddev is not None else None,
+        'min': cell.min,
+        'max': cell.max,
+        'missing': cell.missing,
+    }
+
+
+class QueryStore:
+    """Past records sorted by date, their cube and value -> row indexes per dimension"""
+
+    def __init__(self, records: Sequence[Dict[str, Any]], version: Optional[str] = None):
+        today = datetime.utcnow().date()
+        past = [r for r in records if not analyze_matchdays.is_future_date(r.get('date', ''), today)]
+        past.sort(key=lambda r: r.get('date', ''))
+        self.dates = [r.get('date', '') for r in past]
+        self.listeners = [r.get('listeners') for r in past]
+        self.keys = [tuple(DIMENSION_VALUES[d](r) for d in DIMENSIONS) for r in past]
+        self.cube = AnalysisCube().add_records(past)
+        self.indexes: Dict[str, Dict[Optional[str], List[int]]] = {d: {} for d in DIMENSIONS}
+        for row, key in enumerate(self.keys):
+            for dimension, value in zip(DIMENSIONS, key):
+                self.indexes[dimension].setdefault(value, []).append(row)
+        self.version = version or hashlib.sha256(
+            json.dumps(list(records), sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()[:16]
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def dimensions(self) -> Dict[str, List[Optional[str]]]:
+        return {d: self.cube.values(d) for d in DIMENSIONS}
+
+    def _rows(self, filters: Dict[str, List[Optional[str]]], date_from: Optional[str],
+              date_to: Optional[str]) -> Sequence[int]:
+        low = bisect_left(self.dates, date_from) if date_from else 0
+        high = bisect_right(self.dates, date_to) if date_to else len(self.dates)
+        rows: Optional[Set[int]] = None
+        # Smallest posting lists first, so the intersection shrinks quickly
+        postings = sorted(
+            ([row for value in wanted for row in self.indexes[d].get(value, ())] for d, wanted in filters.items()),
+            key=len,
+        )
+        for posting in postings:
+            in_range = {row for row in posting if low <= row < high}
+            rows = in_range if rows is None else rows & in_range
+            if not rows:
+                return []
+        return range(low, high) if rows is None else sorted(rows)
+
+    def query(self, group_by: Sequence[str] = (), filters: Optional[Dict[str, List[Optional[str]]]] = None,
+              date_from: Optional[str] = None, date_to: Optional[str] = None) -> Dict[str, Any]:
+        filters = filters or {}
+        unknown = [d for d in list(group_by) + list(filters) if d not in DIMENSIONS]
+        if unknown:
+            raise QueryError(f"Unknown dimension(s): {', '.join(unknown)} (expected {', '.join(DIMENSIONS)})")
+
+        grouped: Dict[Tuple[Optional[str], ...], CubeCell]
+        if date_from is None and date_to is None:
+            grouped = self.cube.rollup(group_by, **filters)
+        else:
+            positions = [DIMENSIONS.index(d) for d in group_by]
+            grouped = {}
+            for row in self._rows(filters, date_from, date_to):
+                group = tuple(self.keys[row][p] for p in positions)
+                cell = grouped.get(group)
+                if cell is None:
+                    cell = grouped[group] = CubeCell()
+                cell.add(self.listeners[row])
+
+        groups = sorted(grouped.items(), key=lambda item: [(v is not None, v or '') for v in item[0]])
+        return {
+            'group_by': list(group_by),
+            'filters': filters,
+            'date_from': date_from,
+            'date_to': date_to,
+            'groups': [{**dict(zip(group_by, key)), **_cell_json(cell)} for key, cell in groups],
+        }
+
+
+class QueryResponse(NamedTuple):
+    status: int
+    headers: Dict[str, str]
+    body: bytes
+
+    def json(self) -> Any:
+        return json.loads(self.body) if self.body else None
+
+
+class QueryService:
+    """Routes requests to a QueryStore, reloading it when the merged data changes"""
+
+    def __init__(self, input_file: Optional[str] = MERGED_FILE, store: Optional[QueryStore] = None):
+        self.input_file = input_file
+        self._store = store
+        self._stamp: Optional[Tuple[float, ...]] = None
+        self._lock = threading.Lock()
+
+    def _data_stamp(self) -> Optional[Tuple[float, ...]]:
+        stamps = []
+        for path in (self.input_file, snapshot_path_for(self.input_file)):
+            try:
+                stamps.append(os.path.getmtime(path))
+            except OSError:
+                stamps.append(0.0)
+        return tuple(stamps)
+
+    def store(self) -> QueryStore:
+        if self.input_file is None:
+            return self._store
+        with self._lock:
+            stamp = self._data_stamp()
+            if self._store is None or stamp != self._stamp:
+                self._store = QueryStore(load_merged_records(self.input_file))
+                self._stamp = stamp
+                print(f"[query_server] loaded {len(self._store)} past records (version {self._store.version})")
+            return self._store
+
+    def handle(self, path: str, headers: Optional[Dict[str, str]] = None) -> QueryResponse:
+        """Answer one GET request"""
+        headers = headers or {}
+        url = urlsplit(path)
+        # Repeated parameters merge like the comma form: season=a&season=b is season=a,b
+        params = {key: ','.join(values) for key, values in parse_qs(url.query).items()}
+        try:
+            store = self.store()
+        except (OSError, ValueError) as exc:
+            return self._json(503, {'message': f"Merged data unavailable: {exc}"})
+        try:
+            if url.path == '/query':
+                group_by = [d for d in params.get('group_by', '').split(',') if d]
+                filters = {key: _parse_values(value) for key, value in params.items() if key not in RESERVED_PARAMS}
+                date_from = _parse_date('date_from', params.get('date_from'))
+                date_to = _parse_date('date_to', params.get('date_to'))
+                normalised = {'group_by': group_by, 'filters': sorted(filters.items(), key=lambda item: item[0]),
+                              'date_from': date_from, 'date_to': date_to}
+            elif url.path in ('/dimensions', '/health'):
+                normalised = {}
+            else:
+                return self._json(404, {'message': 'Not Found'})
+        except QueryError as exc:
+            return self._json(400, {'message': str(exc)})
+
+        # The ETag only depends on the data version and the normalised query, so a 304 skips the query
+        canonical = f"{url.path}?{json.dumps(normalised, sort_keys=True)}"
+        etag = f'"{store.version}-{hashlib.sha1(canonical.encode("utf-8")).hexdigest()[:12]}"'
+        cache_headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+        if etag in [tag.strip() for tag in headers.get('If-None-Match', '').split(',')]:
+            return QueryResponse(304, cache_headers, b'')
+
+        if url.path == '/query':
+            try:
+                payload = store.query(group_by, filters, date_from, date_to)
+            except QueryError as exc:
+                return self._json(400, {'message': str(exc)})
+        elif url.path == '/dimensions':
+            payload = store.dimensions()
+        else:
+            payload = {'status': 'ok', 'records': len(store), 'version': store.version}
+        return self._json(200, payload, cache_headers)
+
+    @staticmethod
+    def _json(status: int, payload: Any, extra_headers: Optional[Dict[str, str]] = None) -> QueryResponse:
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        headers = {'Content-Type': 'application/json; charset=utf-8', **(extra_headers or {})}
+        return QueryResponse(status, headers, body)
+
+
+class LocalQueryClient:
+    """In-process stand-in for the HTTP server: same responses, no socket"""
+
+    def __init__(self, service: QueryService):
+        self.service = service
+
+    @classmethod
+    def from_records(cls, records: Sequence[Dict[str, Any]]) -> 'LocalQueryClient':
+        return cls(QueryService(input_file=None, store=QueryStore(records)))
+
+    def get(self, path: str, headers: Optional[Dict[str, str]] = None) -> QueryResponse:
+        return self.service.handle(path, headers)
+
+
+def make_handler(service: QueryService):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            response = service.handle(self.path, dict(self.headers.items()))
+            self.send_response(response.status)
+            for name, value in response.headers.items():
+                self.send_header(name, value)
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.send_header('Content-Length', str(len(response.body)))
+            self.end_headers()
+            self.wfile.write(response.body)
+
+        def log_message(self, format, *args):
+            print(f"[query_server] {self.address_string()} {format % args}")
+
+    return Handler
+
+
+def stand_in_records(scale: float = 1) -> List[Dict[str, Any]]:
+    """Synthetic merged records (same generators as the benchmark)"""
+    from fetch_google_sheet import parse_csv_data
+    from generate_synthetic_data import generate_daily_listeners, generate_sheet_csv
+    from merge_data import merge_data
+    return merge_data(generate_daily_listeners(scale), parse_csv_data(generate_sheet_csv(scale)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local query API over the merged matchdays")
+    parser.add_argument('--input', default=MERGED_FILE)
+    parser.add_argument('--stand-in', action='store_true', help="serve synthetic data instead of --input")
+    args = parser.parse_args()
+
+    host = os.environ.get('QUERY_SERVER_HOST', '127.0.0.1')
+    port = int(os.environ.get('QUERY_SERVER_PORT', '8766'))
+    if args.stand_in:
+        service = QueryService(input_file=None, store=QueryStore(stand_in_records()))
+    else:
+        service = QueryService(args.input)
+    store = service.store()
+
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    print(f"Query server listening on http://{host}:{port} ({len(store)} past records)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
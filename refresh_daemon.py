@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Resident refresh service for the dashboard data.
+
+Keeps the expensive parts of the pipeline warm between refreshes: imported
+modules, parsed sheet records (a tab is only re-parsed when its CSV changed),
+the listener history, match results, the standings history and the model
+registry. A refresh runs on a schedule and whenever a trigger arrives on the
+local HTTP endpoint:
+
+  POST /refresh   run the pipeline now (concurrent triggers are coalesced)
+  GET  /status    last run summary
+
+Environment variables:
+  REFRESH_DAEMON_HOST / REFRESH_DAEMON_PORT   bind address (default 127.0.0.1:8765)
+  REFRESH_DAEMON_TOKEN                         require 'Authorization: Bearer <token>'
+  REFRESH_INTERVAL_SECONDS                     scheduled refresh interval (default 3600, 0 = off)
+  LISTENER_REFRESH_SECONDS                     how often to refetch the allShows page (default 3600)
+  FOOTBALL_DATA_REFRESH_SECONDS                how often to refetch scores and new standings (default 21600)
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+import analyze_matchdays
+import fetch_google_sheet
+import instrumentation
+import merge_data
+import validation
+from listener_baseline import ListenerBaseline
+from listener_index import index_path_for, open_listener_index, write_listener_index
+from matchday_snapshot import snapshot_path_for, write_snapshot
+from model_registry import ModelRegistry
+from pipeline_state import atomic_write
+from seasons import seasons_for_dates
+from standings_history import StandingsHistory, update_history
+
+API_DATA_FILE = 'api_data_full.json'
+SHEET_DATA_FILE = 'google_sheet_data.json'
+MERGED_FILE = 'merged_matchdays.json'
+OUTPUT_DIR = 'dashboard/public/output'
+# Keep a stale refresh short: the rest of a standings backfill is picked up by later refreshes
+STANDINGS_REQUESTS_PER_REFRESH = 3
+
+
+def _env_seconds(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def listener_records(listeners: Dict[str, int]) -> List[Dict[str, Any]]:
+    """date -> listeners back in the api_data_full.json layout (newest first, as the allShows page lists them)"""
+    return [
+        {'date': f"{day}T00:00:00", 'date_parsed': f"{day}T00:00:00", 'listeners': value}
+        for day, value in sorted(listeners.items(), reverse=True)
+    ]
+
+
+class WarmState:
+    """Everything the pipeline would otherwise rebuild from scratch on each run"""
+
+    def __init__(self):
+        self.sheet_hashes: Dict[str, str] = {}
+        self.sheet_records: Dict[str, List[Dict[str, Any]]] = {}
+        self.listeners: Optional[Dict[str, int]] = None
+        self.listeners_loaded_at = 0.0
+        self.baseline = ListenerBaseline.load()
+        self.results_map: Optional[Dict] = None
+        self.results_range = (None, None)
+        self.standings = StandingsHistory.load()
+        self.football_data_loaded_at = 0.0
+        self.registry = ModelRegistry.load()
+        self.merged_hash: Optional[str] = None
+
+    def refresh_sheets(self) -> bool:
+        """Fetch every tab; re-parse only tabs whose CSV changed. Returns True if anything changed."""
+        if not self.sheet_records:
+            # Start from the last saved sheet data so a failed first fetch still has rows
+            for record in merge_data.load_sheet_data(SHEET_DATA_FILE):
+                self.sheet_records.setdefault(record.get('sheet_name', ''), []).append(record)
+        changed = False
+        for sheet_name in fetch_google_sheet.SHEET_NAMES:
+            try:
+                csv_content = fetch_google_sheet.fetch_google_sheet(sheet_name)
+            except Exception as exc:
+                print(f"  Warning: could not fetch {sheet_name} ({exc}); keeping cached rows")
+                continue
+            digest = hashlib.sha256(csv_content.encode('utf-8')).hexdigest()
+            if self.sheet_hashes.get(sheet_name) == digest:
+                continue
+            self.sheet_records[sheet_name] = fetch_google_sheet.parse_csv_data(csv_content, sheet_name=sheet_name)
+            self.sheet_hashes[sheet_name] = digest
+            changed = True
+        return changed
+
+    def refresh_listeners(self, max_age: int):
+        """Load the listener history once, then refetch the allShows page every max_age seconds"""
+        if self.listeners is None:
+            index = open_listener_index(API_DATA_FILE)
+            if index is not None:
+                self.listeners = {date: listeners for date, listeners in index.range('0001-01-01', '9999-12-31')}
+                index.close()
+            else:
+                self.listeners = merge_data.load_api_data(API_DATA_FILE)
+            self.listeners_loaded_at = time.time()
+        if time.time() - self.listeners_loaded_at >= max_age:
+            fresh = merge_data.fetch_fresh_api_data()
+            if fresh:
+                self.listeners.update(fresh)
+                # The JSON first: the index is only used while it is at least as new
+                with atomic_write(API_DATA_FILE) as f:
+                    json.dump(listener_records(self.listeners), f, indent=2)
+                write_listener_index(self.listeners, index_path_for(API_DATA_FILE))
+            self.listeners_loaded_at = time.time()
+
+    def refresh_football_data(self, sheet_data: List[Dict[str, Any]], max_age: int) -> bool:
+        """
+        Match scores (refetched when stale or the sheet date range grew) and
+        missing standings snapshots (when stale). Returns True if the
+        standings history gained snapshots.
+        """
+        date_range = merge_data.sheet_date_range(sheet_data)
+        stale = time.time() - self.football_data_loaded_at >= max_age
+        if self.results_map is None or stale or date_range != self.results_range:
+            date_from, date_to = date_range
+            self.results_map = merge_data.fetch_ajax_match_results(date_from, date_to) if date_from and date_to else {}
+            self.results_range = date_range
+        added = 0
+        if stale:
+            seasons = [int(season[:4]) for season in seasons_for_dates(r.get('date') for r in sheet_data)]
+            added = update_history(self.standings, seasons, max_requests=STANDINGS_REQUESTS_PER_REFRESH)
+            if added:
+                self.standings.save()
+            self.football_data_loaded_at = time.time()
+        return added > 0
+
+
+class RefreshService:
+    def __init__(self):
+        self.state = WarmState()
+        self.lock = threading.Lock()
+        self.last_run: Dict[str, Any] = {}
+        self.listener_max_age = _env_seconds('LISTENER_REFRESH_SECONDS', 3600)
+        self.football_max_age = _env_seconds('FOOTBALL_DATA_REFRESH_SECONDS', 21600)
+
+    def refresh(self) -> Dict[str, Any]:
+        """Run the pipeline once; a trigger arriving mid-run waits and reuses that run's result"""
+        requested_at = time.time()
+        with self.lock:
+            if self.last_run.get('started') and self.last_run['started'] >= requested_at:
+                return self.last_run
+            return self._run()
+
+    def _run(self) -> Dict[str, Any]:
+        instrumentation.reset()
+        started = time.time()
+        state = self.state
+        status = 'error'
+        summary: Dict[str, Any] = {'started': started}
+        try:
+            sheets_changed = state.refresh_sheets()
+            sheet_data = fetch_google_sheet.combine_sheet_records(state.sheet_records)
+            if not sheet_data:
+                raise RuntimeError("No Google Sheets data available")
+            if sheets_changed:
+                with atomic_write(SHEET_DATA_FILE) as f:
+                    json.dump({
+                        'metadata': fetch_google_sheet.analyze_sheet_structure(sheet_data),
+                        'all_data': sheet_data,
+                        'sheets_fetched': list(state.sheet_records.keys())
+                    }, f, indent=2, default=str, ensure_ascii=False)
+
+            state.refresh_listeners(self.listener_max_age)
+            standings_changed = state.refresh_football_data(sheet_data, self.football_max_age)
+
+            report = validation.run_validation(sheet_data, state.listeners, history=state.standings)
+            summary['validation'] = {check: result['count'] for check, result in report['checks'].items()}
+            merged = merge_data.merge_data(state.listeners, sheet_data, results_map=state.results_map,
+                                           baseline=state.baseline)
+            state.baseline.save()
+            merged_json = json.dumps(merged, indent=2, ensure_ascii=False)
+            merged_hash = hashlib.sha256(merged_json.encode('utf-8')).hexdigest()
+            merged_changed = merged_hash != state.merged_hash or not os.path.exists(MERGED_FILE)
+            if merged_changed:
+                with atomic_write(MERGED_FILE) as f:
+                    f.write(merged_json)
+                write_snapshot(merged, snapshot_path_for(MERGED_FILE))
+                state.merged_hash = merged_hash
+            if merged_changed or standings_changed:
+                # run_analysis annotates records in place, so hand it its own copy
+                analyze_matchdays.run_analysis(json.loads(merged_json), OUTPUT_DIR,
+                                               standings=state.standings,
+                                               registry=state.registry)
+                summary['outputs_updated'] = True
+            else:
+                summary['outputs_updated'] = False
+            summary['records'] = len(merged)
+            status = 'ok'
+        except Exception as exc:
+            summary['error'] = str(exc)
+            print(f"Refresh failed: {exc}")
+        finally:
+            summary['status'] = status
+            summary['seconds'] = round(time.time() - started, 3)
+            summary['finished_at'] = datetime.now().isoformat(timespec='seconds')
+            instrumentation.write_run_report('refresh_daemon', status)
+            self.last_run = summary
+        return summary
+
+    def run_schedule(self, interval: int):
+        while True:
+            self.refresh()
+            time.sleep(interval)
+
+
+def make_handler(service: RefreshService, token: Optional[str]):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status: int, payload: Dict[str, Any]):
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _authorized(self) -> bool:
+            return not token or self.headers.get('Authorization') == f"Bearer {token}"
+
+        def do_GET(self):
+            if self.path != '/status':
+                return self._send(404, {'message': 'Not Found'})
+            if not self._authorized():
+                return self._send(401, {'message': 'Unauthorized'})
+            self._send(200, service.last_run)
+
+        def do_POST(self):
+            if self.path != '/refresh':
+                return self._send(404, {'message': 'Not Found'})
+            if not self._authorized():
+                return self._send(401, {'message': 'Unauthorized'})
+            summary = service.refresh()
+            self._send(200 if summary.get('status') == 'ok' else 500, summary)
+
+        def log_message(self, format, *args):
+            print(f"[refresh_daemon] {self.address_string()} {format % args}")
+
+    return Handler
+
+
+def main():
+    host = os.environ.get('REFRESH_DAEMON_HOST', '127.0.0.1')
+    port = _env_seconds('REFRESH_DAEMON_PORT', 8765)
+    interval = _env_seconds('REFRESH_INTERVAL_SECONDS', 3600)
+    token = os.environ.get('REFRESH_DAEMON_TOKEN')
+
+    service = RefreshService()
+    if interval > 0:
+        threading.Thread(target=service.run_schedule, args=(interval,), daemon=True).start()
+    else:
+        service.refresh()
+
+    server = ThreadingHTTPServer((host, port), make_handler(service, token))
+    print(f"Refresh daemon listening on http://{host}:{port} (interval: {interval or 'off'}s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Run the fetch -> merge -> scores -> analyze -> podcast chain with checkpoints,
+resuming after a failure.
+
+Every stage runs the main() of its script in this process. When it returns,
+the stage's outputs must have been rewritten (the scripts report most errors
+by printing them, so a stage that wrote nothing failed), and a completion
+marker with the hashes of its inputs and outputs goes to .pipeline_state/
+(see pipeline_state.py). A run that fails stays open: the next invocation
+skips the stages already completed in it, as long as their files are
+unchanged, and resumes from the first incomplete one, so a failed merge does
+not refetch the sheets and the listener history. Once every stage completed,
+the next invocation starts a new run. The scores stage rewrites
+merged_matchdays.json in place; the merge stage still counts as complete
+after it (see pipeline_state.Checkpoints.is_complete).
+
+Usage:
+  python3 run_pipeline.py                 resume the open run, or start a new one
+  python3 run_pipeline.py --fresh         start a new run
+  python3 run_pipeline.py --from merge    rerun from a stage, keeping the earlier ones of the last run
+  python3 run_pipeline.py --status        show the current run's stages
+"""
+import argparse
+import importlib
+import os
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from instrumentation import run_main, stage
+from pipeline_state import Checkpoints, file_hash
+
+
+class Stage(NamedTuple):
+    name: str
+    module: str  # script whose main() runs the stage
+    inputs: Tuple[str, ...]
+    outputs: Tuple[str, ...]
+    optional_inputs: Tuple[str, ...] = ()  # hashed like inputs, but may be missing
+
+
+STAGES = [
+    Stage('fetch_sheet', 'fetch_google_sheet', (), ('google_sheet_data.json',)),
+    Stage('fetch_listeners', 'fetch_full_api_data', (), ('api_data_full.json',)),
+    Stage('merge', 'merge_data', ('api_data_full.json', 'google_sheet_data.json'), ('merged_matchdays.json',)),
+    Stage('scores', 'fetch_match_scores', ('merged_matchdays.json',), ('merged_matchdays.json',),
+          optional_inputs=('match_scores.json',)),
+    Stage('analyze', 'analyze_matchdays', ('merged_matchdays.json',), ('dashboard/public/output/all_matches.json',)),
+    Stage('podcast', 'fetch_transistor_podcast', (), ('dashboard/public/output/podcast_episodes.json',)),
+]
+STAGE_NAMES = [step.name for step in STAGES]
+
+
+def _stamp(path: str) -> Optional[Tuple[int, int]]:
+    """(inode, mtime) of path; atomic writes replace the file, so both change on every write"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_ino, st.st_mtime_ns
+
+
+def is_complete(checkpoints: Checkpoints, step: Stage) -> bool:
+    return checkpoints.is_complete(step.name, step.inputs + step.optional_inputs, step.outputs)
+
+
+def run_stage(checkpoints: Checkpoints, step: Stage):
+    missing = [path for path in step.inputs if not os.path.exists(path)]
+    if missing:
+        raise RuntimeError(f"Stage {step.name}: missing input {', '.join(missing)}")
+    input_hashes: Dict[str, Optional[str]] = {path: file_hash(path) for path in step.inputs + step.optional_inputs}
+    before = {path: _stamp(path) for path in step.outputs}
+    with stage(f"pipeline {step.name}"):
+        importlib.import_module(step.module).main()
+    unwritten = [path for path in step.outputs if _stamp(path) is None or _stamp(path) == before[path]]
+    if unwritten:
+        raise RuntimeError(f"Stage {step.name} did not write {', '.join(unwritten)}")
+    checkpoints.complete(step.name, input_hashes, step.outputs)
+
+
+def print_status(checkpoints: Checkpoints):
+    run = checkpoints.run
+    if run is None:
+        print("No pipeline run yet")
+        return
+    state = f"finished {run['finished_at']}" if run.get('finished_at') else 'incomplete'
+    print(f"Run {run['run']} started {run['started_at']} ({state})")
+    for step in STAGES:
+        marker = checkpoints.marker(step.name) or {}
+        if is_complete(checkpoints, step):
+            print(f"  ✓ {step.name:16s} {marker['completed_at']}")
+        elif marker.get('run') == run['run']:
+            print(f"  ✗ {step.name:16s} files changed since {marker['completed_at']}")
+        else:
+            print(f"  · {step.name:16s} pending")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the data pipeline with checkpoints")
+    parser.add_argument('--fresh', action='store_true', help="start a new run instead of resuming")
+    parser.add_argument('--from', dest='from_stage', choices=STAGE_NAMES, help="rerun from this stage")
+    parser.add_argument('--status', action='store_true', help="show the current run and exit")
+    args = parser.parse_args()
+
+    checkpoints = Checkpoints()
+    if args.status:
+        print_status(checkpoints)
+        return
+
+    # --from reopens the last run even when it finished, so the stages before it are not repeated
+    reopen = args.from_stage is not None
+    resuming = (checkpoints.resuming or (reopen and checkpoints.run is not None)) and not args.fresh
+    run = checkpoints.start(fresh=args.fresh, reopen=reopen)
+    print(f"{'Resuming' if resuming else 'Starting'} pipeline run {run['run']}")
+    rerun_from = STAGE_NAMES.index(args.from_stage) if args.from_stage else len(STAGES)
+    skipping = resuming
+    for index, step in enumerate(STAGES):
+        if skipping and index < rerun_from and is_complete(checkpoints, step):
+            print(f"  ✓ {step.name} (already completed in this run)")
+            continue
+        # Every stage after the first incomplete one runs again
+        skipping = False
+        print(f"\n{'=' * 60}\nStage {step.name} ({step.module}.py)\n{'=' * 60}")
+        run_stage(checkpoints, step)
+    checkpoints.finish()
+    print(f"\n✓ Pipeline run {run['run']} complete")
+
+
+if __name__ == '__main__':
+    run_main(main, 'run_pipeline')
@@ -0,0 +1,37 @@
+"""
+Football season helpers. A season runs from 1 July to 30 June and is
+labelled 'YYYY/YYYY', e.g. 2025-02-09 falls in '2024/2025'.
+"""
+import re
+from typing import Iterable, List, Optional, Tuple
+
+SEASON_START_MONTH = 7
+
+_SEASON_PATTERN = re.compile(r'^(\d{4})/(\d{4})$')
+
+
+def season_for_date(date_str: Optional[str]) -> Optional[str]:
+    """'YYYY-MM-DD' -> season label, or None for a missing/invalid date"""
+    if not date_str or len(date_str) < 7:
+        return None
+    try:
+        year = int(date_str[:4])
+        month = int(date_str[5:7])
+    except ValueError:
+        return None
+    start_year = year if month >= SEASON_START_MONTH else year - 1
+    return f"{start_year}/{start_year + 1}"
+
+
+def season_bounds(season: str) -> Optional[Tuple[str, str]]:
+    """'2024/2025' -> ('2024-07-01', '2025-06-30'); None if not a season label"""
+    match = _SEASON_PATTERN.match(season or '')
+    if not match or int(match.group(2)) != int(match.group(1)) + 1:
+        return None
+    start_year = int(match.group(1))
+    return f"{start_year}-07-01", f"{start_year + 1}-06-30"
+
+
+def seasons_for_dates(dates: Iterable[Optional[str]]) -> List[str]:
+    """Sorted seasons that occur in the given dates"""
+    return sorted({season for season in map(season_for_date, dates) if season})
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Locally persisted Eredivisie standings history, one snapshot per matchday.
+
+Each snapshot is the table after a completed matchday, dated on the last day
+that matchday was played. The analysis joins every match to the opponent's
+position on its date (the latest snapshot strictly before it, so the result
+of the match itself never leaks in) and reads only standings_history.json;
+fetching new snapshots is a separate step:
+
+  python3 standings_history.py [--seasons 2024 2025] [--max-requests 8]
+
+Without --seasons the seasons in merged_matchdays.json are used. Missing
+matchdays are fetched oldest first, paced for football-data.org's free tier
+(10 requests a minute), so a long backfill completes over several runs.
+"""
+import argparse
+import json
+import os
+import time
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import requests
+
+from instrumentation import instrument, record_bytes, run_main, stage
+from merge_data import normalize_team_name
+from pipeline_state import write_json_atomic
+
+HISTORY_FILE = 'standings_history.json'
+COMPETITION = 'DED'
+API_BASE = 'https://api.football-data.org/v4'
+REQUEST_INTERVAL_SECONDS = 6.5
+DEFAULT_MAX_REQUESTS = 8
+
+UNFINISHED_STATUSES = {'SCHEDULED', 'TIMED', 'IN_PLAY', 'PAUSED', 'SUSPENDED'}
+
+
+def table_positions(table: List[Dict[str, Any]]) -> Dict[str, int]:
+    """[{'position', 'team'}] -> normalized team name -> position"""
+    positions = {}
+    for row in table:
+        normalized = normalize_team_name(row.get('team') or '')
+        if normalized and isinstance(row.get('position'), int):
+            positions[normalized] = row['position']
+    return positions
+
+
+class StandingsHistory:
+    """Standings snapshots sorted by date, with as-of lookups"""
+
+    def __init__(self, snapshots: Optional[List[Dict[str, Any]]] = None):
+        self.snapshots: List[Dict[str, Any]] = sorted(snapshots or [], key=lambda s: s['date'])
+        self._reindex()
+
+    def _reindex(self):
+        self._dates = [snapshot['date'] for snapshot in self.snapshots]
+        self._positions = [table_positions(snapshot.get('table', [])) for snapshot in self.snapshots]
+
+    @classmethod
+    def load(cls, path: str = HISTORY_FILE) -> 'StandingsHistory':
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                payload = json.load(f)
+        except FileNotFoundError:
+            return cls()
+        return cls(payload.get('snapshots', []))
+
+    def save(self, path: str = HISTORY_FILE):
+        write_json_atomic(path, {'competition': COMPETITION, 'snapshots': self.snapshots}, indent=2, ensure_ascii=False)
+
+    def __len__(self) -> int:
+        return len(self.snapshots)
+
+    def add_snapshot(self, date_str: str, table: List[Dict[str, Any]],
+                     season: Optional[int] = None, matchday: Optional[int] = None):
+        """Add (or replace) the snapshot for a season/matchday, or for a date when those are unknown"""
+        snapshot = {'date': date_str, 'season': season, 'matchday': matchday, 'table': table}
+        self.snapshots = [
+            s for s in self.snapshots
+            if not ((season is not None and (s.get('season'), s.get('matchday')) == (season, matchday))
+                    or (season is None and s['date'] == date_str))
+        ]
+        self.snapshots.append(snapshot)
+        self.snapshots.sort(key=lambda s: s['date'])
+        self._reindex()
+
+    def known_matchdays(self) -> Set[Tuple[int, int]]:
+        return {(s['season'], s['matchday']) for s in self.snapshots if s.get('season') is not None}
+
+    def positions_as_of(self, date_str: Optional[str]) -> Dict[str, int]:
+        """Table (normalized team -> position) from the last snapshot before date_str"""
+        if not date_str:
+            return {}
+        index = bisect_left(self._dates, date_str[:10]) - 1
+        return self._positions[index] if index >= 0 else {}
+
+    def position(self, team: Optional[str], date_str: Optional[str]) -> Optional[int]:
+        if not team:
+            return None
+        return self.positions_as_of(date_str).get(normalize_team_name(team))
+
+
+def _api_get(path: str, token: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    response = requests.get(f"{API_BASE}{path}", headers={"X-Auth-Token": token}, params=params, timeout=20)
+    response.raise_for_status()
+    record_bytes(len(response.content))
+    return response.json()
+
+
+@instrument()
+def fetch_completed_matchdays(token: str, season: int) -> Dict[int, str]:
+    """matchday -> date its last match was played, for matchdays with nothing left to play"""
+    payload = _api_get(f"/competitions/{COMPETITION}/matches", token, params={"season": season})
+    last_dates: Dict[int, str] = {}
+    unfinished: Set[int] = set()
+    for match in payload.get("matches", []) or []:
+        matchday = match.get("matchday")
+        if not isinstance(matchday, int):
+            continue
+        if match.get("status") in UNFINISHED_STATUSES:
+            unfinished.add(matchday)
+        elif match.get("status") == "FINISHED" and match.get("utcDate"):
+            day = match["utcDate"][:10]
+            last_dates[matchday] = max(last_dates.get(matchday, day), day)
+    return {matchday: day for matchday, day in last_dates.items() if matchday not in unfinished}
+
+
+@instrument()
+def fetch_matchday_table(token: str, season: int, matchday: int) -> List[Dict[str, Any]]:
+    """Total table after a matchday, as [{'position', 'team'}]"""
+    payload = _api_get(f"/competitions/{COMPETITION}/standings", token,
+                       params={"season": season, "matchday": matchday})
+    standings = payload.get("standings", [])
+    total = next((s for s in standings if s.get("type") == "TOTAL"), None)
+    table = []
+    for row in (total or {}).get("table", []):
+        team = row.get("team", {}) or {}
+        name = team.get("shortName") or team.get("name") or team.get("tla")
+        if isinstance(row.get("position"), int) and name:
+            table.append({"position": row["position"], "team": name})
+    return table
+
+
+def update_history(history: StandingsHistory, seasons: Iterable[int],
+                   max_requests: int = DEFAULT_MAX_REQUESTS,
+                   request_interval: float = REQUEST_INTERVAL_SECONDS) -> int:
+    """Fetch missing matchday snapshots (oldest first); returns how many were added"""
+    token = os.environ.get("FOOTBALL_DATA_TOKEN")
+    if not token:
+        print("  FOOTBALL_DATA_TOKEN not set. Skipping standings history update.")
+        return 0
+
+    requests_made = 0
+    added = 0
+    known = history.known_matchdays()
+
+    def pace():
+        nonlocal requests_made
+        if requests_made:
+            time.sleep(request_interval)
+        requests_made += 1
+
+    try:
+        for season in sorted(seasons):
+            if requests_made >= max_requests:
+                break
+            pace()
+            completed = fetch_completed_matchdays(token, season)
+            for matchday in sorted(completed):
+                if (season, matchday) in known:
+                    continue
+                if requests_made >= max_requests:
+                    break
+                pace()
+                table = fetch_matchday_table(token, season, matchday)
+                if table:
+                    history.add_snapshot(completed[matchday], table, season=season, matchday=matchday)
+                    added += 1
+    except (requests.RequestException, ValueError) as exc:
+        print(f"  Warning: standings history update stopped ({exc})")
+    return added
+
+
+def seasons_in_merged_data(path: str = 'merged_matchdays.json') -> List[int]:
+    """Season start years covered by the merged matchdays"""
+    from matchday_snapshot import load_merged_records
+    from seasons import seasons_for_dates
+    try:
+        records = load_merged_records(path)
+    except (OSError, ValueError):
+        return []
+    return [int(season[:4]) for season in seasons_for_dates(r.get('date') for r in records)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fetch missing Eredivisie matchday standings")
+    parser.add_argument('--seasons', type=int, nargs='+', help="season start years (default: from merged data)")
+    parser.add_argument('--max-requests', type=int, default=DEFAULT_MAX_REQUESTS)
+    parser.add_argument('--history', default=HISTORY_FILE)
+    args = parser.parse_args()
+
+    seasons = args.seasons or seasons_in_merged_data()
+    history = StandingsHistory.load(args.history)
+    print(f"Standings history: {len(history)} snapshots; updating seasons {', '.join(map(str, seasons)) or '-'}")
+    added = update_history(history, seasons, args.max_requests)
+    if added:
+        with stage('write standings_history') as s:
+            history.save(args.history)
+            s.add_records(len(history))
+    print(f"✓ Added {added} snapshots ({len(history)} total)")
+
+
+if __name__ == '__main__':
+    run_main(main, 'standings_history')
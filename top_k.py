@@ -0,0 +1,131 @@
+"""
+Bounded-heap top-k, overall and per slice.
+
+TopK keeps the k highest-scoring items seen so far in a min-heap of size k,
+so adding an item is O(log k) and nothing is ever sorted beyond k entries.
+SlicedTopK keeps one TopK per (slice, value) for several slicing functions
+(season, competition, commentator, ...) and fills them all in one pass.
+Both are incremental: add() new items at any time, or merge() a board built
+over a new batch, and the leaderboards stay exact.
+
+Ties are broken by arrival order (earlier first), which matches a stable
+descending sort of the same items.
+"""
+import heapq
+from itertools import count
+from typing import Any, Callable, Dict, Generic, Hashable, Iterable, List, Optional, Tuple, TypeVar
+
+T = TypeVar('T')
+
+
+class TopK(Generic[T]):
+    """The k highest-scoring items seen so far"""
+
+    __slots__ = ('k', '_heap', '_arrivals')
+
+    def __init__(self, k: int):
+        if k < 1:
+            raise ValueError("k must be at least 1")
+        self.k = k
+        # (score, -sequence, item): the root is the weakest entry; later arrivals lose ties
+        self._heap: List[Tuple[Any, int, T]] = []
+        self._arrivals = count()
+
+    def push(self, score: Any, item: T, sequence: Optional[int] = None) -> bool:
+        """
+        Offer an item; returns True if it is (for now) in the top k. Sequence
+        numbers must be unique (they default to this board's arrival order).
+        """
+        if sequence is None:
+            sequence = next(self._arrivals)
+        entry = (score, -sequence, item)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+            return True
+        root = self._heap[0]
+        if (score, -sequence) > (root[0], root[1]):
+            heapq.heapreplace(self._heap, entry)
+            return True
+        return False
+
+    def entries(self) -> List[Tuple[Any, int, T]]:
+        """(score, sequence, item), best first"""
+        ordered = sorted(self._heap, key=lambda entry: (entry[0], entry[1]), reverse=True)
+        return [(score, -negative_sequence, item) for score, negative_sequence, item in ordered]
+
+    def items(self) -> List[T]:
+        """Items, best first"""
+        return [item for _, _, item in self.entries()]
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+
+class SlicedTopK(Generic[T]):
+    """
+    Top k items per slice value. `slices` maps a slice name to a function
+    returning the item's values for that slice (a list, so one match can
+    count for each of its commentators); None values are skipped, as are
+    items whose score is None.
+    """
+
+    def __init__(self, k: int, slices: Dict[str, Callable[[T], Iterable[Optional[Hashable]]]],
+                 score: Callable[[T], Any]):
+        self.k = k
+        self.slices = slices
+        self.score = score
+        self.overall: TopK[T] = TopK(k)
+        self._boards: Dict[str, Dict[Hashable, TopK[T]]] = {name: {} for name in slices}
+        self._sequence = count()
+
+    def add(self, item: T, score: Any = None, sequence: Optional[int] = None):
+        score = self.score(item) if score is None else score
+        if score is None:
+            return
+        sequence = next(self._sequence) if sequence is None else sequence
+        self.overall.push(score, item, sequence)
+        for name, values_of in self.slices.items():
+            boards = self._boards[name]
+            for value in set(v for v in values_of(item) if v is not None):
+                board = boards.get(value)
+                if board is None:
+                    board = boards[value] = TopK(self.k)
+                board.push(score, item, sequence)
+
+    def add_all(self, items: Iterable[T]) -> 'SlicedTopK[T]':
+        for item in items:
+            self.add(item)
+        return self
+
+    def merge(self, other: 'SlicedTopK[T]'):
+        """Fold in a board built over later items (e.g. a new batch of matches)"""
+        if set(other.slices) != set(self.slices):
+            raise ValueError("Cannot merge boards with different slices")
+        offset = next(self._sequence)
+        latest = offset
+        for score, sequence, item in other.overall.entries():
+            self.overall.push(score, item, offset + sequence)
+            latest = max(latest, offset + sequence)
+        for name, boards in other._boards.items():
+            for value, board in boards.items():
+                target = self._boards[name].get(value)
+                if target is None:
+                    target = self._boards[name][value] = TopK(self.k)
+                for score, sequence, item in board.entries():
+                    target.push(score, item, offset + sequence)
+                    latest = max(latest, offset + sequence)
+        self._sequence = count(latest + 1)
+
+    def top(self, slice_name: str, value: Hashable) -> List[T]:
+        board = self._boards[slice_name].get(value)
+        return board.items() if board is not None else []
+
+    def values(self, slice_name: str) -> List[Hashable]:
+        return sorted(self._boards[slice_name], key=str)
+
+    def leaderboards(self) -> Dict[str, Dict[Hashable, List[T]]]:
+        """slice -> value -> items, best first"""
+        return {
+            name: {value: self.top(name, value) for value in self.values(name)}
+            for name in self.slices
+        }
@@ -0,0 +1,88 @@
+"""
+TV channel categories from a rules file (tv_channel_rules.json).
+
+  {"categories": ["Half-open", "Open", "Paid"],   output order
+   "default": "Paid",                             when no rule matches
+   "rules": [{"category": "Half-open", "contains": ["ZIGGO"]},
+             {"category": "Open", "equals": ["ESPN", "ESPN1"], "ignore_spaces": true}]}
+
+Channel names are compared stripped and upper-cased (patterns are
+normalised the same way); a rule matches on "equals", "prefix" or
+"contains" and the first matching rule wins. "ignore_spaces" also drops
+the spaces, so "ESPN 1" equals "ESPN1". The rules are compiled once into
+an exact-match table plus one regex per rule, and every distinct raw
+channel string is classified once, so adding a broadcaster is a change to
+the rules file only.
+
+TV_CHANNEL_RULES overrides the rules file path.
+"""
+import json
+import os
+import re
+from typing import Any, Dict, Iterable, List, Optional
+
+RULES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tv_channel_rules.json')
+MATCH_KINDS = ('equals', 'prefix', 'contains')
+
+
+def _normalize(channel: str, ignore_spaces: bool = False) -> str:
+    value = channel.strip().upper()
+    return value.replace(' ', '') if ignore_spaces else value
+
+
+class TvChannelClassifier:
+    """Compiled channel rules with a per-channel memo"""
+
+    def __init__(self, rules: Dict[str, Any]):
+        self.categories: List[str] = list(rules.get('categories', []))
+        self.default: Optional[str] = rules.get('default')
+        known = set(self.categories)
+        # (ignore_spaces, exact table, regex or None) per rule, in priority order
+        self._rules = []
+        for position, rule in enumerate(rules.get('rules', []), 1):
+            category = rule.get('category')
+            if known and category not in known:
+                raise ValueError(f"TV channel rule {position}: unknown category {category!r}")
+            if not any(rule.get(kind) for kind in MATCH_KINDS):
+                raise ValueError(f"TV channel rule {position}: expected one of {', '.join(MATCH_KINDS)}")
+            ignore_spaces = bool(rule.get('ignore_spaces'))
+            exact = {_normalize(pattern, ignore_spaces): category for pattern in rule.get('equals', [])}
+            alternatives = [f"^{re.escape(_normalize(p, ignore_spaces))}" for p in rule.get('prefix', [])]
+            alternatives += [re.escape(_normalize(p, ignore_spaces)) for p in rule.get('contains', [])]
+            pattern = re.compile('|'.join(alternatives)) if alternatives else None
+            self._rules.append((ignore_spaces, exact, pattern, category))
+        if known and self.default is not None and self.default not in known:
+            raise ValueError(f"TV channel rules: unknown default category {self.default!r}")
+        self._memo: Dict[str, Optional[str]] = {}
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> 'TvChannelClassifier':
+        path = path or os.environ.get('TV_CHANNEL_RULES') or RULES_FILE
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def _match(self, channel: str) -> Optional[str]:
+        normalized = {False: _normalize(channel), True: _normalize(channel, True)}
+        for ignore_spaces, exact, pattern, category in self._rules:
+            value = normalized[ignore_spaces]
+            if value in exact or (pattern is not None and pattern.search(value)):
+                return category
+        return self.default
+
+    def classify(self, channel: Optional[str]) -> Optional[str]:
+        """Category of a raw channel name; None for a missing or empty one"""
+        if not channel:
+            return None
+        category = self._memo.get(channel)
+        if category is None and channel not in self._memo:
+            category = self._memo[channel] = self._match(channel)
+        return category
+
+    def classify_all(self, channels: Iterable[Optional[str]]) -> List[Optional[str]]:
+        """classify() for every channel in one call"""
+        classify = self.classify
+        return [classify(channel) for channel in channels]
+
+    def order(self, category: Optional[str]) -> int:
+        """Position of category in the configured output order (unknown ones last)"""
+        return self.categories.index(category) if category in self.categories else len(self.categories)
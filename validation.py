@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Data-quality checks on the merge inputs (sheet records and daily listeners).
+
+merge_data.merge_data drops rows it cannot use without saying so; this stage
+runs before every merge and reports them, together with rows that merge but
+look wrong. The sheet records are read once into columns and every check
+runs over those columns:
+
+  date_range            date missing, unparseable or outside DATE_MIN..today+DATE_MAX_AHEAD_DAYS
+  duplicate_key         (date, match) seen before (merge keeps the first)
+  missing_commentators  no commentators (merge drops the row)
+  score_format          score not 'N-N' after merge's normalisation
+  listener_outlier      match-day listeners negative, or more than OUTLIER_RATIO times
+                        above/below the median of the previous ROLLING_WINDOW match days
+  unknown_team          league opponent whose normalised name is neither in
+                        merge_data.TEAM_ALIASES nor in the standings history, so it
+                        gets no opponent position
+
+The report (validation_report.json, not deployed with the dashboard outputs) is compact:
+a count per check plus the first MAX_EXAMPLES offending rows.
+
+Usage: python3 validation.py [--strict]   (exit status 1 on any issue with --strict)
+"""
+import argparse
+import os
+import re
+import sys
+from bisect import insort
+from datetime import date, datetime, timedelta
+from statistics import median
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Set
+
+from instrumentation import run_main, stage
+from merge_data import (
+    TEAM_ALIASES, extract_commentators, extract_opponent, load_api_data, load_sheet_data, normalize_score,
+    normalize_team_name,
+)
+from pipeline_state import write_json_atomic
+from standings_history import StandingsHistory, table_positions
+
+REPORT_PATH = 'validation_report.json'
+CHECKS = ('date_range', 'duplicate_key', 'missing_commentators', 'score_format', 'listener_outlier', 'unknown_team')
+DATE_MIN = '2000-01-01'
+DATE_MAX_AHEAD_DAYS = 400
+ROLLING_WINDOW = 10
+MIN_BASELINE = 5
+OUTLIER_RATIO = 3.0
+MAX_EXAMPLES = 10
+LEAGUE_PATTERN = re.compile(r'eredivisie', re.IGNORECASE)
+
+_SCORE_PATTERN = re.compile(r'^\d{1,2}-\d{1,2}$')
+
+
+def known_teams(history: Optional[StandingsHistory] = None) -> Set[str]:
+    """Normalised names of every team an opponent position can be found for"""
+    teams = set(TEAM_ALIASES.values())
+    for snapshot in (history.snapshots if history is not None else []):
+        teams.update(table_positions(snapshot.get('table', [])))
+    return teams
+
+
+def _date_key(value: Any) -> Optional[str]:
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').strftime('%Y-%m-%d')
+    except (TypeError, ValueError):
+        return None
+
+
+class _Findings:
+    def __init__(self):
+        self.counts = {check: 0 for check in CHECKS}
+        self.examples: Dict[str, List[Dict[str, Any]]] = {check: [] for check in CHECKS}
+
+    def add(self, check: str, row: int, date_value: Any, match: Any, detail: str):
+        self.counts[check] += 1
+        if len(self.examples[check]) < MAX_EXAMPLES:
+            self.examples[check].append({'row': row, 'date': date_value, 'match': match, 'detail': detail})
+
+
+def validate_inputs(sheet_data: Sequence[Dict[str, Any]], listeners: Mapping[str, int],
+                    teams: Optional[Set[str]] = None, today: Optional[date] = None) -> Dict[str, Any]:
+    """Run every check over the sheet records and the daily listeners; returns the report"""
+    today = today or datetime.utcnow().date()
+    teams = known_teams() if teams is None else teams
+    latest = (today + timedelta(days=DATE_MAX_AHEAD_DAYS)).isoformat()
+
+    # One pass to build the columns the checks read
+    raw_dates = [record.get('date', '') for record in sheet_data]
+    date_keys = [_date_key(value) for value in raw_dates]
+    matches = [record.get('match', '') or record.get('show_name', '') for record in sheet_data]
+    scores = [normalize_score(record.get('uitslag', '')) for record in sheet_data]
+    competitions = [record.get('competition', '') or record.get('content_type', '') or '' for record in sheet_data]
+    has_commentators = [bool(extract_commentators(record)) for record in sheet_data]
+
+    findings = _Findings()
+    seen = set()
+    merged_rows = []  # rows merge_data keeps, in input order
+    for row, date_key in enumerate(date_keys):
+        if date_key is None:
+            findings.add('date_range', row, raw_dates[row], matches[row], 'missing or unparseable date')
+            continue
+        if not DATE_MIN <= date_key <= latest:
+            findings.add('date_range', row, date_key, matches[row], f'outside {DATE_MIN}..{latest}')
+        key = (date_key, matches[row])
+        if key in seen:
+            findings.add('duplicate_key', row, date_key, matches[row], 'duplicate (date, match)')
+            continue
+        seen.add(key)
+        if not has_commentators[row]:
+            findings.add('missing_commentators', row, date_key, matches[row], 'no commentators')
+            continue
+        merged_rows.append(row)
+
+    for row in merged_rows:
+        if scores[row] and not _SCORE_PATTERN.match(scores[row]):
+            findings.add('score_format', row, date_keys[row], matches[row], f'score {scores[row]!r}')
+        if LEAGUE_PATTERN.search(competitions[row]):
+            opponent = extract_opponent(matches[row])
+            if not opponent:
+                findings.add('unknown_team', row, date_keys[row], matches[row], 'no Ajax opponent in match name')
+            elif normalize_team_name(opponent) not in teams:
+                findings.add('unknown_team', row, date_keys[row], matches[row],
+                             f'unknown team {normalize_team_name(opponent)!r}')
+
+    # Match-day listeners against the median of the previous ROLLING_WINDOW match days
+    window: List[int] = []
+    history: List[int] = []
+    for row in sorted(merged_rows, key=lambda r: date_keys[r]):
+        value = listeners.get(date_keys[row])
+        if value is None:
+            continue
+        if value < 0:
+            findings.add('listener_outlier', row, date_keys[row], matches[row], f'negative listeners {value}')
+            continue
+        if len(window) >= MIN_BASELINE:
+            baseline = median(window)
+            if baseline > 0 and (value > baseline * OUTLIER_RATIO or value * OUTLIER_RATIO < baseline):
+                findings.add('listener_outlier', row, date_keys[row], matches[row],
+                             f'{value} listeners vs rolling median {baseline:g}')
+        history.append(value)
+        insort(window, value)
+        if len(history) > ROLLING_WINDOW:
+            window.remove(history[-ROLLING_WINDOW - 1])
+
+    return {
+        'generated_at': datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+        'rows': len(sheet_data),
+        'mergeable_rows': len(merged_rows),
+        'issues': sum(findings.counts.values()),
+        'checks': {check: {'count': findings.counts[check], 'examples': findings.examples[check]}
+                   for check in CHECKS},
+    }
+
+
+def write_report(report: Dict[str, Any], path: str = REPORT_PATH):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    write_json_atomic(path, report, separators=(',', ':'), ensure_ascii=False)
+
+
+def run_validation(sheet_data: Sequence[Dict[str, Any]], listeners: Mapping[str, int],
+                   history: Optional[StandingsHistory] = None, path: str = REPORT_PATH) -> Dict[str, Any]:
+    """Validate the merge inputs, write the report and print a one-line summary"""
+    with stage('validate inputs') as s:
+        report = validate_inputs(sheet_data, listeners, known_teams(history or StandingsHistory.load()))
+        s.add_records(len(sheet_data))
+    write_report(report, path)
+    counts = ', '.join(f"{check} {result['count']}" for check, result in report['checks'].items() if result['count'])
+    print(f"Validation: {report['issues']} issue(s) in {report['rows']} sheet rows" + (f" ({counts})" if counts else ''))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate the merge inputs")
+    parser.add_argument('--strict', action='store_true', help="exit with status 1 when any check finds an issue")
+    args = parser.parse_args()
+
+    report = run_validation(load_sheet_data(), load_api_data())
+    for check, result in report['checks'].items():
+        for example in result['examples']:
+            print(f"  {check:21s} row {example['row']:4d} {example['date']} {example['match']}: {example['detail']}")
+    if args.strict and report['issues']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    run_main(main, 'validation')